@@ -0,0 +1,17 @@
+"""
+Tooling for running and measuring the bots in ``submissions/``.
+
+Run the tools as modules from the repository root, e.g.::
+
+    python -m arena.bench run solver dp449
+"""
+
+from arena.bots import available_bots, board_from_moves, get_moves, load_bot, make_bot
+
+__all__ = [
+    "available_bots",
+    "board_from_moves",
+    "get_moves",
+    "load_bot",
+    "make_bot",
+]
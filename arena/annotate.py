@@ -0,0 +1,247 @@
+"""
+Solver annotations for the games of a game store.
+
+Every move made from a position with at most ``--max-empties`` empty cells
+gets three per-move columns in the ``arena.gamedb`` store, in
+``engine.solver`` score units:
+
+===========  ==============================================================
+column       meaning
+===========  ==============================================================
+value        exact score of the position before the move, side to move
+played       score of the move that was played
+alternative  best score among the other legal moves
+===========  ==============================================================
+
+``NO_SCORE`` marks moves that were not solved (and ``alternative`` of a
+position with a single legal move).  A move with ``played < value`` gave
+something away; ``value > 0 >= played`` is a won game thrown away.
+
+The score of a move is minus the value of the position it leads to, so the
+pass collects the children of every annotated position and solves each
+distinct one once:
+
+* children are deduplicated by ``bitboard.canonical_key`` (a position and
+  its mirror image have the same value), within a batch and against a cache
+  of everything solved before, which is kept next to the store in
+  ``solver_cache.npz``
+* the new ones are spread over a process pool in chunks; each worker keeps
+  one ``Solver`` for its whole life, so its transposition table carries over
+  from chunk to chunk
+* games are annotated in batches, and each batch is written to the store
+  as soon as it is solved
+
+Usage::
+
+    python -m arena.annotate games/ --max-empties 14 --workers 8
+
+The report lists, per bot, the annotated moves it made and how many of
+them turned a win into a draw or loss, or a draw into a loss.
+"""
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from engine import bitboard as bb
+from engine.solver import Solver
+
+from arena.gamedb import GameStore
+from arena.selfplay import NO_SCORE
+
+COLUMNS = ("value", "played", "alternative")
+
+# Games per batch written back to the store
+BATCH_GAMES = 2000
+
+# Positions per task sent to a worker
+CHUNK = 64
+
+# Entries a worker's solver table may reach before it is cleared
+TT_LIMIT = 1 << 22
+
+CACHE_FILE = "solver_cache.npz"
+
+_solver: Optional[Solver] = None
+
+
+def solve_chunk(states: List[Tuple[int, int]]) -> List[int]:
+    """Solver values of ``(position, mask)`` states for the side to move; runs in a worker."""
+    global _solver
+    if _solver is None:
+        _solver = Solver()
+    if len(_solver.tt) > TT_LIMIT:
+        _solver.tt.clear()
+    return [_solver.solve(position, mask) for position, mask in states]
+
+
+class Annotator:
+    """
+    Annotates a store's games with exact move scores.
+
+    Args:
+        store: The games.
+        max_empties: Only moves from positions with at most this many
+            empty cells are solved.
+        workers: Solver processes; 1 solves in this process.
+    """
+
+    def __init__(self, store: GameStore, max_empties: int = 14, workers: int = 1) -> None:
+        self.store = store
+        self.max_empties = max_empties
+        self.workers = workers
+        self.cache: Dict[int, int] = {}
+        self.solved = 0
+        self.load_cache()
+
+    @property
+    def cache_path(self) -> Path:
+        return self.store.directory / CACHE_FILE
+
+    def load_cache(self) -> None:
+        if self.cache_path.exists():
+            with np.load(self.cache_path) as data:
+                self.cache.update(zip(data["keys"].tolist(), data["values"].tolist()))
+
+    def save_cache(self) -> None:
+        keys = np.fromiter(self.cache.keys(), dtype=np.uint64, count=len(self.cache))
+        values = np.fromiter(self.cache.values(), dtype=np.int8, count=len(self.cache))
+        np.savez(self.cache_path, keys=keys, values=values)
+
+    def run(self, log=None) -> None:
+        """Annotate every game, one batch at a time."""
+        if self.workers <= 1:
+            self._run(None, log)
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                self._run(pool, log)
+        self.save_cache()
+
+    def _run(self, pool: Optional[ProcessPoolExecutor], log) -> None:
+        for start in range(0, len(self.store), BATCH_GAMES):
+            stop = min(start + BATCH_GAMES, len(self.store))
+            self.annotate(start, stop, pool)
+            if log is not None:
+                print(
+                    f"games {stop}/{len(self.store)}: {self.solved} positions solved, "
+                    f"{len(self.cache)} cached",
+                    file=log,
+                )
+
+    def annotate(self, start: int, stop: int, pool: Optional[ProcessPoolExecutor] = None) -> None:
+        """Solve and write the annotations of games ``start:stop``."""
+        offsets = self.store.offsets
+        first = int(offsets[start])
+        columns = {name: np.full(int(offsets[stop]) - first, NO_SCORE, dtype=np.int8) for name in COLUMNS}
+
+        # (index into the batch, position, mask, column played)
+        moves: List[Tuple[int, int, int, int]] = []
+        pending: Dict[int, Tuple[int, int]] = {}
+        for game in range(start, stop):
+            position, mask = 0, 0
+            for ply, char in enumerate(self.store.moves(game)):
+                col = int(char)
+                if bb.CELLS - ply <= self.max_empties:
+                    moves.append((int(offsets[game]) - first + ply, position, mask, col))
+                    for other in bb.legal_moves(mask):
+                        if bb.is_winning_move(position, mask, other):
+                            continue
+                        child = bb.play(position, mask, other)
+                        key = bb.canonical_key(*child)
+                        if key not in self.cache:
+                            pending[key] = child
+                position, mask = bb.play(position, mask, col)
+
+        self._solve(pending, pool)
+        for index, position, mask, col in moves:
+            scores = self.move_scores(position, mask)
+            columns["value"][index] = max(scores.values())
+            columns["played"][index] = scores[col]
+            others = [score for other, score in scores.items() if other != col]
+            if others:
+                columns["alternative"][index] = max(others)
+
+        for name, values in columns.items():
+            self.store.write_move_column(name, values, first, fill=NO_SCORE)
+
+    def move_scores(self, position: int, mask: int) -> Dict[int, int]:
+        """Score of every legal move, from the cache."""
+        win = (bb.CELLS + 1 - mask.bit_count()) // 2
+        scores = {}
+        for col in bb.legal_moves(mask):
+            if bb.is_winning_move(position, mask, col):
+                scores[col] = win
+            else:
+                scores[col] = -self.cache[bb.canonical_key(*bb.play(position, mask, col))]
+        return scores
+
+    def _solve(self, pending: Dict[int, Tuple[int, int]], pool: Optional[ProcessPoolExecutor]) -> None:
+        # Fullest boards first: they are the cheapest, and fill the tables
+        # the emptier ones then draw on
+        items = sorted(pending.items(), key=lambda item: -item[1][1].bit_count())
+        keys = [key for key, _ in items]
+        states = [state for _, state in items]
+        chunks = [states[i : i + CHUNK] for i in range(0, len(states), CHUNK)]
+        if pool is None:
+            values = [solve_chunk(chunk) for chunk in chunks]
+        else:
+            values = pool.map(solve_chunk, chunks)
+        solved = [value for chunk in values for value in chunk]
+        self.cache.update(zip(keys, solved))
+        self.solved += len(solved)
+
+
+def mistakes(store: GameStore) -> Dict[str, Dict[str, int]]:
+    """
+    Per bot: annotated moves, and how many threw away a win or a draw.
+
+    Opening moves are not counted against either bot.
+    """
+    offsets = np.asarray(store.offsets)
+    game = np.repeat(np.arange(len(store)), np.diff(offsets))
+    ply = np.arange(store.total_moves) - offsets[game]
+    red = np.asarray(store.column("red"))[game]
+    yellow = np.asarray(store.column("yellow"))[game]
+    mover = np.where(ply % 2 == 0, red, yellow)
+
+    value = np.asarray(store.column("value"))
+    played = np.asarray(store.column("played"))
+    annotated = (value != NO_SCORE) & (ply >= np.asarray(store.column("opening"))[game])
+    threw_win = annotated & (value > 0) & (played <= 0)
+    threw_draw = annotated & (value == 0) & (played < 0)
+
+    report = {}
+    for index, name in enumerate(store.bots):
+        mine = mover == index
+        report[name] = {
+            "moves": int(np.count_nonzero(annotated & mine)),
+            "threw_win": int(np.count_nonzero(threw_win & mine)),
+            "threw_draw": int(np.count_nonzero(threw_draw & mine)),
+        }
+    return report
+
+
+def print_mistakes(report: Dict[str, Dict[str, int]], out=sys.stdout) -> None:
+    print(f"{'bot':<10} {'moves':>8} {'threw win':>10} {'threw draw':>11}", file=out)
+    for name, row in sorted(report.items(), key=lambda item: -item[1]["threw_win"]):
+        print(f"{name:<10} {row['moves']:>8} {row['threw_win']:>10} {row['threw_draw']:>11}", file=out)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m arena.annotate", description=__doc__.split("\n\n")[0])
+    parser.add_argument("store", help="arena.gamedb directory")
+    parser.add_argument("--max-empties", type=int, default=14)
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    store = GameStore(args.store)
+    Annotator(store, args.max_empties, args.workers).run(log=sys.stderr)
+    print_mistakes(mistakes(store))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""
+Benchmark suite of positions with known exact values.
+
+``generate`` builds a reproducible suite of positions from random games,
+grouped into tiers by the number of empty cells, and labels every legal
+move of every position with its exact score from ``engine.solver.Solver``.
+``run`` then asks each engine for a move in every position and reports, per
+tier, the nodes searched, time, nodes/sec, mean time per position and how
+often the engine picked an optimal move (and, for engines that return a
+score, how often the score was exact).
+
+Engines are named on the command line:
+
+* ``solver``: the shared exact solver
+* ``negamax``: the shared PVS core searching to the end of the game
+* any submission, e.g. ``dp449``: the bot's ``get_move``; nodes are only
+  reported for bots that search through a ``SearchController``
+
+Usage::
+
+    python -m arena.bench generate --per-tier 20 -o bench_suite.json
+    python -m arena.bench run solver negamax dp449 -s bench_suite.json -o before.json
+
+The reports are plain JSON with sorted keys, so two runs can be diffed.
+
+``evals`` measures evaluation functions alone, in positions/sec: the NumPy
+networks of ``engine.neural`` at several batch sizes against the heuristic
+evaluations of a few bots::
+
+    python -m arena.bench evals --positions 2000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from engine import bitboard as bb
+from engine.control import SearchAborted, SearchController
+from engine.negamax import BitboardNegamax
+from engine.neural import NeuralEvaluator
+from engine.solver import Solver, non_losing_moves, to_search_score
+
+from arena.bots import board_from_moves, make_bot
+from pingv4 import CellState, ConnectFourBoard
+
+SUITE_VERSION = 1
+
+# Tier name -> (fewest, most) empty cells
+TIERS: Dict[str, Tuple[int, int]] = {
+    "end": (8, 14),
+    "middle": (15, 21),
+    "early": (22, 28),
+}
+
+
+@dataclass
+class Position:
+    """A benchmark position and its exact labels."""
+
+    tier: str
+    moves: str
+    empties: int
+    score: int
+    move_scores: Dict[int, int]
+
+    @property
+    def bitboard(self) -> Tuple[int, int]:
+        return bb.from_moves(self.moves)
+
+    @property
+    def best_moves(self) -> List[int]:
+        return [col for col, score in self.move_scores.items() if score == self.score]
+
+
+@dataclass(frozen=True)
+class Answer:
+    """An engine's reply to one position."""
+
+    move: int
+    score: Optional[int] = None
+    nodes: Optional[int] = None
+
+
+@dataclass
+class TierResult:
+    """Totals of one engine over one tier."""
+
+    positions: int = 0
+    correct: int = 0
+    exact: int = 0
+    scored: int = 0
+    nodes: int = 0
+    time: float = 0.0
+    failures: List[str] = field(default_factory=list)
+
+    def add(self, position: Position, answer: Answer, elapsed: float) -> None:
+        self.positions += 1
+        self.time += elapsed
+        if answer.nodes is not None:
+            self.nodes += answer.nodes
+        if answer.move in position.best_moves:
+            self.correct += 1
+        else:
+            self.failures.append(position.moves)
+        if answer.score is not None:
+            self.scored += 1
+            if answer.score == to_search_score(position.score, position.bitboard[1]):
+                self.exact += 1
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "positions": self.positions,
+            "correct": self.correct,
+            "accuracy": self.correct / self.positions if self.positions else 0.0,
+            "exact_scores": self.exact if self.scored else None,
+            "nodes": self.nodes,
+            "time": round(self.time, 4),
+            "nodes_per_second": round(self.nodes / self.time) if self.time > 0 else 0,
+            "mean_time": round(self.time / self.positions, 4) if self.positions else 0.0,
+            "failures": self.failures,
+        }
+
+
+# -- suite generation -------------------------------------------------------
+
+
+def random_position(rng: random.Random, empties: int) -> Optional[str]:
+    """
+    Play random moves until ``empties`` cells are left.
+
+    Returns None if the game ended on the way or the position is already
+    decided within two plies (an immediate win or no non-losing move).
+    """
+    position, mask = 0, 0
+    moves = []
+    for _ in range(bb.CELLS - empties):
+        col = rng.choice(bb.legal_moves(mask))
+        if bb.is_winning_move(position, mask, col):
+            return None
+        position, mask = bb.play(position, mask, col)
+        moves.append(str(col))
+    if bb.winning_squares(position, mask) & bb.possible(mask):
+        return None
+    if not non_losing_moves(position, mask):
+        return None
+    return "".join(moves)
+
+
+def label(tier: str, moves: str, solver: Solver) -> Position:
+    """Solve every legal move of the position after ``moves``."""
+    position, mask = bb.from_moves(moves)
+    move_scores = {}
+    for col in bb.legal_moves(mask):
+        if bb.is_winning_move(position, mask, col):
+            move_scores[col] = (bb.CELLS + 1 - mask.bit_count()) // 2
+        else:
+            move_scores[col] = -solver.solve(*bb.play(position, mask, col))
+    return Position(
+        tier, moves, bb.CELLS - mask.bit_count(), max(move_scores.values()), move_scores
+    )
+
+
+def generate(per_tier: int, seed: int = 0) -> List[Position]:
+    """Build ``per_tier`` labelled positions for every tier."""
+    rng = random.Random(seed)
+    solver = Solver()
+    suite = []
+    for tier, (fewest, most) in TIERS.items():
+        seen = set()
+        while len(seen) < per_tier:
+            moves = random_position(rng, rng.randint(fewest, most))
+            if moves is None:
+                continue
+            key = bb.key(*bb.from_moves(moves))
+            if key in seen:
+                continue
+            seen.add(key)
+            suite.append(label(tier, moves, solver))
+    return suite
+
+
+def save_suite(suite: List[Position], path: str, seed: int) -> None:
+    data = {"version": SUITE_VERSION, "seed": seed, "positions": [asdict(p) for p in suite]}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+
+
+def load_suite(path: str) -> List[Position]:
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != SUITE_VERSION:
+        raise ValueError(f"{path}: unsupported suite version {data.get('version')}")
+    suite = []
+    for item in data["positions"]:
+        # JSON object keys are strings
+        item["move_scores"] = {int(col): s for col, s in item["move_scores"].items()}
+        suite.append(Position(**item))
+    return suite
+
+
+# -- engines ----------------------------------------------------------------
+
+
+def solver_engine(time_limit: float) -> Callable[[Position], Answer]:
+    def run(position: Position) -> Answer:
+        controller = SearchController(time_limit=time_limit)
+        state = position.bitboard
+        try:
+            result = Solver(controller).best_move(*state)
+        except SearchAborted:
+            return Answer(-1, None, controller.nodes)
+        return Answer(result.move, to_search_score(result.score, state[1]), result.nodes)
+
+    return run
+
+
+def negamax_engine(time_limit: float) -> Callable[[Position], Answer]:
+    def run(position: Position) -> Answer:
+        controller = SearchController(time_limit=time_limit)
+        search = BitboardNegamax(lambda position, mask: 0, controller)
+        move, score = search.iterate(position.bitboard, max_depth=position.empties)
+        return Answer(move, score, controller.nodes)
+
+    return run
+
+
+def bot_engine(name: str) -> Callable[[Position], Answer]:
+    def run(position: Position) -> Answer:
+        board = board_from_moves(position.moves)
+        bot = make_bot(name, board.current_player)
+        move = bot.get_move(board)
+        controller = getattr(bot, "controller", None)
+        nodes = controller.nodes if isinstance(controller, SearchController) else None
+        return Answer(move, None, nodes)
+
+    return run
+
+
+def make_engine(name: str, time_limit: float) -> Callable[[Position], Answer]:
+    if name == "solver":
+        return solver_engine(time_limit)
+    if name == "negamax":
+        return negamax_engine(time_limit)
+    return bot_engine(name)
+
+
+# -- runner -----------------------------------------------------------------
+
+
+def run(
+    engines: List[str], suite: List[Position], time_limit: float = 10.0
+) -> Dict[str, object]:
+    """Benchmark every engine on every position of ``suite``."""
+    report: Dict[str, object] = {}
+    for name in engines:
+        engine = make_engine(name, time_limit)
+        tiers = {tier: TierResult() for tier in TIERS}
+        total = TierResult()
+        for position in suite:
+            start = time.perf_counter()
+            answer = engine(position)
+            elapsed = time.perf_counter() - start
+            tiers[position.tier].add(position, answer, elapsed)
+            total.add(position, answer, elapsed)
+        report[name] = {
+            "tiers": {tier: result.summary() for tier, result in tiers.items()},
+            "total": total.summary(),
+        }
+    return report
+
+
+# -- evaluators -------------------------------------------------------------
+
+# Batch sizes the networks are timed at: one leaf, one node's siblings, a
+# search frontier and a training-sized batch
+BATCH_SIZES = (1, 7, 64, 1024)
+
+
+def _opponent(player: CellState) -> CellState:
+    return CellState.Yellow if player == CellState.Red else CellState.Red
+
+
+# Bot name -> how to call its heuristic on (bot, board, position, mask)
+HEURISTICS: Dict[str, Callable[[object, ConnectFourBoard, int, int], float]] = {
+    "dp449": lambda bot, board, position, mask: bot.score_position(position, mask),
+    "la390": lambda bot, board, position, mask: bot.score_position(board, board.current_player),
+    "at612": lambda bot, board, position, mask: bot.evaluate_board(
+        board, board.current_player, _opponent(board.current_player)
+    ),
+    "va703": lambda bot, board, position, mask: bot._evaluate(
+        board, board.current_player, _opponent(board.current_player)
+    ),
+    "mp282": lambda bot, board, position, mask: bot._evaluate_side_to_move(board),
+}
+
+
+def random_positions(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        moves = random_position(rng, rng.randint(8, bb.CELLS - 2))
+        if moves is not None:
+            positions.append(moves)
+    return positions
+
+
+def _rate(count: int, elapsed: float) -> int:
+    return round(count / elapsed) if elapsed > 0 else 0
+
+
+def bench_evaluators(count: int = 2000, seed: int = 0) -> Dict[str, object]:
+    """Positions/sec of the neural evaluators and the bots' heuristics."""
+    moves = random_positions(count, seed)
+    states = [bb.from_moves(m) for m in moves]
+    positions = [p for p, _ in states]
+    masks = [m for _, m in states]
+    report: Dict[str, object] = {}
+
+    for kind in ("mlp", "conv"):
+        net = NeuralEvaluator.random(kind, seed)
+        for size in BATCH_SIZES:
+            start = time.perf_counter()
+            done = 0
+            while done < count:
+                net.evaluate_batch(positions[done : done + size], masks[done : done + size])
+                done += size
+            report[f"neural-{kind}/batch={size}"] = _rate(done, time.perf_counter() - start)
+
+    boards = [board_from_moves(m) for m in moves]
+    for name, heuristic in HEURISTICS.items():
+        bot = make_bot(name, CellState.Red)
+        start = time.perf_counter()
+        for board, (position, mask) in zip(boards, states):
+            heuristic(bot, board, position, mask)
+        report[name] = _rate(count, time.perf_counter() - start)
+    return report
+
+
+def print_report(report: Dict[str, object], out=sys.stderr) -> None:
+    header = f"{'engine':<10} {'tier':<7} {'ok':>7} {'nodes':>10} {'time':>9} {'nps':>9} {'mean':>8}"
+    print(header, file=out)
+    for name, result in report.items():
+        rows = list(result["tiers"].items()) + [("total", result["total"])]
+        for tier, s in rows:
+            print(
+                f"{name:<10} {tier:<7} {s['correct']:>3}/{s['positions']:<3} "
+                f"{s['nodes']:>10} {s['time']:>8.3f}s {s['nodes_per_second']:>9} "
+                f"{s['mean_time']:>7.3f}s",
+                file=out,
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m arena.bench", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="build and label a suite")
+    gen.add_argument("--per-tier", type=int, default=20)
+    gen.add_argument("--seed", type=int, default=0)
+    gen.add_argument("-o", "--output", default="bench_suite.json")
+
+    bench = commands.add_parser("run", help="benchmark engines on a suite")
+    bench.add_argument("engines", nargs="+", help="solver, negamax or a submission name")
+    bench.add_argument("-s", "--suite", default="bench_suite.json")
+    bench.add_argument("-t", "--time-limit", type=float, default=10.0,
+                       help="per-position budget of the solver and negamax engines")
+    bench.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+
+    evals = commands.add_parser("evals", help="positions/sec of evaluation functions")
+    evals.add_argument("--positions", type=int, default=2000)
+    evals.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+    if args.command == "generate":
+        suite = generate(args.per_tier, args.seed)
+        save_suite(suite, args.output, args.seed)
+        print(f"wrote {len(suite)} positions to {args.output}", file=sys.stderr)
+        return
+    if args.command == "evals":
+        rates = bench_evaluators(args.positions, args.seed)
+        for name, rate in rates.items():
+            print(f"{name:<24} {rate:>10} positions/s", file=sys.stderr)
+        print(json.dumps({"positions_per_second": rates}, indent=2, sort_keys=True))
+        return
+
+    report = run(args.engines, load_suite(args.suite), args.time_limit)
+    print_report(report)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Loading bots from ``submissions/`` and replaying positions for them.
+
+A submission is a module ``submissions/<netid>.py`` that defines exactly one
+``AbstractBot`` subclass; the class name varies between submissions, so bots
+are looked up by module name.
+
+Wherever a bot name is accepted, two extra forms work:
+
+* ``random``: pingv4's ``RandomBot``
+* ``<name>~<epsilon>``, e.g. ``dp449~0.1``: the bot, but each move is
+  replaced by a random legal move with probability ``epsilon``; used to
+  diversify self-play games
+
+For analysis over many positions, ``get_moves(bot, boards)`` uses the bot's
+optional batch method ``get_moves(boards)`` (one move per board, for the
+side to move of each) when it has one, and calls ``get_move`` in a loop
+otherwise.  Batch methods search to a fixed depth rather than against the
+clock, so labelling many positions is not bound by a per-move time limit.
+"""
+
+import importlib
+import inspect
+import random
+from pathlib import Path
+from typing import List, Sequence, Type
+
+from pingv4 import AbstractBot, CellState, ConnectFourBoard, RandomBot
+
+SUBMISSIONS = Path(__file__).resolve().parent.parent / "submissions"
+
+
+def available_bots() -> List[str]:
+    """Module names of every submission, sorted."""
+    return sorted(
+        path.stem
+        for path in SUBMISSIONS.glob("*.py")
+        if not path.stem.startswith("_")
+    )
+
+
+def load_bot(name: str) -> Type[AbstractBot]:
+    """Return the bot class defined in ``submissions/<name>.py``."""
+    module = importlib.import_module(f"submissions.{name}")
+    for value in vars(module).values():
+        if (
+            inspect.isclass(value)
+            and issubclass(value, AbstractBot)
+            and value.__module__ == module.__name__
+        ):
+            return value
+    raise LookupError(f"submissions/{name}.py defines no AbstractBot subclass")
+
+
+class NoisyBot(AbstractBot):
+    """
+    Wraps a bot and sometimes plays a random move instead.
+
+    Uses the ``random`` module, so games stay reproducible under a seed.
+
+    Args:
+        inner: The bot whose moves are perturbed.
+        epsilon: Probability of a random move.
+    """
+
+    def __init__(self, inner: AbstractBot, epsilon: float) -> None:
+        super().__init__(inner.player)
+        self.inner = inner
+        self.epsilon = epsilon
+
+    @property
+    def strategy_name(self) -> str:
+        return f"{self.inner.strategy_name} ~{self.epsilon}"
+
+    @property
+    def author_name(self) -> str:
+        return self.inner.author_name
+
+    @property
+    def author_netid(self) -> str:
+        return self.inner.author_netid
+
+    def get_move(self, board: ConnectFourBoard) -> int:
+        if random.random() < self.epsilon:
+            return random.choice(board.get_valid_moves())
+        return self.inner.get_move(board)
+
+
+def make_bot(name: str, player: CellState) -> AbstractBot:
+    """Instantiate the bot ``name`` playing as ``player``."""
+    if "~" in name:
+        base, epsilon = name.split("~", 1)
+        return NoisyBot(make_bot(base, player), float(epsilon))
+    if name == "random":
+        return RandomBot(player)
+    return load_bot(name)(player)
+
+
+def get_moves(bot: AbstractBot, boards: Sequence[ConnectFourBoard]) -> List[int]:
+    """The bot's move for every board, through its batch method if it has one."""
+    batch = getattr(bot, "get_moves", None)
+    if batch is not None:
+        return list(batch(boards))
+    return [bot.get_move(board) for board in boards]
+
+
+def board_from_moves(moves: str) -> ConnectFourBoard:
+    """Replay a string of column digits, e.g. ``"3342"``, from the empty board."""
+    board = ConnectFourBoard()
+    for char in moves:
+        board = board.make_move(int(char))
+    return board
@@ -0,0 +1,129 @@
+"""
+Content-addressed cache of game results.
+
+A game is fully determined by the code of both bots, the opening and the
+seed the runner gives ``random`` (``GameSpec.seed``), so its result can be
+stored under::
+
+    (source hash of Red, source hash of Yellow, opening, seed, RULES_VERSION)
+
+and a tournament that reruns after one submission changed only replays
+the games of that submission; every other pairing is answered from the
+cache.  ``source_hash`` covers the bot's module, and the whole ``engine``
+package for the bots that import it.
+
+The cache is a JSON-lines file, appended to after every run::
+
+    python -m arena.runner dp449 as658 hb969 --games 2 --cache
+
+Only games between bots that play the same way every time are cached.  A
+bot whose moves depend on the wall clock (``clock_bound``: a time-limited
+search, or any clock read in its source) can play a different game on
+another run or machine, so every pairing that involves one is replayed.
+Games that ended in an error are not cached either, so a crash caused by
+the environment is retried next time.  Profiling and memory runs bypass the
+cache, since they need the games to actually be played.
+"""
+
+import hashlib
+import json
+import re
+from functools import lru_cache
+from importlib.metadata import version
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from arena.bots import SUBMISSIONS
+
+ENGINE = Path(__file__).resolve().parent.parent / "engine"
+
+DEFAULT_PATH = ".arena-cache/results.jsonl"
+
+# Bump when the runner changes how games are played, e.g. how it seeds
+# the bots or adjudicates illegal moves
+RULES_VERSION = 1
+
+_IMPORTS_ENGINE = re.compile(rb"^\s*(?:from|import)\s+engine\b", re.MULTILINE)
+
+# A time budget handed to the engine, or a clock read of the bot's own
+_CLOCK = re.compile(rb"time_limit\s*=|\btime\.time\(|perf_counter\(|monotonic\(|process_time\(")
+
+
+@lru_cache(maxsize=None)
+def source_hash(name: str) -> str:
+    """Short hash of everything that decides how bot ``name`` plays."""
+    digest = hashlib.sha256()
+    if "~" in name:
+        base, epsilon = name.split("~", 1)
+        digest.update(f"{source_hash(base)}~{float(epsilon)}".encode())
+    elif name == "random":
+        digest.update(f"pingv4 {version('pingv4')}".encode())
+    else:
+        source = (SUBMISSIONS / f"{name}.py").read_bytes()
+        digest.update(source)
+        if _IMPORTS_ENGINE.search(source):
+            for path in sorted(ENGINE.glob("*.py")):
+                digest.update(path.name.encode())
+                digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+@lru_cache(maxsize=None)
+def clock_bound(name: str) -> bool:
+    """Whether bot ``name``'s moves depend on the wall clock."""
+    if "~" in name:
+        return clock_bound(name.split("~", 1)[0])
+    if name == "random":
+        return False
+    return bool(_CLOCK.search((SUBMISSIONS / f"{name}.py").read_bytes()))
+
+
+def cacheable(red: str, yellow: str) -> bool:
+    """Whether games between ``red`` and ``yellow`` replay identically."""
+    return not clock_bound(red) and not clock_bound(yellow)
+
+
+def result_key(red: str, yellow: str, opening: str, seed: int) -> str:
+    return f"{source_hash(red)}:{source_hash(yellow)}:{opening}:{seed}:{RULES_VERSION}"
+
+
+class ResultCache:
+    """
+    Game results on disk, keyed by ``result_key``.
+
+    Records are side-relative (``winner`` is ``"red"``, ``"yellow"`` or
+    None), so a hit does not depend on what the bots are called.
+
+    Args:
+        path: The JSON-lines file; created on first ``put``.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH) -> None:
+        self.path = Path(path)
+        self.records: Dict[str, dict] = {}
+        self.hits = 0
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    record = json.loads(line)
+                    self.records[record["key"]] = record
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, red: str, yellow: str, opening: str, seed: int) -> Optional[dict]:
+        record = self.records.get(result_key(red, yellow, opening, seed))
+        if record is not None:
+            self.hits += 1
+        return record
+
+    def put_all(self, records: Iterable[dict]) -> None:
+        """Add ``key``-ed records and append them to the file."""
+        new = [record for record in records if record["key"] not in self.records]
+        if not new:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            for record in new:
+                self.records[record["key"]] = record
+                f.write(json.dumps(record, sort_keys=True) + "\n")
@@ -0,0 +1,332 @@
+"""
+Tournament games spread over several machines through a TCP work queue.
+
+A coordinator holds the games of a round robin and hands them out over a
+plain TCP socket; workers on any number of hosts connect, pull one game at
+a time, play it with ``runner.run_game`` and send the result back.  The
+protocol is one JSON object per line, always answered by one line:
+
+==========================================  ==================================
+worker sends                                coordinator answers
+==========================================  ==================================
+``{"op": "get", "worker": name}``           ``{"job": id, "spec": {...},
+                                            "lease": seconds}``, or
+                                            ``{"wait": seconds}`` while every
+                                            remaining job is leased, or
+                                            ``{"done": true}``
+``{"op": "renew", "job": id}``              ``{"ok": bool}``
+``{"op": "result", "job": id,               ``{"ok": bool}``, or
+"record": {...}}``                          ``{"error": ...}`` for a record
+                                            that does not fit the job
+==========================================  ==================================
+
+A job is leased to one worker at a time.  Workers renew their lease from a
+heartbeat thread while the game runs; a lease that expires, or whose
+connection drops, is put back at the front of the queue for the next
+worker.  If a lost worker turns up with its result after all, the first
+result for a job wins and later ones are ignored.  A record that does not
+parse, or was played for another spec, is refused and its job requeued.
+
+``record`` is ``runner.to_record``, so the results are the same as those
+of a local run.  The runner has no time control of its own (every bot keeps
+its own clock), so a job is the ``GameSpec``: bot pair, opening and seed.
+
+Usage::
+
+    # on the coordinator
+    python -m arena.distributed serve dp449 as658 hb969 --games 4 --port 5555
+    # on every worker host
+    python -m arena.distributed work coordinator-host:5555 --processes 8
+    # or all on this host
+    python -m arena.distributed local dp449 as658 hb969 --games 4 --processes 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict
+from typing import Deque, Dict, List, Optional, Tuple
+
+from arena.cache import result_key
+from arena.runner import (
+    GameResult,
+    GameSpec,
+    RunOptions,
+    from_record,
+    print_standings,
+    run_game,
+    schedule,
+    to_record,
+)
+
+DEFAULT_PORT = 5555
+
+# Seconds a job stays leased without a renewal
+LEASE = 60.0
+
+# Seconds an idle worker waits before asking again
+POLL = 1.0
+
+
+class Coordinator:
+    """
+    The job queue, its leases and the results.
+
+    Args:
+        specs: Games to hand out.
+        lease: Seconds a job may go without a renewal before it is requeued.
+    """
+
+    def __init__(self, specs: List[GameSpec], lease: float = LEASE) -> None:
+        self.specs = specs
+        self.lease = lease
+        self.pending: Deque[int] = deque(range(len(specs)))
+        # job -> (connection id, deadline)
+        self.leases: Dict[int, Tuple[int, float]] = {}
+        self.results: Dict[int, dict] = {}
+        self.requeued = 0
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        if not specs:
+            self.finished.set()
+
+    def handle(self, request: dict, connection: int) -> dict:
+        with self.lock:
+            self._expire()
+            op = request.get("op")
+            if op == "get":
+                return self._get(connection)
+            if op in ("renew", "result") and request["job"] not in range(len(self.specs)):
+                return {"error": f"unknown job {request['job']!r}"}
+            if op == "renew":
+                job = request["job"]
+                owner = self.leases.get(job)
+                if owner is None or owner[0] != connection:
+                    return {"ok": False}
+                self.leases[job] = (connection, time.monotonic() + self.lease)
+                return {"ok": True}
+            if op == "result":
+                return self._result(request["job"], request["record"])
+            return {"error": f"unknown op {op!r}"}
+
+    def _get(self, connection: int) -> dict:
+        if self.pending:
+            job = self.pending.popleft()
+            self.leases[job] = (connection, time.monotonic() + self.lease)
+            return {"job": job, "spec": asdict(self.specs[job]), "lease": self.lease}
+        if self.leases:
+            return {"wait": POLL}
+        return {"done": True}
+
+    def _result(self, job: int, record: dict) -> dict:
+        self.leases.pop(job, None)
+        if job in self.results:
+            return {"ok": False}
+        error = self._check(job, record)
+        if error is not None:
+            if job not in self.pending:
+                self.pending.appendleft(job)
+                self.requeued += 1
+            return {"error": f"bad record for job {job}: {error}"}
+        self.results[job] = record
+        if job in self.pending:
+            self.pending.remove(job)
+        if len(self.results) == len(self.specs):
+            self.finished.set()
+        return {"ok": True}
+
+    def _check(self, job: int, record: dict) -> Optional[str]:
+        """Why ``record`` is not a result of job ``job``, or None if it is."""
+        spec = self.specs[job]
+        try:
+            result = from_record(spec, record)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            return repr(e)
+        if record.get("key") != result_key(spec.red, spec.yellow, spec.opening, spec.seed):
+            return "played for another spec or bot version"
+        if not isinstance(result.moves, str) or not result.moves.startswith(spec.opening):
+            return "moves do not follow the opening"
+        return None
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for job, (_, deadline) in list(self.leases.items()):
+            if deadline < now:
+                self._requeue(job)
+
+    def _requeue(self, job: int) -> None:
+        del self.leases[job]
+        if job not in self.results:
+            self.pending.appendleft(job)
+            self.requeued += 1
+
+    def disconnected(self, connection: int) -> None:
+        """Requeue the jobs of a worker whose connection closed."""
+        with self.lock:
+            for job, (owner, _) in list(self.leases.items()):
+                if owner == connection:
+                    self._requeue(job)
+
+    def game_results(self) -> List[GameResult]:
+        return [from_record(self.specs[job], record) for job, record in sorted(self.results.items())]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        coordinator: Coordinator = self.server.coordinator
+        connection = id(self)
+        try:
+            for line in self.rfile:
+                try:
+                    reply = coordinator.handle(json.loads(line), connection)
+                except (AttributeError, KeyError, TypeError, ValueError) as e:
+                    # Malformed request, e.g. a "result" without "job"
+                    reply = {"error": f"bad request: {e!r}"}
+                self.wfile.write(json.dumps(reply).encode() + b"\n")
+        except ConnectionError:
+            pass
+        finally:
+            coordinator.disconnected(connection)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(coordinator: Coordinator, host: str = "", port: int = DEFAULT_PORT) -> _Server:
+    """Start serving ``coordinator`` in a background thread; returns the server."""
+    server = _Server((host, port), _Handler)
+    server.coordinator = coordinator
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _Connection:
+    """One worker's line-based connection; requests may come from several threads."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.sock = socket.create_connection((host, port))
+        self.file = self.sock.makefile("rwb")
+        self.lock = threading.Lock()
+
+    def request(self, message: dict) -> dict:
+        with self.lock:
+            self.file.write(json.dumps(message).encode() + b"\n")
+            self.file.flush()
+            line = self.file.readline()
+        if not line:
+            raise ConnectionError("coordinator closed the connection")
+        return json.loads(line)
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+
+def work(address: str, name: str = "", log=sys.stderr) -> int:
+    """Pull and play games until the coordinator is done; returns games played."""
+    host, port = address.rsplit(":", 1)
+    connection = _Connection(host or "localhost", int(port))
+    name = name or f"{socket.gethostname()}:{multiprocessing.current_process().pid}"
+    played = 0
+    try:
+        while True:
+            reply = connection.request({"op": "get", "worker": name})
+            if reply.get("done"):
+                return played
+            if "wait" in reply:
+                time.sleep(reply["wait"])
+                continue
+            job = reply["job"]
+            stop = threading.Event()
+            heartbeat = threading.Thread(
+                target=_renew, args=(connection, job, reply["lease"] / 3, stop), daemon=True
+            )
+            heartbeat.start()
+            try:
+                result = run_game(GameSpec(**reply["spec"]), RunOptions())
+            finally:
+                stop.set()
+                heartbeat.join()
+            reply = connection.request({"op": "result", "job": job, "record": to_record(result)})
+            if "error" in reply:
+                print(f"{name}: {reply['error']}", file=log)
+            played += 1
+    except OSError as e:
+        print(f"{name}: {e}", file=log)
+        return played
+    finally:
+        connection.close()
+
+
+def _renew(connection: _Connection, job: int, interval: float, stop: threading.Event) -> None:
+    while not stop.wait(interval):
+        try:
+            connection.request({"op": "renew", "job": job})
+        except (ConnectionError, OSError):
+            return
+
+
+def start_workers(address: str, processes: int) -> List[multiprocessing.Process]:
+    workers = [multiprocessing.Process(target=work, args=(address,)) for _ in range(processes)]
+    for process in workers:
+        process.start()
+    return workers
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m arena.distributed", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for command in ("serve", "local"):
+        sub = commands.add_parser(command, help="coordinate a round robin"
+                                  + (" with workers on this host" if command == "local" else ""))
+        sub.add_argument("bots", nargs="+")
+        sub.add_argument("-g", "--games", type=int, default=1, help="games per pairing and side")
+        sub.add_argument("--seed", type=int, default=0)
+        sub.add_argument("--lease", type=float, default=LEASE)
+        if command == "serve":
+            sub.add_argument("--host", default="")
+            sub.add_argument("--port", type=int, default=DEFAULT_PORT)
+        else:
+            sub.add_argument("-p", "--processes", type=int, default=2)
+
+    worker = commands.add_parser("work", help="play games for a coordinator")
+    worker.add_argument("address", help="host:port of the coordinator")
+    worker.add_argument("-p", "--processes", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.command == "work":
+        for process in start_workers(args.address, args.processes):
+            process.join()
+        return
+
+    coordinator = Coordinator(schedule(args.bots, args.games, args.seed), args.lease)
+    if args.command == "serve":
+        server = serve(coordinator, args.host, args.port)
+        workers = []
+    else:
+        server = serve(coordinator, "localhost", 0)
+        workers = start_workers(f"localhost:{server.server_address[1]}", args.processes)
+    print(f"serving {len(coordinator.specs)} games on port {server.server_address[1]}", file=sys.stderr)
+    while not coordinator.finished.wait(POLL):
+        if workers and not any(process.is_alive() for process in workers):
+            server.shutdown()
+            remaining = len(coordinator.specs) - len(coordinator.results)
+            sys.exit(f"every worker exited with {remaining} games left")
+    for process in workers:
+        process.join()
+    server.shutdown()
+    print(f"{coordinator.requeued} jobs requeued", file=sys.stderr)
+    print_standings(coordinator.game_results())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Columnar game database.
+
+A store is a directory of ``.npy`` columns that ``numpy.load(mmap_mode="r")``
+maps without copying, so millions of games open instantly:
+
+===============  =======  ==================================================
+file             dtype    meaning
+===============  =======  ==================================================
+moves.npy        uint8    every move of every game, 3 bits per column
+                          number, packed little-endian into one bit stream
+offsets.npy      int64    ``len + 1`` move offsets; game ``i`` is moves
+                          ``offsets[i]:offsets[i + 1]`` of the stream
+red.npy          uint16   index of Red's bot in ``bots.json``
+yellow.npy       uint16   index of Yellow's bot in ``bots.json``
+winner.npy       int8     ``CellState`` value of the winner (Red = 1,
+                          Yellow = 0), -1 for a draw
+opening.npy      uint8    plies of the game that were the given opening
+seed.npy         int64    ``GameSpec.seed``
+time_red.npy     float32  Red's total thinking time, seconds
+time_yellow.npy  float32  Yellow's total thinking time, seconds
+error.npy        bool     the game ended by a crash or an illegal move
+===============  =======  ==================================================
+
+plus ``bots.json``, the list of bot names.  A 40-move game takes 15 bytes
+of moves and 34 of metadata, so a million games fit in about 50 MB.
+
+Columns are appended in bulk: the ``.npy`` files are written with a
+fixed-size header that is rewritten in place with the new length, and the
+data goes on the end of the file.  Columns of one value per move (e.g. the
+solver annotations of ``arena.annotate``) can be added next to the game
+columns with ``write_move_column``.
+
+Usage::
+
+    python -m arena.runner dp449 as658 hb969 --games 10 --store games/
+    python -m arena.gamedb games/
+
+and from Python::
+
+    store = GameStore("games/")
+    store.moves(0)                  # "3342..."
+    store.column("winner")          # memory-mapped
+    store.all_moves()               # every move, decoded, as one array
+"""
+
+import argparse
+import ast
+import json
+import os
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from arena.runner import GameResult
+
+# Bits per move; columns 0-6 fit in 3
+MOVE_BITS = 3
+
+GAME_COLUMNS: Dict[str, np.dtype] = {
+    "red": np.dtype("<u2"),
+    "yellow": np.dtype("<u2"),
+    "winner": np.dtype("i1"),
+    "opening": np.dtype("u1"),
+    "seed": np.dtype("<i8"),
+    "time_red": np.dtype("<f4"),
+    "time_yellow": np.dtype("<f4"),
+    "error": np.dtype("?"),
+}
+
+# Format 1.0 header padded to a fixed size, so it can be rewritten in place
+# as the column grows; a multiple of 64 keeps the data aligned
+HEADER_SIZE = 128
+_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def _header(dtype: np.dtype, length: int) -> bytes:
+    text = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (length,)})
+    body_size = HEADER_SIZE - len(_MAGIC) - 2
+    body = text.encode("latin1").ljust(body_size - 1) + b"\n"
+    if len(body) != body_size:
+        raise ValueError(f"header of {length} items does not fit in {HEADER_SIZE} bytes")
+    return _MAGIC + body_size.to_bytes(2, "little") + body
+
+
+def _read_header(f) -> dict:
+    f.seek(0)
+    prefix = f.read(len(_MAGIC) + 2)
+    if prefix[: len(_MAGIC)] != _MAGIC:
+        raise ValueError(f"{f.name} is not an appendable .npy column")
+    body_size = int.from_bytes(prefix[len(_MAGIC) :], "little")
+    return ast.literal_eval(f.read(body_size).decode("latin1"))
+
+
+def append_column(path: Path, values: np.ndarray) -> int:
+    """Append ``values`` to the 1-d ``.npy`` column at ``path``; returns its new length."""
+    values = np.ascontiguousarray(values)
+    if not path.exists():
+        with open(path, "wb") as f:
+            f.write(_header(values.dtype, len(values)))
+            f.write(values.tobytes())
+        return len(values)
+    with open(path, "r+b") as f:
+        header = _read_header(f)
+        dtype = np.dtype(header["descr"])
+        length = header["shape"][0] + len(values)
+        f.seek(HEADER_SIZE + header["shape"][0] * dtype.itemsize)
+        f.write(values.astype(dtype, copy=False).tobytes())
+        f.truncate()
+        f.seek(0)
+        f.write(_header(dtype, length))
+    return length
+
+
+def pack_moves(moves: np.ndarray, start_bit: int = 0) -> np.ndarray:
+    """Bytes of the bit stream of ``moves``, starting ``start_bit`` into the first byte."""
+    bits = (moves[:, None] >> np.arange(MOVE_BITS, dtype=np.uint8)) & 1
+    bits = np.concatenate([np.zeros(start_bit, dtype=np.uint8), bits.ravel()])
+    return np.packbits(bits, bitorder="little")
+
+
+def unpack_moves(packed: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Moves ``start:stop`` of a packed stream, as uint8 column numbers."""
+    first, last = start * MOVE_BITS, stop * MOVE_BITS
+    chunk = np.asarray(packed[first // 8 : (last + 7) // 8])
+    bits = np.unpackbits(chunk, bitorder="little")[first % 8 : first % 8 + last - first]
+    return bits.reshape(-1, MOVE_BITS) @ (1 << np.arange(MOVE_BITS, dtype=np.uint8))
+
+
+def _winner(result: "GameResult") -> int:
+    if result.winner is None:
+        return -1
+    return 1 if result.winner == result.spec.red else 0
+
+
+class GameStore:
+    """
+    A directory of game columns, created on first append.
+
+    Reads memory-map the columns and are cached until the next append.
+
+    Args:
+        directory: Where the columns live.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        bots_path = self.directory / "bots.json"
+        self.bots: List[str] = json.loads(bots_path.read_text()) if bots_path.exists() else []
+        self._index = {name: i for i, name in enumerate(self.bots)}
+        self._maps: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def offsets(self) -> np.ndarray:
+        if not (self.directory / "offsets.npy").exists():
+            return np.zeros(1, dtype=np.int64)
+        return self.column("offsets")
+
+    @property
+    def total_moves(self) -> int:
+        return int(self.offsets[-1])
+
+    def column(self, name: str) -> np.ndarray:
+        """The memory-mapped column ``name``."""
+        if name not in self._maps:
+            self._maps[name] = np.load(self.directory / f"{name}.npy", mmap_mode="r")
+        return self._maps[name]
+
+    def columns(self) -> List[str]:
+        return sorted(path.stem for path in self.directory.glob("*.npy"))
+
+    def bot_id(self, name: str) -> int:
+        if name not in self._index:
+            self._index[name] = len(self.bots)
+            self.bots.append(name)
+        return self._index[name]
+
+    def append(self, results: Iterable["GameResult"]) -> int:
+        """Append finished games in bulk; returns how many were added."""
+        results = list(results)
+        if not results:
+            return 0
+        games = {name: np.zeros(len(results), dtype=dtype) for name, dtype in GAME_COLUMNS.items()}
+        for i, result in enumerate(results):
+            spec = result.spec
+            games["red"][i] = self.bot_id(spec.red)
+            games["yellow"][i] = self.bot_id(spec.yellow)
+            games["winner"][i] = _winner(result)
+            games["opening"][i] = len(spec.opening)
+            games["seed"][i] = spec.seed
+            games["time_red"][i] = sum(result.times.get(spec.red, ()))
+            games["time_yellow"][i] = sum(result.times.get(spec.yellow, ()))
+            games["error"][i] = result.error is not None
+        self.append_games([result.moves for result in results], games)
+        return len(results)
+
+    def append_games(self, moves: Sequence[str], games: Dict[str, np.ndarray]) -> None:
+        """
+        Append raw columns: ``moves`` as digit strings and one array per game column.
+
+        The move stream is written before the offsets, so an interrupted
+        append leaves unreferenced moves rather than a broken store.
+        """
+        lengths = np.fromiter((len(m) for m in moves), dtype=np.int64, count=len(moves))
+        flat = np.frombuffer("".join(moves).encode("ascii"), dtype=np.uint8) - ord("0")
+        total = self.total_moves
+        used_bits = total * MOVE_BITS
+        start_bit = used_bits % 8
+
+        packed = pack_moves(flat, start_bit)
+        path = self.directory / "moves.npy"
+        if start_bit:
+            # Merge the partly filled last byte with the first new bits
+            packed[0] |= self.column("moves")[used_bits // 8]
+            self._maps.clear()
+            self._set_length(path, used_bits // 8)
+        append_column(path, packed)
+
+        for name, dtype in GAME_COLUMNS.items():
+            append_column(self.directory / f"{name}.npy", np.asarray(games[name], dtype=dtype))
+        if not (self.directory / "offsets.npy").exists():
+            append_column(self.directory / "offsets.npy", np.zeros(1, dtype=np.int64))
+        append_column(self.directory / "offsets.npy", total + np.cumsum(lengths))
+        (self.directory / "bots.json").write_text(json.dumps(self.bots))
+        self._maps.clear()
+
+    @staticmethod
+    def _set_length(path: Path, length: int) -> None:
+        with open(path, "r+b") as f:
+            header = _read_header(f)
+            f.seek(0)
+            f.write(_header(np.dtype(header["descr"]), length))
+
+    def write_move_column(self, name: str, values: np.ndarray, start: int = 0, fill: int = 0) -> None:
+        """
+        Write one value per move into column ``name``, from move ``start`` on.
+
+        The column is created or extended with ``fill`` to the length of
+        the move stream as needed, so it can be filled a batch at a time.
+        """
+        path = self.directory / f"{name}.npy"
+        values = np.asarray(values)
+        self._maps.pop(name, None)
+        current = len(np.load(path, mmap_mode="r")) if path.exists() else 0
+        if current < self.total_moves:
+            append_column(path, np.full(self.total_moves - current, fill, dtype=values.dtype))
+        column = np.load(path, mmap_mode="r+")
+        column[start : start + len(values)] = values
+        column.flush()
+        del column
+
+    def moves(self, game: int) -> str:
+        """Game ``game``'s moves as a digit string, opening included."""
+        offsets = self.offsets
+        decoded = unpack_moves(self.column("moves"), int(offsets[game]), int(offsets[game + 1]))
+        return "".join(map(str, decoded.tolist()))
+
+    def all_moves(self) -> np.ndarray:
+        """Every move of every game, decoded; slice with ``offsets``."""
+        if not len(self):
+            return np.zeros(0, dtype=np.uint8)
+        return unpack_moves(self.column("moves"), 0, self.total_moves)
+
+    def __iter__(self) -> Iterator[str]:
+        flat = self.all_moves()
+        offsets = self.offsets
+        text = (flat + ord("0")).tobytes().decode("ascii")
+        for i in range(len(self)):
+            yield text[offsets[i] : offsets[i + 1]]
+
+    def game(self, index: int) -> Dict[str, object]:
+        """Every column of one game, with bot names resolved."""
+        row: Dict[str, object] = {name: self.column(name)[index].item() for name in GAME_COLUMNS}
+        row["red"] = self.bots[row["red"]]
+        row["yellow"] = self.bots[row["yellow"]]
+        row["moves"] = self.moves(index)
+        return row
+
+    def summary(self) -> Dict[str, object]:
+        size = sum(os.path.getsize(path) for path in self.directory.glob("*.npy"))
+        return {
+            "games": len(self),
+            "moves": self.total_moves,
+            "bots": len(self.bots),
+            "bytes": size,
+            "columns": self.columns(),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m arena.gamedb", description=__doc__.split("\n\n")[0])
+    parser.add_argument("directory")
+    parser.add_argument("--show", type=int, nargs="*", default=[], help="print these games")
+    args = parser.parse_args(argv)
+
+    store = GameStore(args.directory)
+    print(json.dumps(store.summary(), indent=2), file=sys.stderr)
+    for index in args.show:
+        print(json.dumps(store.game(index)))
+
+
+if __name__ == "__main__":
+    main()
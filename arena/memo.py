@@ -0,0 +1,187 @@
+"""
+Move memoization for deterministic bots.
+
+Most tournament games share their first moves, and many submissions always
+answer a position with the same move.  For those bots the runner can look
+the move up instead of calling ``get_move``: moves are stored in an SQLite
+file under ``(source hash, position key)``, where the hash is
+``arena.cache.source_hash`` (so an edited bot starts afresh) and the key is
+``bitboard.key`` of the position.
+
+A bot is only memoized once ``check_deterministic`` has seen two fresh
+instances, seeded differently and asked in opposite orders, agree on a
+sample of positions; the verdict is stored per source hash too.  A bot that
+fails the check, depending on what it searched earlier, or that crashes is
+always played.  So is a bot whose move depends on its clock
+(``arena.cache.clock_bound``, e.g. a time-limited iterative deepening
+search): a few sample positions cannot show that it is deterministic, so
+it is not checked at all.  Only bots on a fixed depth or node budget are
+memoized.
+
+Usage::
+
+    python -m arena.runner aa557 ss691 as617 mp282 --games 4 --memo
+
+SQLite handles the locking, so every worker of the pool shares one file;
+each game's new moves are written in one transaction when it ends.
+"""
+
+import random
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from pingv4 import AbstractBot, ConnectFourBoard
+
+from engine import bitboard as bb
+
+from arena.bench import random_positions
+from arena.bots import board_from_moves, make_bot
+from arena.cache import clock_bound, source_hash
+
+DEFAULT_PATH = ".arena-cache/moves.sqlite"
+
+# Positions replayed by ``check_deterministic``
+CHECK_POSITIONS = 6
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS moves (bot TEXT, key INTEGER, move INTEGER, PRIMARY KEY (bot, key));
+CREATE TABLE IF NOT EXISTS bots (bot TEXT PRIMARY KEY, deterministic INTEGER);
+"""
+
+
+class MoveMemo:
+    """
+    The on-disk move store.
+
+    Args:
+        path: SQLite file; created if missing.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.executescript(_SCHEMA)
+        self.pending: List[Tuple[str, int, int]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def is_deterministic(self, name: str) -> Optional[bool]:
+        """The stored verdict for ``name``'s current source, None if never checked."""
+        row = self.db.execute(
+            "SELECT deterministic FROM bots WHERE bot = ?", (source_hash(name),)
+        ).fetchone()
+        return None if row is None else bool(row[0])
+
+    def set_deterministic(self, name: str, deterministic: bool) -> None:
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO bots VALUES (?, ?)", (source_hash(name), int(deterministic))
+            )
+
+    def lookup(self, name: str, key: int) -> Optional[int]:
+        row = self.db.execute(
+            "SELECT move FROM moves WHERE bot = ? AND key = ?", (source_hash(name), key)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def record(self, name: str, key: int, move: int) -> None:
+        """Queue a move; written by ``flush``."""
+        self.pending.append((source_hash(name), key, move))
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO moves VALUES (?, ?, ?)", self.pending)
+        self.pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.db.close()
+
+
+def check_deterministic(name: str, positions: int = CHECK_POSITIONS, seed: int = 0) -> bool:
+    """
+    Whether ``name`` plays a fixed move per position.
+
+    Two fresh instances, with different ``random`` seeds, are asked for
+    their moves on the same sample of positions in opposite orders.  Bots
+    on a time budget, and bots that raise, are not deterministic.
+    """
+    if name == "random" or "~" in name or clock_bound(name):
+        return False
+    samples = [board_from_moves(moves) for moves in random_positions(positions, seed)]
+    answers: List[Dict[int, int]] = []
+    for attempt, order in enumerate((samples, samples[::-1])):
+        random.seed(seed + attempt)
+        bots = {}
+        moves = {}
+        for board in order:
+            player = board.current_player
+            try:
+                if int(player) not in bots:
+                    bots[int(player)] = make_bot(name, player)
+                moves[id(board)] = bots[int(player)].get_move(board)
+            except Exception:
+                return False
+        answers.append(moves)
+    return answers[0] == answers[1]
+
+
+def deterministic_bots(names: List[str], memo: MoveMemo, log=sys.stderr) -> Tuple[str, ...]:
+    """The bots of ``names`` that may be memoized, checking unknown ones first."""
+    result = []
+    for name in dict.fromkeys(names):
+        if clock_bound(name):
+            continue
+        verdict = memo.is_deterministic(name)
+        if verdict is None:
+            verdict = check_deterministic(name)
+            memo.set_deterministic(name, verdict)
+            print(f"{name}: {'deterministic' if verdict else 'not deterministic'}", file=log)
+        if verdict:
+            result.append(name)
+    return tuple(result)
+
+
+class MemoBot(AbstractBot):
+    """
+    Answers positions seen before from the memo, asks the wrapped bot otherwise.
+
+    Args:
+        inner: A deterministic bot.
+        name: Its submission name, for the source hash.
+        memo: The move store.
+    """
+
+    def __init__(self, inner: AbstractBot, name: str, memo: MoveMemo) -> None:
+        super().__init__(inner.player)
+        self.inner = inner
+        self.name = name
+        self.memo = memo
+
+    @property
+    def strategy_name(self) -> str:
+        return self.inner.strategy_name
+
+    @property
+    def author_name(self) -> str:
+        return self.inner.author_name
+
+    @property
+    def author_netid(self) -> str:
+        return self.inner.author_netid
+
+    def get_move(self, board: ConnectFourBoard) -> int:
+        key = bb.key(*bb.from_board(board))
+        move = self.memo.lookup(self.name, key)
+        if move is None:
+            move = self.inner.get_move(board)
+            self.memo.record(self.name, key, move)
+        return move
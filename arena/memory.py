@@ -0,0 +1,308 @@
+"""
+Per-bot memory tracking across a game.
+
+Several bots keep transposition tables and caches on ``self`` that are never
+cleared, so their memory grows with every move of a tournament.  With
+memory tracking on, the runner samples after every move:
+
+* the process RSS and the memory traced by ``tracemalloc``
+* the size of every container reachable from the bot's attributes, e.g.
+  ``tt``, ``transposition_table`` or ``engine.tt``
+
+and at the end of the game records the bot's top allocating source lines,
+tagged with the ``self.<attribute>`` they write to when the line shows it.
+Allocations made in ``engine/`` on the bot's behalf (the shared negamax
+writes the transposition tables of several bots) are counted for the bot
+that just moved: every sample diffs the engine's lines against the previous
+sample, and the net growth goes to the mover.
+``MemoryReport`` summarises this as the peak, the growth slope per move and
+the largest containers.
+
+Sizes of large containers are estimated from a sample of their items, so a
+sample stays cheap even for a table with millions of entries.
+"""
+
+import itertools
+import linecache
+import os
+import re
+import resource
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Items measured per container when estimating its size
+SAMPLE_ITEMS = 32
+
+# Attribute nesting followed from the bot, e.g. bot.engine.tt is depth 2
+MAX_DEPTH = 2
+
+# One frame keeps tracemalloc's overhead low; allocations are attributed to
+# the line that made them
+TRACE_FRAMES = 1
+
+ENGINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "engine")
+
+_ATTRIBUTE = re.compile(r"self\.(\w+(?:\.\w+)*)")
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate deep size of a container from a sample of its items."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = list(itertools.islice(value.items(), SAMPLE_ITEMS))
+        sampled = sum(sys.getsizeof(k) + _shallow_items(v) for k, v in items)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = list(itertools.islice(value, SAMPLE_ITEMS))
+        sampled = sum(_shallow_items(v) for v in items)
+    else:
+        return size
+    if not items:
+        return size
+    return size + sampled * len(value) // len(items)
+
+
+def _shallow_items(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(sys.getsizeof(v) for v in value)
+    return size
+
+
+def container_sizes(
+    obj: Any, prefix: str = "", depth: int = 1, seen: Optional[set] = None
+) -> Dict[str, Tuple[int, int]]:
+    """
+    ``{attribute path: (len, estimated bytes)}`` for containers on ``obj``.
+
+    A container shared by several attributes (e.g. a bot's ``tt`` that is
+    also its engine's ``tt``) is reported once, under the first path.
+    """
+    seen = seen if seen is not None else set()
+    sizes: Dict[str, Tuple[int, int]] = {}
+    for name, value in vars(obj).items():
+        if id(value) in seen:
+            continue
+        path = prefix + name
+        if isinstance(value, (dict, list, set, tuple, frozenset)):
+            seen.add(id(value))
+            sizes[path] = (len(value), estimate_size(value))
+        elif depth < MAX_DEPTH and hasattr(value, "__dict__") and not isinstance(value, type):
+            seen.add(id(value))
+            sizes.update(container_sizes(value, path + ".", depth + 1, seen))
+    return sizes
+
+
+@dataclass
+class MemorySample:
+    """Memory after one of a bot's moves."""
+
+    move: int
+    rss: int
+    traced: int
+    containers: Dict[str, Tuple[int, int]]
+
+    @property
+    def retained(self) -> int:
+        """Estimated bytes held by the bot's containers."""
+        return sum(size for _, size in self.containers.values())
+
+
+@dataclass
+class MemoryReport:
+    """One bot's memory over one or more games."""
+
+    samples: List[MemorySample] = field(default_factory=list)
+    allocators: List[Tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def peak_rss(self) -> int:
+        return max((s.rss for s in self.samples), default=0)
+
+    @property
+    def peak_retained(self) -> int:
+        return max((s.retained for s in self.samples), default=0)
+
+    @property
+    def slope(self) -> float:
+        """Least-squares growth of the retained bytes per move."""
+        n = len(self.samples)
+        if n < 2:
+            return 0.0
+        xs = [s.move for s in self.samples]
+        ys = [s.retained for s in self.samples]
+        mean_x = sum(xs) / n
+        mean_y = sum(ys) / n
+        var = sum((x - mean_x) ** 2 for x in xs)
+        if var == 0:
+            return 0.0
+        return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var
+
+    def largest(self, count: int = 5) -> List[Tuple[str, int, int]]:
+        """``(attribute, len, bytes)`` of the biggest containers seen."""
+        biggest: Dict[str, Tuple[int, int]] = {}
+        for sample in self.samples:
+            for name, (length, size) in sample.containers.items():
+                if size > biggest.get(name, (0, 0))[1]:
+                    biggest[name] = (length, size)
+        rows = [(name, length, size) for name, (length, size) in biggest.items()]
+        return sorted(rows, key=lambda row: -row[2])[:count]
+
+    def merge(self, other: "MemoryReport") -> None:
+        """Fold in another game's report; moves keep counting on."""
+        offset = self.samples[-1].move + 1 if self.samples else 0
+        for sample in other.samples:
+            self.samples.append(
+                MemorySample(sample.move + offset, sample.rss, sample.traced, sample.containers)
+            )
+        totals = dict(self.allocators)
+        for where, size in other.allocators:
+            totals[where] = max(totals.get(where, 0), size)
+        self.allocators = sorted(totals.items(), key=lambda item: -item[1])[:10]
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "moves": len(self.samples),
+            "peak_rss": self.peak_rss,
+            "peak_retained": self.peak_retained,
+            "slope_per_move": round(self.slope),
+            "largest": self.largest(),
+            "allocators": self.allocators,
+        }
+
+
+class MemoryTracker:
+    """
+    Samples the memory of the bots in one game.
+
+    Args:
+        top: Allocating lines kept per bot.
+    """
+
+    def __init__(self, top: int = 10) -> None:
+        self.top = top
+        self.bots: Dict[str, Any] = {}
+        self.reports: Dict[str, MemoryReport] = {}
+        # Net bytes allocated per engine line during each bot's moves
+        self.engine_lines: Dict[str, Dict[Tuple[str, int], int]] = {}
+        self._engine_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            self._started = True
+
+    def stop(self) -> None:
+        for name in self.bots:
+            self.reports[name].allocators = self.allocators(name)
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def watch(self, name: str, bot: Any) -> None:
+        self.bots[name] = bot
+        self.reports.setdefault(name, MemoryReport())
+        self.engine_lines.setdefault(name, {})
+        # What the bots allocated while being built is nobody's move
+        self._engine_snapshot = self._snapshot_engine()
+
+    def after_move(self, name: str) -> None:
+        """Record ``name``'s memory after it has moved."""
+        report = self.reports[name]
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        snapshot = self._snapshot_engine()
+        if snapshot is not None and self._engine_snapshot is not None:
+            lines = self.engine_lines[name]
+            for stat in snapshot.compare_to(self._engine_snapshot, "lineno"):
+                if stat.size_diff:
+                    frame = stat.traceback[0]
+                    where = (frame.filename, frame.lineno)
+                    lines[where] = lines.get(where, 0) + stat.size_diff
+        self._engine_snapshot = snapshot
+        report.samples.append(
+            MemorySample(len(report.samples), rss_bytes(), traced, container_sizes(self.bots[name]))
+        )
+
+    def allocators(self, name: str) -> List[Tuple[str, int]]:
+        """
+        Top lines of ``name``'s module by the memory they allocated and still
+        hold, and of the engine by what they allocated during its moves.
+        """
+        if not tracemalloc.is_tracing():
+            return []
+        module = sys.modules.get(type(self.bots[name]).__module__)
+        filename = getattr(module, "__file__", None)
+        if filename is None:
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(True, filename)]
+        )
+        totals = {
+            (stat.traceback[0].filename, stat.traceback[0].lineno): stat.size
+            for stat in snapshot.statistics("lineno")
+        }
+        for where, size in self.engine_lines.get(name, {}).items():
+            if size > 0:
+                totals[where] = size
+        top = sorted(totals.items(), key=lambda item: -item[1])[: self.top]
+        return [(self._tag(filename, lineno), size) for (filename, lineno), size in top]
+
+    @staticmethod
+    def _snapshot_engine() -> Optional[tracemalloc.Snapshot]:
+        if not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(True, os.path.join(ENGINE, "*"))]
+        )
+
+    @staticmethod
+    def _tag(filename: str, lineno: int) -> str:
+        where = f"{os.path.basename(filename)}:{lineno}"
+        match = _ATTRIBUTE.search(linecache.getline(filename, lineno))
+        return f"{where} self.{match.group(1)}" if match else where
+
+
+def merge(parts: Iterable[Dict[str, MemoryReport]]) -> Dict[str, MemoryReport]:
+    """Combine the per-game reports of every bot."""
+    merged: Dict[str, MemoryReport] = {}
+    for part in parts:
+        for name, report in part.items():
+            merged.setdefault(name, MemoryReport()).merge(report)
+    return merged
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GiB"
+
+
+def print_reports(reports: Dict[str, MemoryReport], out: Optional[Any] = None) -> None:
+    out = out if out is not None else sys.stdout
+    print(f"{'bot':<10} {'peak rss':>10} {'retained':>10} {'slope/move':>11}  largest", file=out)
+    for name, report in sorted(reports.items()):
+        largest = ", ".join(
+            f"{attr}[{length}]={format_bytes(size)}" for attr, length, size in report.largest(3)
+        )
+        print(
+            f"{name:<10} {format_bytes(report.peak_rss):>10} "
+            f"{format_bytes(report.peak_retained):>10} {format_bytes(report.slope):>11}  {largest}",
+            file=out,
+        )
+        for where, size in report.allocators[:3]:
+            print(f"{'':<10} {format_bytes(size):>10}  allocated at {where}", file=out)
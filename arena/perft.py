@@ -0,0 +1,130 @@
+"""
+Perft: raw move-generation speed and correctness of the board implementations.
+
+``perft(root, depth)`` counts the positions reachable in exactly ``depth``
+plies, not expanding positions where the game is over.  Every
+implementation must agree on the counts; the timings show what a bare
+move costs before any search or evaluation is added:
+
+* ``pingv4``: ``ConnectFourBoard.get_valid_moves`` / ``make_move`` /
+  ``is_in_progress``, the Rust core every bot receives
+* ``as658``: as658's ``Bitboard`` object (``can_play`` / ``make_move`` /
+  ``is_win``)
+* ``engine``: the shared ``engine.bitboard`` functions on ``(position, mask)``
+  integers
+
+Usage::
+
+    python -m arena.perft --depth 7
+    python -m arena.perft --depth 6 --roots "" 3333 3300 --impl engine as658
+
+From the empty board, perft is 7, 49, 343, 2401, 16807, 117649 and 823536
+for depths 1 to 7.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from engine import bitboard as bb
+
+from arena.bots import board_from_moves
+
+DEFAULT_ROOTS = ("", "3342", "332456")
+
+
+def perft_pingv4(board, depth: int) -> int:
+    if depth == 0:
+        return 1
+    if not board.is_in_progress:
+        return 0
+    return sum(perft_pingv4(board.make_move(col), depth - 1) for col in board.get_valid_moves())
+
+
+def perft_as658(board, depth: int) -> int:
+    if depth == 0:
+        return 1
+    if board.is_win() or board.moves_count == bb.CELLS:
+        return 0
+    return sum(
+        perft_as658(board.make_move(col), depth - 1) for col in range(bb.COLS) if board.can_play(col)
+    )
+
+
+def perft_engine(state: Tuple[int, int], depth: int) -> int:
+    if depth == 0:
+        return 1
+    position, mask = state
+    if bb.is_win(position ^ mask) or mask == bb.BOARD_MASK:
+        return 0
+    opponent = position ^ mask
+    total = 0
+    for col in range(bb.COLS):
+        if not mask & bb.TOP[col]:
+            total += perft_engine((opponent, mask | (mask + bb.BOTTOM[col])), depth - 1)
+    return total
+
+
+def _as658_root(moves: str):
+    return importlib.import_module("submissions.as658").Bitboard.from_pingv4(board_from_moves(moves))
+
+
+# name -> (root from a move string, perft function)
+IMPLEMENTATIONS: Dict[str, Tuple[Callable[[str], object], Callable[[object, int], int]]] = {
+    "pingv4": (board_from_moves, perft_pingv4),
+    "as658": (_as658_root, perft_as658),
+    "engine": (bb.from_moves, perft_engine),
+}
+
+
+def run(roots: Sequence[str], depth: int, implementations: Sequence[str]) -> Dict[str, object]:
+    """Counts and nodes/sec per implementation; raises if the counts disagree."""
+    report: Dict[str, object] = {"depth": depth, "roots": list(roots), "implementations": {}}
+    # Every move played on the way, interior ones included, is a node
+    nodes = sum(perft_engine(bb.from_moves(moves), d) for moves in roots for d in range(1, depth + 1))
+    expected: Optional[List[int]] = None
+    for name in implementations:
+        make_root, perft = IMPLEMENTATIONS[name]
+        counts = []
+        elapsed = 0.0
+        for moves in roots:
+            root = make_root(moves)
+            start = time.perf_counter()
+            counts.append(perft(root, depth))
+            elapsed += time.perf_counter() - start
+        if expected is None:
+            expected = counts
+        elif counts != expected:
+            raise AssertionError(f"{name} counts {counts} differ from {implementations[0]} {expected}")
+        report["implementations"][name] = {
+            "counts": counts,
+            "nodes": nodes,
+            "time": round(elapsed, 3),
+            "nps": round(nodes / elapsed) if elapsed > 0 else 0,
+        }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m arena.perft", description=__doc__.split("\n\n")[0])
+    parser.add_argument("-d", "--depth", type=int, default=6)
+    parser.add_argument("--roots", nargs="+", default=list(DEFAULT_ROOTS),
+                        help="root positions as move strings; '' is the empty board")
+    parser.add_argument("--impl", nargs="+", default=list(IMPLEMENTATIONS), choices=list(IMPLEMENTATIONS))
+    args = parser.parse_args(argv)
+
+    report = run(args.roots, args.depth, args.impl)
+    print(f"{'impl':<8} {'nodes':>10} {'time':>8} {'nodes/s':>10}  counts", file=sys.stderr)
+    for name, row in report["implementations"].items():
+        print(
+            f"{name:<8} {row['nodes']:>10} {row['time']:>8.3f} {row['nps']:>10}  {row['counts']}",
+            file=sys.stderr,
+        )
+    print(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Sampling profiler for bots' ``get_move``.
+
+A background thread wakes every ``interval`` seconds and, if the watched
+thread is inside a ``sampling(bot)`` block, records that thread's Python
+stack.  Nothing is hooked into the bot itself, so the overhead is one stack
+walk per sample instead of a callback per call as with ``cProfile``.
+
+Calls into the pingv4 core do not create Python frames; their time shows up
+on the line of the bot that made the call, which is why the innermost frame
+of each stack carries its current line number.
+
+Samples are kept as ``{bot: Counter({"frame;frame;...": count})}`` so the
+counters of several worker processes can simply be added together, and are
+written in the collapsed-stack format read by ``flamegraph.pl`` and
+speedscope, one file per bot.
+"""
+
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from types import FrameType
+from typing import Dict, Iterable, Iterator, List, Optional
+
+Samples = Dict[str, Counter]
+
+# Frames above the bot's get_move are the runner's own and are dropped
+ROOT_FUNCTION = "get_move"
+
+
+def frame_label(frame: FrameType, leaf: bool = False) -> str:
+    code = frame.f_code
+    name = os.path.basename(code.co_filename)
+    line = frame.f_lineno if leaf else code.co_firstlineno
+    return f"{code.co_name} ({name}:{line})"
+
+
+def collapse(frame: Optional[FrameType]) -> Optional[str]:
+    """``"outer;...;inner"`` for the stack below the outermost ``get_move``."""
+    labels: List[str] = []
+    root = None
+    leaf = True
+    while frame is not None:
+        labels.append(frame_label(frame, leaf))
+        leaf = False
+        if frame.f_code.co_name == ROOT_FUNCTION:
+            root = len(labels)
+        frame = frame.f_back
+    if root is None:
+        return None
+    return ";".join(reversed(labels[:root]))
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread while a bot is thinking.
+
+    Args:
+        interval: Seconds between two samples.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.samples: Samples = {}
+        self._bot: Optional[str] = None
+        self._thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling the calling thread."""
+        self._thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @contextmanager
+    def sampling(self, bot: str) -> Iterator[None]:
+        """Attribute the samples taken inside the block to ``bot``."""
+        self._bot = bot
+        try:
+            yield
+        finally:
+            self._bot = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            bot = self._bot
+            if bot is None:
+                continue
+            stack = collapse(sys._current_frames().get(self._thread_id))
+            if stack is not None:
+                self.samples.setdefault(bot, Counter())[stack] += 1
+
+
+def merge(parts: Iterable[Samples]) -> Samples:
+    """Add up the samples of several processes."""
+    merged: Samples = {}
+    for part in parts:
+        for bot, counter in part.items():
+            merged.setdefault(bot, Counter()).update(counter)
+    return merged
+
+
+def write_collapsed(samples: Samples, directory: str) -> List[Path]:
+    """Write ``<directory>/<bot>.collapsed`` for every bot; returns the paths."""
+    out = Path(directory)
+    out.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for bot, counter in sorted(samples.items()):
+        path = out / f"{bot}.collapsed"
+        with open(path, "w") as f:
+            for stack, count in counter.most_common():
+                f.write(f"{stack} {count}\n")
+        paths.append(path)
+    return paths
@@ -0,0 +1,314 @@
+"""
+Round-robin tournament runner for the bots in ``submissions/``.
+
+Every pair of bots plays ``games`` games from each side.  Games are
+independent, so they are farmed out to a process pool; each game is
+described by a picklable ``GameSpec`` and comes back as a ``GameResult``.
+
+Usage::
+
+    python -m arena.runner dp449 as658 hb969 --games 2 --workers 4
+    python -m arena.runner dp449 as658 --profile --profile-dir profiles/
+
+``--profile`` samples the stacks of every ``get_move`` call (see
+``arena.profiler``) and writes one collapsed-stack file per bot.
+``--memory`` samples each bot's memory after every move (see
+``arena.memory``) and reports peak, growth and the largest containers.
+``--store`` appends every game to a columnar game store (``arena.gamedb``).
+``--cache`` answers games whose bots have not changed from a result cache
+(``arena.cache``) and only plays the rest; pairings with a bot on a time
+budget are always played.  ``--memo`` looks up the moves of
+deterministic bots in positions they have seen before (``arena.memo``).
+"""
+
+import argparse
+import itertools
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pingv4 import CellState
+
+from arena import memo, memory, profiler
+from arena.bots import board_from_moves, make_bot
+from arena.cache import DEFAULT_PATH, ResultCache, cacheable, result_key
+from arena.gamedb import GameStore
+
+
+@dataclass(frozen=True)
+class GameSpec:
+    """One game to play: ``red`` moves first from the ``opening`` position."""
+
+    red: str
+    yellow: str
+    opening: str = ""
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class RunOptions:
+    """Per-run switches shared by every game."""
+
+    profile: bool = False
+    profile_interval: float = 0.005
+    memory: bool = False
+    memo: Optional[str] = None
+    memo_bots: Tuple[str, ...] = ()
+
+
+@dataclass
+class GameResult:
+    """Outcome of one game."""
+
+    spec: GameSpec
+    winner: Optional[str]
+    moves: str
+    times: Dict[str, List[float]]
+    error: Optional[str] = None
+    samples: profiler.Samples = field(default_factory=dict)
+    memory_reports: Dict[str, memory.MemoryReport] = field(default_factory=dict)
+
+    @property
+    def loser(self) -> Optional[str]:
+        if self.winner is None:
+            return None
+        return self.spec.yellow if self.winner == self.spec.red else self.spec.red
+
+
+def play_game(
+    spec: GameSpec,
+    sampler: Optional[profiler.StackSampler] = None,
+    tracker: Optional[memory.MemoryTracker] = None,
+    moves_memo: Optional[memo.MoveMemo] = None,
+    memo_bots: Tuple[str, ...] = (),
+) -> GameResult:
+    """
+    Play one game to the end.
+
+    A bot that raises or returns an illegal move loses the game.  The bots
+    in ``memo_bots`` answer positions already in ``moves_memo`` from it.
+    """
+    random.seed(spec.seed)
+    board = board_from_moves(spec.opening)
+    # CellState is not hashable; index by int(player) (Yellow = 0, Red = 1)
+    names = [spec.yellow, spec.red]
+    bots = [make_bot(spec.yellow, CellState.Yellow), make_bot(spec.red, CellState.Red)]
+    if moves_memo is not None:
+        bots = [
+            memo.MemoBot(bot, name, moves_memo) if name in memo_bots else bot
+            for name, bot in zip(names, bots)
+        ]
+    times: Dict[str, List[float]] = {spec.red: [], spec.yellow: []}
+    moves = [spec.opening]
+    if tracker is not None:
+        for name, bot in zip(names, bots):
+            tracker.watch(name, bot)
+
+    while board.is_in_progress:
+        player = int(board.current_player)
+        name = names[player]
+        other = names[1 - player]
+        start = time.perf_counter()
+        try:
+            if sampler is not None:
+                with sampler.sampling(name):
+                    move = bots[player].get_move(board)
+            else:
+                move = bots[player].get_move(board)
+        except Exception as e:
+            return GameResult(spec, other, "".join(moves), times, f"{name}: {e!r}")
+        times[name].append(time.perf_counter() - start)
+        if tracker is not None:
+            tracker.after_move(name)
+
+        if move not in board.get_valid_moves():
+            return GameResult(spec, other, "".join(moves), times, f"{name}: illegal move {move!r}")
+        board = board.make_move(move)
+        moves.append(str(move))
+
+    winner = names[int(board.winner)] if board.is_victory else None
+    return GameResult(spec, winner, "".join(moves), times)
+
+
+def run_game(spec: GameSpec, options: RunOptions) -> GameResult:
+    """Worker entry point: play ``spec`` with the per-run instrumentation."""
+    sampler = profiler.StackSampler(options.profile_interval) if options.profile else None
+    tracker = memory.MemoryTracker() if options.memory else None
+    moves_memo = memo.MoveMemo(options.memo) if options.memo else None
+    if sampler is not None:
+        sampler.start()
+    if tracker is not None:
+        tracker.start()
+    try:
+        result = play_game(spec, sampler, tracker, moves_memo, options.memo_bots)
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        if tracker is not None:
+            tracker.stop()
+        if moves_memo is not None:
+            moves_memo.close()
+    if sampler is not None:
+        result.samples = sampler.samples
+    if tracker is not None:
+        result.memory_reports = tracker.reports
+    return result
+
+
+def schedule(bots: List[str], games: int, seed: int = 0) -> List[GameSpec]:
+    """Round robin: every ordered pair of distinct bots plays ``games`` games."""
+    specs = []
+    for i, (red, yellow) in enumerate(itertools.permutations(bots, 2)):
+        for game in range(games):
+            specs.append(GameSpec(red, yellow, seed=seed + i * games + game))
+    return specs
+
+
+def run_games(
+    specs: Iterable[GameSpec], options: RunOptions = RunOptions(), workers: int = 1
+) -> List[GameResult]:
+    """Play every game, in a process pool when ``workers > 1``."""
+    specs = list(specs)
+    if workers <= 1:
+        return [run_game(spec, options) for spec in specs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_game, specs, itertools.repeat(options)))
+
+
+def to_record(result: GameResult) -> dict:
+    """Side-relative cache record of a finished game."""
+    spec = result.spec
+    winner = None
+    if result.winner is not None:
+        winner = "red" if result.winner == spec.red else "yellow"
+    return {
+        "key": result_key(spec.red, spec.yellow, spec.opening, spec.seed),
+        "winner": winner,
+        "moves": result.moves,
+        "times": [result.times[spec.red], result.times[spec.yellow]],
+        "error": result.error,
+    }
+
+
+def from_record(spec: GameSpec, record: dict) -> GameResult:
+    names = {"red": spec.red, "yellow": spec.yellow, None: None}
+    red_times, yellow_times = record["times"]
+    return GameResult(
+        spec,
+        names[record["winner"]],
+        record["moves"],
+        {spec.red: red_times, spec.yellow: yellow_times},
+        record.get("error"),
+    )
+
+
+def run_cached(
+    specs: Iterable[GameSpec], cache: ResultCache, options: RunOptions = RunOptions(), workers: int = 1
+) -> List[GameResult]:
+    """``run_games``, but reproducible games already in ``cache`` are not replayed."""
+    results = []
+    missing = []
+    for spec in specs:
+        if not cacheable(spec.red, spec.yellow):
+            missing.append(spec)
+            continue
+        record = cache.get(spec.red, spec.yellow, spec.opening, spec.seed)
+        if record is not None:
+            results.append(from_record(spec, record))
+        else:
+            missing.append(spec)
+    played = run_games(missing, options, workers)
+    cache.put_all(
+        to_record(result)
+        for result in played
+        if result.error is None and cacheable(result.spec.red, result.spec.yellow)
+    )
+    return results + played
+
+
+def standings(results: Iterable[GameResult]) -> List[Tuple[str, int, int, int, float]]:
+    """``(bot, wins, draws, losses, points)`` rows, best first."""
+    table: Dict[str, List[int]] = {}
+    for result in results:
+        for name in (result.spec.red, result.spec.yellow):
+            table.setdefault(name, [0, 0, 0])
+        if result.winner is None:
+            table[result.spec.red][1] += 1
+            table[result.spec.yellow][1] += 1
+        else:
+            table[result.winner][0] += 1
+            table[result.loser][2] += 1
+    rows = [(name, w, d, l, w + d / 2) for name, (w, d, l) in table.items()]
+    return sorted(rows, key=lambda row: (-row[4], row[0]))
+
+
+def print_standings(results: List[GameResult], out=sys.stdout) -> None:
+    print(f"{'bot':<10} {'W':>4} {'D':>4} {'L':>4} {'pts':>6} {'s/move':>7}", file=out)
+    move_times: Dict[str, List[float]] = {}
+    for result in results:
+        for name, times in result.times.items():
+            move_times.setdefault(name, []).extend(times)
+    for name, w, d, l, points in standings(results):
+        times = move_times.get(name) or [0.0]
+        print(
+            f"{name:<10} {w:>4} {d:>4} {l:>4} {points:>6.1f} {sum(times) / len(times):>7.3f}",
+            file=out,
+        )
+    for result in results:
+        if result.error:
+            print(f"error in {result.spec.red} vs {result.spec.yellow}: {result.error}", file=out)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m arena.runner", description=__doc__.split("\n\n")[0])
+    parser.add_argument("bots", nargs="+", help="submission names, e.g. dp449")
+    parser.add_argument("-g", "--games", type=int, default=1, help="games per pairing and side")
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", action="store_true", help="sample get_move stacks")
+    parser.add_argument("--profile-interval", type=float, default=0.005)
+    parser.add_argument("--profile-dir", default="profiles")
+    parser.add_argument("--memory", action="store_true", help="track each bot's memory per move")
+    parser.add_argument("--store", help="append the games to this arena.gamedb directory")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_PATH,
+                        help=f"reuse results of unchanged bots (default file {DEFAULT_PATH})")
+    parser.add_argument("--memo", nargs="?", const=memo.DEFAULT_PATH,
+                        help=f"memoize deterministic bots' moves (default file {memo.DEFAULT_PATH})")
+    args = parser.parse_args(argv)
+
+    memo_bots: Tuple[str, ...] = ()
+    if args.memo:
+        moves_memo = memo.MoveMemo(args.memo)
+        memo_bots = memo.deterministic_bots(args.bots, moves_memo)
+        moves_memo.close()
+    options = RunOptions(
+        profile=args.profile, profile_interval=args.profile_interval, memory=args.memory,
+        memo=args.memo, memo_bots=memo_bots,
+    )
+    specs = schedule(args.bots, args.games, args.seed)
+    if args.cache and not (args.profile or args.memory):
+        cache = ResultCache(args.cache)
+        results = run_cached(specs, cache, options, args.workers)
+        print(f"{cache.hits} of {len(specs)} games from {args.cache}", file=sys.stderr)
+    else:
+        results = run_games(specs, options, args.workers)
+    print_standings(results)
+
+    if args.store:
+        added = GameStore(args.store).append(results)
+        print(f"stored {added} games in {args.store}", file=sys.stderr)
+
+    if args.profile:
+        samples = profiler.merge(result.samples for result in results)
+        for path in profiler.write_collapsed(samples, args.profile_dir):
+            print(f"wrote {path}", file=sys.stderr)
+
+    if args.memory:
+        memory.print_reports(memory.merge(result.memory_reports for result in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Sharded self-play data generator.
+
+Plays games between the chosen bots (noisy ones included, see
+``arena.bots``) across a process pool and writes every position of every
+game to fixed-size NumPy shards.  Each worker streams its records into a
+preallocated shard buffer and saves it as soon as it is full, so memory
+stays at one shard per worker however many games are played.
+
+A shard is a ``.npy`` file holding a structured array of ``RECORD``:
+
+========  =======  =====================================================
+field     dtype    meaning
+========  =======  =====================================================
+position  uint64   pieces of the side to move (``engine.bitboard``)
+mask      uint64   all pieces
+side      int8     side to move, ``CellState`` value (Red = 1 moves first)
+ply       int8     stones on the board
+outcome   int8     final result for the side to move: 1, 0 or -1
+score     int8     exact solver score (``engine.solver``) or ``NO_SCORE``
+========  =======  =====================================================
+
+Usage::
+
+    python -m arena.selfplay dp449~0.1 as658~0.1 --games 2000 --workers 8 -o data/
+    python -m arena.selfplay random --games 100000 --solve-below 12 -o data/
+
+Shards are read back with ``numpy.load`` or ``load_shards``.
+"""
+
+import argparse
+import itertools
+import json
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from engine import bitboard as bb
+from engine.solver import Solver
+
+from arena.bench import random_position
+from arena.runner import GameSpec, play_game
+
+RECORD = np.dtype(
+    [
+        ("position", "<u8"),
+        ("mask", "<u8"),
+        ("side", "i1"),
+        ("ply", "i1"),
+        ("outcome", "i1"),
+        ("score", "i1"),
+    ]
+)
+
+# ``score`` of positions that were not solved
+NO_SCORE = -128
+
+SHARD_SIZE = 1 << 20
+
+
+class ShardWriter:
+    """
+    Streams records into fixed-size ``.npy`` shards.
+
+    Args:
+        directory: Where the shards go.
+        prefix: File name prefix; shards are ``<prefix>-<index>.npy``.
+        shard_size: Records per shard; the last shard may be shorter.
+    """
+
+    def __init__(self, directory: str, prefix: str, shard_size: int = SHARD_SIZE) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.buffer = np.zeros(shard_size, dtype=RECORD)
+        self.filled = 0
+        self.written = 0
+        self.paths: List[str] = []
+
+    def append(self, records: np.ndarray) -> None:
+        while len(records):
+            take = min(len(records), len(self.buffer) - self.filled)
+            self.buffer[self.filled : self.filled + take] = records[:take]
+            self.filled += take
+            records = records[take:]
+            if self.filled == len(self.buffer):
+                self.flush()
+
+    def flush(self) -> None:
+        if not self.filled:
+            return
+        path = self.directory / f"{self.prefix}-{len(self.paths):05d}.npy"
+        np.save(path, self.buffer[: self.filled])
+        self.paths.append(str(path))
+        self.written += self.filled
+        self.filled = 0
+
+    def close(self) -> None:
+        self.flush()
+
+
+def game_records(moves: str, solver: Optional[Solver] = None, solve_below: int = 0) -> np.ndarray:
+    """
+    Records of every position of a finished game, before each move.
+
+    Positions with at most ``solve_below`` empty cells get a solver score.
+    """
+    positions, masks, scores = [], [], []
+    position, mask = 0, 0
+    last_won = False
+    for ply, char in enumerate(moves):
+        positions.append(position)
+        masks.append(mask)
+        if solver is not None and bb.CELLS - ply <= solve_below:
+            scores.append(solver.solve(position, mask))
+        else:
+            scores.append(NO_SCORE)
+        col = int(char)
+        last_won = bb.is_winning_move(position, mask, col)
+        position, mask = bb.play(position, mask, col)
+
+    records = np.zeros(len(moves), dtype=RECORD)
+    records["position"] = positions
+    records["mask"] = masks
+    records["ply"] = np.arange(len(moves))
+    # Red moves first, so it is to move at even plies
+    records["side"] = 1 - (records["ply"] & 1)
+    records["score"] = scores
+
+    # Only the player of the last move can have won; outcome alternates back
+    if last_won:
+        winner_side = 1 - ((len(moves) - 1) & 1)
+        records["outcome"] = np.where(records["side"] == winner_side, 1, -1)
+    else:
+        records["outcome"] = 0
+    return records
+
+
+@dataclass(frozen=True)
+class Job:
+    """One worker's share of the games."""
+
+    worker: int
+    specs: Tuple[GameSpec, ...]
+    directory: str
+    shard_size: int
+    solve_below: int
+
+
+def run_job(job: Job) -> Tuple[int, int, List[str]]:
+    """Play the job's games; returns ``(games, records, shard paths)``."""
+    writer = ShardWriter(job.directory, f"shard-{job.worker:03d}", job.shard_size)
+    solver = Solver() if job.solve_below > 0 else None
+    games = 0
+    for spec in job.specs:
+        result = play_game(spec)
+        if result.error is not None:
+            print(f"skipped {spec}: {result.error}", file=sys.stderr)
+            continue
+        writer.append(game_records(result.moves, solver, job.solve_below))
+        games += 1
+        if solver is not None and len(solver.tt) > 1 << 22:
+            solver.tt.clear()
+    writer.close()
+    return games, writer.written, writer.paths
+
+
+def schedule(
+    bots: Sequence[str], games: int, random_plies: int, seed: int = 0
+) -> Iterator[GameSpec]:
+    """
+    ``games`` games cycling through every ordered pair of ``bots``.
+
+    Each game starts from ``random_plies`` random moves, so deterministic
+    bots do not replay the same game.
+    """
+    rng = random.Random(seed)
+    pairs = itertools.cycle(itertools.product(bots, repeat=2))
+    for game in range(games):
+        red, yellow = next(pairs)
+        opening = None
+        while opening is None:
+            opening = random_position(rng, bb.CELLS - random_plies)
+        yield GameSpec(red, yellow, opening, seed=seed + game)
+
+
+def generate(
+    bots: Sequence[str],
+    games: int,
+    directory: str,
+    workers: int = 1,
+    shard_size: int = SHARD_SIZE,
+    random_plies: int = 4,
+    solve_below: int = 0,
+    seed: int = 0,
+) -> dict:
+    """Play the games, write the shards and a ``manifest.json``; returns the manifest."""
+    specs = list(schedule(bots, games, random_plies, seed))
+    jobs = [
+        Job(worker, tuple(specs[worker::workers]), directory, shard_size, solve_below)
+        for worker in range(workers)
+    ]
+    if workers <= 1:
+        outputs = [run_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(run_job, jobs))
+
+    manifest = {
+        "bots": list(bots),
+        "games": sum(games for games, _, _ in outputs),
+        "records": sum(records for _, records, _ in outputs),
+        "random_plies": random_plies,
+        "solve_below": solve_below,
+        "seed": seed,
+        "shards": sorted(path for _, _, paths in outputs for path in paths),
+    }
+    with open(Path(directory) / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def load_shards(directory: str, mmap: bool = True) -> Iterator[np.ndarray]:
+    """Yield the shards listed in ``directory/manifest.json`` one at a time."""
+    with open(Path(directory) / "manifest.json") as f:
+        manifest = json.load(f)
+    for path in manifest["shards"]:
+        yield np.load(path, mmap_mode="r" if mmap else None)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m arena.selfplay", description=__doc__.split("\n\n")[0])
+    parser.add_argument("bots", nargs="+", help="bot names, e.g. dp449 or dp449~0.1")
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("-o", "--output", default="selfplay")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    parser.add_argument("--random-plies", type=int, default=4)
+    parser.add_argument("--solve-below", type=int, default=0,
+                        help="label positions with at most this many empty cells with the solver")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    manifest = generate(
+        args.bots, args.games, args.output, args.workers,
+        args.shard_size, args.random_plies, args.solve_below, args.seed,
+    )
+    print(
+        f"{manifest['games']} games, {manifest['records']} positions "
+        f"in {len(manifest['shards'])} shards under {args.output}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
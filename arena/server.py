@@ -0,0 +1,320 @@
+"""
+Game server for humans against the bots.
+
+``main.py``'s "Human vs Your Bot" test is one blocking game per process.
+This server hosts any number of games at once on one asyncio event loop,
+one game per TCP connection, while the bots think in a pool of worker
+processes (``BotPool``), so a slow ``get_move`` never holds up the event
+loop.  The game state lives in the server as a bitboard; a bot is created
+afresh in a worker for every move and sees the position as a pingv4
+board, as in a tournament.
+
+Moves wait in line for a free worker, and a bot's clock only starts once a
+worker has its move.  A bot that runs out of time has its worker killed
+and replaced, so an unbounded search cannot keep a worker from the other
+games.
+
+The protocol is line based; every command gets one or more reply lines::
+
+    > NEW dp449 red             play Red (moves first) against dp449
+    < GAME red dp449
+    > PLAY 3
+    < OK 3
+    < BOT 2                     the bot's answer
+    > BOARD
+    < BOARD 32                  the moves so far
+    > PLAY 3
+    ...
+    < END win                   win, loss or draw, from your point of view
+
+``BOTS`` lists the bots on offer, ``QUIT`` closes the connection, and a bad
+command gets ``ERR <reason>``.  A bot that crashes, plays an illegal move or
+exceeds ``--move-timeout`` loses the game.
+
+Usage::
+
+    python -m arena.server dp449 as770 hb969 --port 4444 --workers 8
+    nc localhost 4444
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import List, Optional, Sequence, Tuple
+
+from engine import bitboard as bb
+
+from arena.bots import board_from_moves, make_bot
+
+DEFAULT_PORT = 4444
+
+# Seconds a bot may think before it forfeits
+MOVE_TIMEOUT = 30.0
+
+
+def bot_move(name: str, moves: str) -> int:
+    """Worker entry point: ``name``'s move after ``moves``."""
+    board = board_from_moves(moves)
+    return int(make_bot(name, board.current_player).get_move(board))
+
+
+class BotError(Exception):
+    """A bot raised instead of returning a move."""
+
+
+def _serve_moves(connection: Connection) -> None:
+    """Worker process: answer ``(name, moves)`` requests until the pipe closes."""
+    while True:
+        try:
+            name, moves = connection.recv()
+        except EOFError:
+            return
+        try:
+            connection.send((True, bot_move(name, moves)))
+        except Exception as e:
+            connection.send((False, repr(e)))
+
+
+class _Worker:
+    """One worker process and the server's end of its pipe."""
+
+    def __init__(self) -> None:
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_serve_moves, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def move(self, name: str, moves: str, timeout: float) -> Tuple[bool, object]:
+        """Blocking: ``(True, move)`` or ``(False, error)``; raises TimeoutError."""
+        self.connection.send((name, moves))
+        if not self.connection.poll(timeout):
+            raise TimeoutError
+        return self.connection.recv()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class BotPool:
+    """
+    Worker processes that each think about one move at a time.
+
+    A move waits for an idle worker before its clock starts; a worker whose
+    bot overruns the timeout, or dies, is killed and replaced.
+
+    Args:
+        workers: Number of worker processes.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = [_Worker() for _ in range(workers)]
+        # Threads wait on the pipes, one per worker
+        self.waiters = ThreadPoolExecutor(max_workers=workers)
+        self.idle: Optional[asyncio.Queue] = None
+
+    async def move(self, name: str, moves: str, timeout: float) -> int:
+        if self.idle is None:
+            self.idle = asyncio.Queue()
+            for worker in self.workers:
+                self.idle.put_nowait(worker)
+        worker = await self.idle.get()
+        loop = asyncio.get_running_loop()
+        try:
+            ok, value = await loop.run_in_executor(self.waiters, worker.move, name, moves, timeout)
+        except TimeoutError:
+            worker = self._replace(worker)
+            raise asyncio.TimeoutError from None
+        except (EOFError, OSError) as e:
+            worker = self._replace(worker)
+            raise BotError(f"worker died: {e!r}") from None
+        except asyncio.CancelledError:
+            # The worker is still busy with this move
+            worker = self._replace(worker)
+            raise
+        finally:
+            self.idle.put_nowait(worker)
+        if not ok:
+            raise BotError(value)
+        return int(value)
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        fresh = _Worker()
+        self.workers[self.workers.index(worker)] = fresh
+        return fresh
+
+    def close(self) -> None:
+        for worker in self.workers:
+            worker.kill()
+        self.waiters.shutdown(wait=False)
+
+
+class GameServer:
+    """
+    Serves games against ``bots`` on one event loop.
+
+    Args:
+        bots: Names of the bots players may choose.
+        pool: Where the bots think.
+        move_timeout: Seconds a bot has per move, from when a worker starts on it.
+    """
+
+    def __init__(self, bots: Sequence[str], pool: BotPool, move_timeout: float = MOVE_TIMEOUT) -> None:
+        self.bots = list(bots)
+        self.pool = pool
+        self.move_timeout = move_timeout
+        self.games = 0
+        self.active = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.active += 1
+        try:
+            await _Session(self, reader, writer).run()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.active -= 1
+            writer.close()
+
+    async def bot_move(self, name: str, moves: str) -> int:
+        return await self.pool.move(name, moves, self.move_timeout)
+
+
+class _Session:
+    """One connection: at most one game at a time."""
+
+    def __init__(self, server: GameServer, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.bot: Optional[str] = None
+        self.moves = ""
+        self.position = 0
+        self.mask = 0
+
+    async def send(self, line: str) -> None:
+        self.writer.write(line.encode() + b"\n")
+        await self.writer.drain()
+
+    async def run(self) -> None:
+        await self.send(f"HELLO bots: {' '.join(self.server.bots)}")
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            words = line.decode(errors="replace").split()
+            if not words:
+                continue
+            command, args = words[0].upper(), words[1:]
+            if command == "QUIT":
+                return
+            if command == "BOTS":
+                await self.send(f"BOTS {' '.join(self.server.bots)}")
+            elif command == "NEW":
+                await self.new_game(args)
+            elif command == "PLAY":
+                await self.play(args)
+            elif command == "BOARD":
+                await self.send(f"BOARD {self.moves}")
+            else:
+                await self.send(f"ERR unknown command {command}")
+
+    async def new_game(self, args: List[str]) -> None:
+        if not args or args[0] not in self.server.bots:
+            await self.send("ERR usage: NEW <bot> [red|yellow]")
+            return
+        side = args[1].lower() if len(args) > 1 else "red"
+        if side not in ("red", "yellow"):
+            await self.send("ERR side must be red or yellow")
+            return
+        self.bot = args[0]
+        self.moves = ""
+        self.position, self.mask = 0, 0
+        self.server.games += 1
+        await self.send(f"GAME {side} {self.bot}")
+        if side == "yellow":
+            await self.bot_turn()
+
+    async def play(self, args: List[str]) -> None:
+        if self.bot is None:
+            await self.send("ERR no game; NEW <bot> first")
+            return
+        if len(args) != 1 or not args[0].isdigit() or int(args[0]) >= bb.COLS:
+            await self.send("ERR usage: PLAY <column 0-6>")
+            return
+        col = int(args[0])
+        if not bb.can_play(self.mask, col):
+            await self.send(f"ERR column {col} is full")
+            return
+        await self.send(f"OK {col}")
+        if await self.apply(col, "win"):
+            return
+        await self.bot_turn()
+
+    async def bot_turn(self) -> None:
+        try:
+            col = await self.server.bot_move(self.bot, self.moves)
+        except asyncio.TimeoutError:
+            await self.finish("win", "bot ran out of time")
+            return
+        except BotError as e:
+            await self.finish("win", f"bot crashed: {e}")
+            return
+        except Exception as e:
+            await self.finish("win", f"bot crashed: {e!r}")
+            return
+        if not 0 <= col < bb.COLS or not bb.can_play(self.mask, col):
+            await self.finish("win", f"bot played illegal move {col!r}")
+            return
+        await self.send(f"BOT {col}")
+        await self.apply(col, "loss")
+
+    async def apply(self, col: int, if_won: str) -> bool:
+        """Play ``col``; returns True, after reporting it, if that ended the game."""
+        won = bb.is_winning_move(self.position, self.mask, col)
+        self.position, self.mask = bb.play(self.position, self.mask, col)
+        self.moves += str(col)
+        if won:
+            await self.finish(if_won)
+        elif len(self.moves) == bb.CELLS:
+            await self.finish("draw")
+        return won or len(self.moves) == bb.CELLS
+
+    async def finish(self, result: str, reason: str = "") -> None:
+        await self.send(f"END {result}" + (f" {reason}" if reason else ""))
+        self.bot = None
+
+
+async def serve(bots: Sequence[str], host: str, port: int, workers: int, move_timeout: float) -> None:
+    pool = BotPool(workers)
+    try:
+        server = GameServer(bots, pool, move_timeout)
+        listener = await asyncio.start_server(server.handle, host, port)
+        print(f"serving {', '.join(bots)} on port {port}", file=sys.stderr)
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        pool.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m arena.server", description=__doc__.split("\n\n")[0])
+    parser.add_argument("bots", nargs="+", help="bots players may choose")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    parser.add_argument("--move-timeout", type=float, default=MOVE_TIMEOUT)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.bots, args.host, args.port, args.workers, args.move_timeout))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
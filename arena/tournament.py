@@ -0,0 +1,167 @@
+"""
+Incremental round-robin tournament.
+
+A full round robin of the 25 submissions is 600 pairings.  After the first
+run, the crosstable is kept in a state file, every cell together with the
+source hashes of its two bots (``arena.cache.source_hash``), and with the
+``--games`` and ``--seed`` it was played with.  A refresh compares the
+hashes with the current files and replays only the cells between the
+listed bots that involve a bot that changed (or was added); a different
+``--games`` or ``--seed`` replays everything.  Cells of bots not listed are
+kept for a later run but left out of the standings, which are computed from
+the merged crosstable, so the work done scales with the number of changed
+bots rather than with the number of pairings.
+
+Every cell has its own seeds, derived from the two names, so a cell plays
+the same games whichever other bots are in the tournament.
+
+Usage::
+
+    python -m arena.tournament --all --games 2 --workers 8
+    python -m arena.tournament dp449 as658 ps950 --state ps950-test.json
+"""
+
+import argparse
+import json
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from arena.bots import available_bots
+from arena.cache import source_hash
+from arena.runner import (
+    GameResult,
+    GameSpec,
+    RunOptions,
+    from_record,
+    print_standings,
+    run_games,
+    to_record,
+)
+
+DEFAULT_STATE = ".arena-cache/tournament.json"
+
+Cell = Tuple[str, str]
+
+
+def cell_specs(red: str, yellow: str, games: int, seed: int = 0) -> List[GameSpec]:
+    base = seed + zlib.crc32(f"{red}/{yellow}".encode())
+    return [GameSpec(red, yellow, seed=base + game) for game in range(games)]
+
+
+class Tournament:
+    """
+    A crosstable that remembers which code produced each cell.
+
+    Every cell keeps the source hashes of its two bots, so a run over some
+    of the bots leaves the cells of the others untouched for a later run.
+
+    Args:
+        path: The state file; read if it exists.
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE) -> None:
+        self.path = Path(path)
+        self.games: Optional[int] = None
+        self.seed: Optional[int] = None
+        # (red, yellow) -> {"hashes": [red hash, yellow hash], "records": [...]}
+        self.cells: Dict[Cell, dict] = {}
+        if self.path.exists():
+            state = json.loads(self.path.read_text())
+            self.games = state["games"]
+            self.seed = state["seed"]
+            self.cells = {tuple(key.split("/")): cell for key, cell in state["cells"].items()}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            "games": self.games,
+            "seed": self.seed,
+            "cells": {f"{red}/{yellow}": cell for (red, yellow), cell in sorted(self.cells.items())},
+        }
+        self.path.write_text(json.dumps(state, indent=1))
+
+    def changed(self, bots: Sequence[str]) -> List[str]:
+        """Bots that are new, or whose source differs from the one in their cells."""
+        stored: Dict[str, set] = {}
+        for (red, yellow), cell in self.cells.items():
+            for name, digest in zip((red, yellow), cell["hashes"]):
+                stored.setdefault(name, set()).add(digest)
+        return [name for name in bots if stored.get(name) != {source_hash(name)}]
+
+    def stale_cells(self, bots: Sequence[str]) -> List[Cell]:
+        return [
+            (red, yellow)
+            for red in bots
+            for yellow in bots
+            if red != yellow
+            and self.cells.get((red, yellow), {}).get("hashes") != [source_hash(red), source_hash(yellow)]
+        ]
+
+    def refresh(
+        self,
+        bots: Sequence[str],
+        games: int,
+        seed: int = 0,
+        options: RunOptions = RunOptions(),
+        workers: int = 1,
+    ) -> List[Cell]:
+        """Replay the stale cells among ``bots``, merge them in and save; returns the cells replayed."""
+        bots = list(dict.fromkeys(bots))
+        if (games, seed) != (self.games, self.seed):
+            # Every stored cell was played with other games
+            self.cells = {}
+            self.games, self.seed = games, seed
+        stale = self.stale_cells(bots)
+        specs = [spec for red, yellow in stale for spec in cell_specs(red, yellow, games, seed)]
+        replayed: Dict[Cell, List[dict]] = {cell: [] for cell in stale}
+        for result in run_games(specs, options, workers):
+            replayed[(result.spec.red, result.spec.yellow)].append(to_record(result))
+
+        for (red, yellow), records in replayed.items():
+            self.cells[(red, yellow)] = {"hashes": [source_hash(red), source_hash(yellow)], "records": records}
+        self.save()
+        return stale
+
+    def results(self, bots: Optional[Sequence[str]] = None) -> List[GameResult]:
+        """Every game between ``bots`` (default all) in the crosstable, for ``runner.standings``."""
+        kept = None if bots is None else set(bots)
+        results = []
+        for (red, yellow), cell in self.cells.items():
+            if kept is not None and not (red in kept and yellow in kept):
+                continue
+            specs = cell_specs(red, yellow, len(cell["records"]), self.seed)
+            results.extend(from_record(spec, record) for spec, record in zip(specs, cell["records"]))
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m arena.tournament", description=__doc__.split("\n\n")[0])
+    parser.add_argument("bots", nargs="*", help="submission names, e.g. dp449")
+    parser.add_argument("--all", action="store_true", help="every submission")
+    parser.add_argument("-g", "--games", type=int, default=1, help="games per pairing and side")
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--state", default=DEFAULT_STATE)
+    args = parser.parse_args(argv)
+
+    bots = available_bots() if args.all else args.bots
+    if len(bots) < 2:
+        parser.error("need at least two bots")
+    tournament = Tournament(args.state)
+    if (args.games, args.seed) == (tournament.games, tournament.seed):
+        changed = tournament.changed(bots)
+    else:
+        changed = list(bots)
+    stale = tournament.refresh(bots, args.games, args.seed, workers=args.workers)
+    total = len(bots) * (len(bots) - 1)
+    print(
+        f"replayed {len(stale)} of {total} cells; changed: {', '.join(changed) or 'none'}",
+        file=sys.stderr,
+    )
+    print_standings(tournament.results(bots))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Texel-style tuner for the window-scoring evaluation weights.
+
+Most heuristic bots score a position the same way: a bonus per piece in the
+center column, plus, for every 4-cell window, a weight for two or three
+pieces of one side with the rest of the window empty.  Only the magic
+numbers differ (``BASELINES``).  This tuner fits those numbers to game
+outcomes instead.
+
+For a whole dataset at once, ``features`` counts, from the side to move's
+point of view::
+
+    center_own, center_opp, own_one, own_two, own_three, opp_one, opp_two, opp_three
+
+with bit operations on the ``(position, mask)`` columns of the self-play
+shards (``arena.selfplay``), 69 vectorised passes in total.  ``fit`` then
+minimises the mean squared error between ``sigmoid(features @ weights)``
+and the result of the game (1 win, 0.5 draw, 0 loss) with Adam.
+
+Usage::
+
+    python -m arena.tune selfplay/ --epochs 500
+    python -m arena.tune selfplay/ -o tuned_weights.py
+
+The report includes the loss of each bot's hand-picked weights (at the best
+overall scale) next to the tuned ones, and the tuned weights are printed as
+Python constants scaled so that ``OWN_THREE`` matches ``--three``.
+"""
+
+import argparse
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from engine import bitboard as bb
+from engine.lines import LINES
+
+from arena.selfplay import load_shards
+
+FEATURES = (
+    "CENTER_OWN",
+    "CENTER_OPP",
+    "OWN_ONE",
+    "OWN_TWO",
+    "OWN_THREE",
+    "OPP_ONE",
+    "OPP_TWO",
+    "OPP_THREE",
+)
+
+# Hand-picked weights of the bots, in ``FEATURES`` order
+BASELINES: Dict[str, Tuple[float, ...]] = {
+    "at612": (5, -5, 0, 10, 100, 0, 0, -1000),
+    "ac653": (6, -6, 0, 10, 100, 0, -50, -500),
+    "vm119": (3, 0, 0, 2, 5, 0, 0, -4),
+    "la390": (4, 0, 1, 3, 7, 0, -3, -90),
+    "ps950": (5, 0, 1, 4, 8, 0, -4, -100),
+    "va703": (6, -6, 0, 15, 120, 0, -19, -156),
+}
+
+
+WINDOWS = LINES
+CENTER = bb.COLUMN[3]
+
+
+if hasattr(np, "bitwise_count"):
+
+    def popcount(values: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(values)
+
+else:
+    _BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(values: np.ndarray) -> np.ndarray:
+        as_bytes = values.reshape(-1, 1).view(np.uint8)
+        return _BYTE_COUNTS[as_bytes].sum(axis=1, dtype=np.uint8).reshape(values.shape)
+
+
+def features(position: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """``(N, len(FEATURES))`` float32 feature matrix for uint64 bitboard columns."""
+    own = position.astype(np.uint64)
+    opp = own ^ mask.astype(np.uint64)
+    out = np.zeros((len(own), len(FEATURES)), dtype=np.float32)
+    center = np.uint64(CENTER)
+    out[:, 0] = popcount(own & center)
+    out[:, 1] = popcount(opp & center)
+    for window in WINDOWS:
+        w = np.uint64(window)
+        own_count = popcount(own & w)
+        opp_count = popcount(opp & w)
+        for k in (1, 2, 3):
+            out[:, 1 + k] += (own_count == k) & (opp_count == 0)
+            out[:, 4 + k] += (opp_count == k) & (own_count == 0)
+    return out
+
+
+def load_dataset(directory: str, min_ply: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Features and targets (1 win, 0.5 draw, 0 loss) of every shard in ``directory``."""
+    xs, ys = [], []
+    for shard in load_shards(directory):
+        shard = shard[shard["ply"] >= min_ply]
+        xs.append(features(shard["position"], shard["mask"]))
+        ys.append((shard["outcome"].astype(np.float32) + 1) / 2)
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-np.clip(z, -60, 60)))
+
+
+def loss(x: np.ndarray, y: np.ndarray, weights: np.ndarray) -> float:
+    return float(np.mean((_sigmoid(x @ weights) - y) ** 2))
+
+
+def fit_scale(x: np.ndarray, y: np.ndarray, weights: np.ndarray) -> Tuple[float, float]:
+    """Best ``k`` for ``sigmoid(k * x @ weights)`` by a log-spaced scan; returns ``(k, loss)``."""
+    z = x @ np.asarray(weights, dtype=np.float32)
+    best = (1.0, float("inf"))
+    for k in np.logspace(-5, 1, 121):
+        value = float(np.mean((_sigmoid(k * z) - y) ** 2))
+        if value < best[1]:
+            best = (float(k), value)
+    return best
+
+
+def fit(
+    x: np.ndarray,
+    y: np.ndarray,
+    epochs: int = 500,
+    lr: float = 0.01,
+    batch: int = 0,
+    weights: Optional[np.ndarray] = None,
+    seed: int = 0,
+    log: Optional[Iterable] = None,
+) -> np.ndarray:
+    """
+    Minimise the outcome MSE with Adam.
+
+    ``batch`` of 0 means full-batch steps; otherwise each epoch walks the
+    data in shuffled minibatches of that size.
+    """
+    rng = np.random.default_rng(seed)
+    w = np.zeros(x.shape[1], dtype=np.float64) if weights is None else np.array(weights, dtype=np.float64)
+    m = np.zeros_like(w)
+    v = np.zeros_like(w)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    step = 0
+    n = len(y)
+    size = n if batch <= 0 else batch
+    for epoch in range(epochs):
+        order = rng.permutation(n) if size < n else slice(None)
+        xs, ys = x[order], y[order]
+        for start in range(0, n, size):
+            xb, yb = xs[start : start + size], ys[start : start + size]
+            p = _sigmoid(xb @ w)
+            grad = xb.T @ (2 * (p - yb) * p * (1 - p)) / len(yb)
+            step += 1
+            m = beta1 * m + (1 - beta1) * grad
+            v = beta2 * v + (1 - beta2) * grad * grad
+            w -= lr * (m / (1 - beta1**step)) / (np.sqrt(v / (1 - beta2**step)) + eps)
+        if log is not None and (epoch % 50 == 0 or epoch == epochs - 1):
+            print(f"epoch {epoch:>5} loss {loss(x, y, w):.6f}", file=log)
+    return w
+
+
+def export(weights: np.ndarray, three: float = 100.0) -> str:
+    """Weights as Python constants, scaled so that ``OWN_THREE == three``."""
+    scale = three / weights[4] if weights[4] else 1.0
+    lines = ["# Window-scoring weights fitted by arena.tune"]
+    for name, value in zip(FEATURES, weights):
+        lines.append(f"{name} = {round(float(value) * scale)}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m arena.tune", description=__doc__.split("\n\n")[0])
+    parser.add_argument("data", help="self-play directory written by arena.selfplay")
+    parser.add_argument("--epochs", type=int, default=500)
+    parser.add_argument("--lr", type=float, default=0.01)
+    parser.add_argument("--batch", type=int, default=0, help="minibatch size, 0 for full batch")
+    parser.add_argument("--min-ply", type=int, default=0)
+    parser.add_argument("--three", type=float, default=100.0, help="exported value of OWN_THREE")
+    parser.add_argument("-o", "--output", help="write the constants here instead of stdout")
+    args = parser.parse_args(argv)
+
+    x, y = load_dataset(args.data, args.min_ply)
+    print(f"{len(y)} positions", file=sys.stderr)
+    weights = fit(x, y, args.epochs, args.lr, args.batch, log=sys.stderr)
+
+    print(f"{'weights':<8} {'loss':>9}", file=sys.stderr)
+    for name, baseline in BASELINES.items():
+        _, value = fit_scale(x, y, np.array(baseline))
+        print(f"{name:<8} {value:>9.6f}", file=sys.stderr)
+    print(f"{'tuned':<8} {loss(x, y, weights):>9.6f}", file=sys.stderr)
+
+    text = export(weights, args.three)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text, end="")
+
+
+if __name__ == "__main__":
+    main()
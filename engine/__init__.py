@@ -0,0 +1,40 @@
+"""
+Shared search components for the bots in ``submissions/``.
+
+Bots import from here when run from the repository root, e.g.::
+
+    from engine import SearchAborted, SearchController
+"""
+
+from engine.control import SearchAborted, SearchController, SearchStats
+from engine.negamax import (
+    MATE_THRESHOLD,
+    WIN_SCORE,
+    BitboardNegamax,
+    BoardNegamax,
+    Negamax,
+)
+from engine.ordering import MoveOrderer
+from engine.proof import ProofResult, ProofSearch
+from engine.solver import Solver, SolveResult
+from engine.threats import SafeMoves, ThreatMap
+from engine.threatspace import ThreatSearch
+
+__all__ = [
+    "MATE_THRESHOLD",
+    "WIN_SCORE",
+    "BitboardNegamax",
+    "BoardNegamax",
+    "MoveOrderer",
+    "Negamax",
+    "ProofResult",
+    "ProofSearch",
+    "SafeMoves",
+    "SearchAborted",
+    "SearchController",
+    "SearchStats",
+    "SolveResult",
+    "Solver",
+    "ThreatMap",
+    "ThreatSearch",
+]
@@ -0,0 +1,170 @@
+"""
+Shared Connect Four bitboard core.
+
+Same layout as the bitboard bots (as658, dp449, aa557): every column takes
+7 bits, 6 playable rows plus one guard bit on top.
+
+    .  .  .  .  .  .  .
+    5 12 19 26 33 40 47
+    4 11 18 25 32 39 46
+    3 10 17 24 31 38 45
+    2  9 16 23 30 37 44
+    1  8 15 22 29 36 43
+    0  7 14 21 28 35 42
+
+A position is a pair of ints ``(position, mask)``: ``mask`` has a bit for
+every piece on the board and ``position`` a bit for every piece of the side
+to move.  The opponent's pieces are ``position ^ mask``.
+"""
+
+from typing import List, Sequence, Tuple
+
+from pingv4 import ConnectFourBoard
+
+ROWS = 6
+COLS = 7
+HEIGHT = ROWS + 1
+CELLS = ROWS * COLS
+
+# Center-first column order used by every bot in submissions/
+MOVE_ORDER = (3, 2, 4, 1, 5, 0, 6)
+
+BOTTOM = tuple(1 << (col * HEIGHT) for col in range(COLS))
+TOP = tuple(1 << (ROWS - 1 + col * HEIGHT) for col in range(COLS))
+COLUMN = tuple(((1 << ROWS) - 1) << (col * HEIGHT) for col in range(COLS))
+
+BOTTOM_MASK = sum(BOTTOM)
+BOARD_MASK = sum(COLUMN)
+
+
+def from_board(board: ConnectFourBoard) -> Tuple[int, int]:
+    """Convert a pingv4 board to ``(position, mask)`` for the side to move."""
+    # cell_states is a single call into the Rust core, unlike 42 board[c, r]
+    current = board.current_player
+    position = 0
+    mask = 0
+    for col, cells in enumerate(board.cell_states):
+        shift = col * HEIGHT
+        for row, cell in enumerate(cells):
+            if cell is not None:
+                bit = 1 << (shift + row)
+                mask |= bit
+                if cell == current:
+                    position |= bit
+    return position, mask
+
+
+def from_heights(heights: Sequence[int]) -> int:
+    """The ``mask`` of a board with the given column heights."""
+    mask = 0
+    for col, height in enumerate(heights):
+        mask |= ((1 << height) - 1) << (col * HEIGHT)
+    return mask
+
+
+def from_moves(moves: str) -> Tuple[int, int]:
+    """Build a position from a string of column digits, e.g. ``"3342"``."""
+    position = 0
+    mask = 0
+    for char in moves:
+        position, mask = play(position, mask, int(char))
+    return position, mask
+
+
+def can_play(mask: int, col: int) -> bool:
+    return not mask & TOP[col]
+
+
+def legal_moves(mask: int) -> List[int]:
+    """Playable columns in center-first order."""
+    return [col for col in MOVE_ORDER if not mask & TOP[col]]
+
+
+def columns(cells: int, order: Sequence[int] = range(COLS)) -> List[int]:
+    """Columns holding any of ``cells``, e.g. a set of playable cells, in ``order``."""
+    return [col for col in order if cells & COLUMN[col]]
+
+
+def move_bit(mask: int, col: int) -> int:
+    """The bit a piece dropped in ``col`` would occupy."""
+    return (mask + BOTTOM[col]) & COLUMN[col]
+
+
+def play(position: int, mask: int, col: int) -> Tuple[int, int]:
+    """Drop a piece for the side to move; returns the opponent's view."""
+    return position ^ mask, mask | (mask + BOTTOM[col])
+
+
+def possible(mask: int) -> int:
+    """Bitmask of the cells that can be played right now."""
+    return (mask + BOTTOM_MASK) & BOARD_MASK
+
+
+def is_win(pieces: int) -> bool:
+    """Check whether ``pieces`` contains four in a row."""
+    # Horizontal
+    m = pieces & (pieces >> HEIGHT)
+    if m & (m >> (2 * HEIGHT)):
+        return True
+    # Diagonal \
+    m = pieces & (pieces >> (HEIGHT - 1))
+    if m & (m >> (2 * (HEIGHT - 1))):
+        return True
+    # Diagonal /
+    m = pieces & (pieces >> (HEIGHT + 1))
+    if m & (m >> (2 * (HEIGHT + 1))):
+        return True
+    # Vertical
+    m = pieces & (pieces >> 1)
+    if m & (m >> 2):
+        return True
+    return False
+
+
+def is_winning_move(position: int, mask: int, col: int) -> bool:
+    return is_win(position | move_bit(mask, col))
+
+
+def winning_squares(pieces: int, mask: int) -> int:
+    """
+    Empty cells that would complete four in a row for ``pieces``.
+
+    The result includes cells that are not yet playable; AND it with
+    ``possible(mask)`` for the immediate wins.
+    """
+    # Vertical
+    r = (pieces << 1) & (pieces << 2) & (pieces << 3)
+
+    for shift in (HEIGHT, HEIGHT - 1, HEIGHT + 1):
+        # Horizontal, diagonal \ and diagonal /
+        p = (pieces << shift) & (pieces << (2 * shift))
+        r |= p & (pieces << (3 * shift))
+        r |= p & (pieces >> shift)
+        p = (pieces >> shift) & (pieces >> (2 * shift))
+        r |= p & (pieces << shift)
+        r |= p & (pieces >> (3 * shift))
+
+    return r & (BOARD_MASK ^ mask)
+
+
+def key(position: int, mask: int) -> int:
+    """Unique integer key for a position (``position + mask``)."""
+    return position + mask
+
+
+def mirror(bits: int) -> int:
+    """Reflect a bitboard left to right."""
+    column = (1 << HEIGHT) - 1
+    out = 0
+    for col in range(COLS):
+        out |= ((bits >> (col * HEIGHT)) & column) << ((COLS - 1 - col) * HEIGHT)
+    return out
+
+
+def canonical_key(position: int, mask: int) -> int:
+    """``key`` shared by a position and its mirror image, which have the same value."""
+    return min(position + mask, mirror(position) + mirror(mask))
+
+
+def moves_played(mask: int) -> int:
+    return mask.bit_count()
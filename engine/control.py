@@ -0,0 +1,179 @@
+"""
+Search budget control shared by the iterative-deepening bots.
+
+Reading the clock at every node is a noticeable part of the per-node cost of
+a Python search.  ``SearchController`` counts nodes instead and only looks at
+the clock every ``interval`` nodes, retuning ``interval`` from the measured
+nodes/sec so that polls land roughly ``poll_seconds`` apart whatever the
+speed of the engine.  When the time or node budget runs out it raises
+``SearchAborted`` from inside the search, so the engine unwinds in one go and
+keeps the move from the last completed depth.
+
+Typical use::
+
+    self.controller = SearchController(time_limit=5.0)
+    try:
+        for depth in self.controller.depths(1, 42):
+            best_move = self.root_search(depth)   # calls controller.tick()
+    except SearchAborted:
+        pass
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+
+class SearchAborted(Exception):
+    """Raised by ``SearchController.tick`` once the search budget is spent."""
+
+
+@dataclass(frozen=True)
+class SearchStats:
+    """Summary of one controlled search."""
+
+    nodes: int
+    elapsed: float
+    nodes_per_second: float
+    completed_depth: int
+    aborted_depth: Optional[int]
+
+    def __str__(self) -> str:
+        aborted = "-" if self.aborted_depth is None else str(self.aborted_depth)
+        return (
+            f"nodes={self.nodes} time={self.elapsed:.3f}s "
+            f"nps={self.nodes_per_second:.0f} depth={self.completed_depth} "
+            f"aborted_at={aborted}"
+        )
+
+
+class SearchController:
+    """
+    Node counter with amortised deadline polling.
+
+    Args:
+        time_limit: Wall-clock budget in seconds, or None for no time limit.
+        max_nodes: Node budget, or None for no node limit.
+        poll_seconds: Target time between two clock reads.
+        min_interval: Smallest number of nodes between two clock reads.
+        max_interval: Largest number of nodes between two clock reads.
+    """
+
+    __slots__ = (
+        "time_limit",
+        "max_nodes",
+        "poll_seconds",
+        "min_interval",
+        "max_interval",
+        "nodes",
+        "depth",
+        "completed_depth",
+        "aborted_depth",
+        "next_poll",
+        "_start",
+        "_deadline",
+        "_interval",
+        "_poll_time",
+        "_poll_nodes",
+    )
+
+    def __init__(
+        self,
+        time_limit: Optional[float] = None,
+        max_nodes: Optional[int] = None,
+        poll_seconds: float = 0.005,
+        min_interval: int = 64,
+        max_interval: int = 1 << 16,
+    ) -> None:
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.poll_seconds = poll_seconds
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.start()
+
+    def start(self) -> None:
+        """Reset the counters and start the clock."""
+        now = time.perf_counter()
+        self.nodes = 0
+        self.depth = 0
+        self.completed_depth = 0
+        self.aborted_depth = None
+        self._start = now
+        self._deadline = math.inf if self.time_limit is None else now + self.time_limit
+        self._interval = self.min_interval
+        self._poll_time = now
+        self._poll_nodes = 0
+        self._schedule()
+
+    def tick(self) -> None:
+        """Count one node; raises ``SearchAborted`` when the budget is spent."""
+        self.nodes += 1
+        if self.nodes >= self.next_poll:
+            self.poll()
+
+    def poll(self) -> None:
+        """Check the budget now and retune the polling interval."""
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            self._abort()
+        now = time.perf_counter()
+        if now >= self._deadline:
+            self._abort()
+
+        elapsed = now - self._poll_time
+        counted = self.nodes - self._poll_nodes
+        if elapsed > 0:
+            interval = int(counted * self.poll_seconds / elapsed)
+        else:
+            interval = self._interval * 2
+        self._interval = max(self.min_interval, min(self.max_interval, interval))
+        self._poll_time = now
+        self._poll_nodes = self.nodes
+        self._schedule()
+
+    def expired(self) -> bool:
+        """Return True if the budget is spent, without raising."""
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            return True
+        return time.perf_counter() >= self._deadline
+
+    def depths(self, first: int = 1, last: int = 42) -> Iterator[int]:
+        """
+        Yield iterative-deepening depths until the budget is spent.
+
+        A depth counts as completed once the loop body for it returns; if the
+        body raises ``SearchAborted`` the depth is recorded as the abort depth.
+        Breaking out of the loop also counts the current depth as completed.
+        """
+        for depth in range(first, last + 1):
+            if self.expired():
+                return
+            self.depth = depth
+            try:
+                yield depth
+            except GeneratorExit:
+                if self.aborted_depth != depth:
+                    self.completed_depth = depth
+                raise
+            self.completed_depth = depth
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def stats(self) -> SearchStats:
+        elapsed = self.elapsed
+        nps = self.nodes / elapsed if elapsed > 0 else 0.0
+        return SearchStats(
+            self.nodes, elapsed, nps, self.completed_depth, self.aborted_depth
+        )
+
+    def _schedule(self) -> None:
+        self.next_poll = self.nodes + self._interval
+        if self.max_nodes is not None and self.next_poll > self.max_nodes:
+            self.next_poll = self.max_nodes
+
+    def _abort(self) -> None:
+        self.aborted_depth = self.depth
+        raise SearchAborted(self.depth)
@@ -0,0 +1,59 @@
+"""
+The 69 four-cell lines of the board and the lines through every cell.
+
+Checking whether the stone just played wins only needs the lines through
+its cell: at most 13 mask tests (3 in a corner) instead of scanning four
+directions cell by cell or the whole board.  Tables are indexed by the bit
+index of ``engine.bitboard`` (``col * HEIGHT + row``, see ``cell``); the
+entries of the guard bits above each column are empty.
+
+* ``LINES``: bitmask of every line
+* ``LINE_CELLS``: the ``(col, row)`` cells of every line, for grid bots
+* ``CELL_LINES[cell]``: indices into ``LINES`` of the lines through ``cell``
+* ``CELL_MASKS[cell]``: the masks of those lines
+
+Typical use, after dropping a stone at ``(col, row)`` into ``pieces``::
+
+    if wins_after(pieces, cell(col, row)):
+        ...
+"""
+
+from typing import List, Tuple
+
+from engine.bitboard import COLS, HEIGHT, ROWS
+
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+def cell(col: int, row: int) -> int:
+    """Bit index of ``(col, row)``."""
+    return col * HEIGHT + row
+
+
+def _lines() -> List[Tuple[Tuple[int, int], ...]]:
+    lines = []
+    for col in range(COLS):
+        for row in range(ROWS):
+            for dcol, drow in DIRECTIONS:
+                end_col, end_row = col + 3 * dcol, row + 3 * drow
+                if 0 <= end_col < COLS and 0 <= end_row < ROWS:
+                    lines.append(tuple((col + i * dcol, row + i * drow) for i in range(4)))
+    return lines
+
+
+LINE_CELLS = tuple(_lines())
+LINES = tuple(sum(1 << cell(c, r) for c, r in cells) for cells in LINE_CELLS)
+
+CELL_LINES = tuple(
+    tuple(i for i, cells in enumerate(LINE_CELLS) if (bit // HEIGHT, bit % HEIGHT) in cells)
+    for bit in range(COLS * HEIGHT)
+)
+CELL_MASKS = tuple(tuple(LINES[i] for i in lines) for lines in CELL_LINES)
+
+
+def wins_after(pieces: int, bit: int) -> bool:
+    """Whether ``pieces``, which include a stone at ``bit``, complete a line through it."""
+    for line in CELL_MASKS[bit]:
+        if pieces & line == line:
+            return True
+    return False
@@ -0,0 +1,393 @@
+"""
+Reusable negamax core with principal-variation search and aspiration windows.
+
+``Negamax`` holds the search itself; the position representation is supplied
+by a subclass through five small hooks (``moves``, ``play``, ``terminal``,
+``evaluate`` and ``key``), so the same core runs over the bitboard engines
+and over pingv4 boards.  Two ready-made adapters are provided:
+
+* ``BitboardNegamax`` for ``(position, mask)`` states from ``engine.bitboard``
+* ``BoardNegamax`` for ``ConnectFourBoard`` states
+
+Scores are integers from the side to move's point of view.  A win is scored
+``WIN_SCORE - stones`` where ``stones`` is the number of pieces on the board
+when the game ends, so quicker wins score higher and transposition table
+entries stay valid whichever ply they are reached at.  Heuristic evaluations
+must stay within ``MATE_THRESHOLD``.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from pingv4 import ConnectFourBoard
+
+from engine import bitboard as bb
+from engine.control import SearchAborted, SearchController
+from engine.ordering import MoveOrderer
+
+WIN_SCORE = 1_000_000
+MATE_THRESHOLD = WIN_SCORE - 100
+INFINITY = WIN_SCORE + 1
+
+# Transposition table flags
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Half-width of the first aspiration window around the previous score
+ASPIRATION_WINDOW = 50
+
+
+class Negamax(ABC):
+    """
+    Alpha-beta negamax with PVS, a transposition table and aspiration windows.
+
+    The first child of every node is searched with the full window and the
+    rest with a null window ``(-alpha - 1, -alpha)``; a child that fails high
+    is re-searched with the full window.  ``iterate`` runs iterative
+    deepening and opens each iteration with a narrow window around the
+    previous score, widening only when the result falls outside it.
+
+    Args:
+        controller: Budget for the search; unlimited if omitted.
+        tt: Transposition table mapping ``key(state)`` to
+            ``(depth, flag, score, move)``; a fresh dict if omitted.
+        window: Half-width of the first aspiration window.
+        orderer: Killer/history move ordering; a fresh one if omitted.
+    """
+
+    def __init__(
+        self,
+        controller: Optional[SearchController] = None,
+        tt: Optional[Dict[Hashable, Tuple[int, int, int, Any]]] = None,
+        window: int = ASPIRATION_WINDOW,
+        orderer: Optional[MoveOrderer] = None,
+    ) -> None:
+        self.controller = controller if controller is not None else SearchController()
+        self.tt = tt if tt is not None else {}
+        self.window = window
+        self.orderer = orderer if orderer is not None else MoveOrderer()
+        self.root_moves: Optional[List[Any]] = None
+        self.best_move: Any = None
+        # Score all the leaves below a depth-1 node with one evaluate_many call
+        self.batch_leaves = False
+
+    # -- hooks --------------------------------------------------------------
+
+    @abstractmethod
+    def moves(self, state: Any) -> List[Any]:
+        """Legal moves of ``state``, best guess first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def play(self, state: Any, move: Any) -> Any:
+        """The state after ``move``."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def terminal(self, state: Any) -> Optional[int]:
+        """Exact score if the game is decided at ``state``, else None."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def evaluate(self, state: Any) -> int:
+        """Heuristic score of a non-terminal leaf for the side to move."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def key(self, state: Any) -> Hashable:
+        """Transposition table key of ``state``."""
+        raise NotImplementedError
+
+    def evaluate_many(self, states: List[Any]) -> Sequence[int]:
+        """Heuristic scores of several leaves; override to evaluate in one batch."""
+        return [self.evaluate(state) for state in states]
+
+    def order(self, moves: List[Any], ply: int, tt_move: Any) -> List[Any]:
+        """TT move first, then killers, then history (see ``MoveOrderer``)."""
+        return self.orderer.order(moves, ply, tt_move)
+
+    # -- search -------------------------------------------------------------
+
+    def search(self, state: Any, depth: int, alpha: int, beta: int, ply: int = 0) -> int:
+        """Score of ``state`` searched ``depth`` plies deep (fail-soft)."""
+        self.controller.tick()
+
+        # The root is always expanded so that there is a move to return
+        if ply > 0:
+            score = self.terminal(state)
+            if score is not None:
+                return score
+            if depth <= 0:
+                return self.evaluate(state)
+
+        alpha_orig = alpha
+        key = self.key(state)
+        entry = self.tt.get(key)
+        tt_move = None
+        if entry is not None:
+            tt_depth, tt_flag, tt_score, tt_move = entry
+            if tt_depth >= depth and ply > 0:
+                if tt_flag == EXACT:
+                    return tt_score
+                if tt_flag == LOWER:
+                    if tt_score > alpha:
+                        alpha = tt_score
+                elif tt_score < beta:
+                    beta = tt_score
+                if alpha >= beta:
+                    return tt_score
+
+        if ply == 0 and self.root_moves is not None:
+            moves = list(self.root_moves)
+        else:
+            moves = self.moves(state)
+        if not moves:
+            score = self.terminal(state)
+            return 0 if score is None else score
+        moves = self.order(moves, ply, tt_move)
+        leaf_scores = self.leaf_scores(state, moves) if depth == 1 and self.batch_leaves else None
+
+        best_score = -INFINITY
+        best_move = moves[0]
+        for i, move in enumerate(moves):
+            if leaf_scores is not None:
+                score = leaf_scores[i]
+            elif i == 0:
+                child = self.play(state, move)
+                score = -self.search(child, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                child = self.play(state, move)
+                score = -self.search(child, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < score < beta:
+                    # Null window failed high: re-search to get the true score
+                    score = -self.search(child, depth - 1, -beta, -score, ply + 1)
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.orderer.record_cutoff(move, ply, depth)
+                        break
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt[key] = (depth, flag, best_score, best_move)
+        if ply == 0:
+            self.best_move = best_move
+        return best_score
+
+    def leaf_scores(self, state: Any, moves: List[Any]) -> List[int]:
+        """
+        Scores of the children of a depth-1 node, all leaves.
+
+        Gives the same scores as searching each child to depth 0, but the
+        non-terminal ones are evaluated together, at the price of evaluating
+        siblings that a cutoff would have skipped.
+        """
+        children = [self.play(state, move) for move in moves]
+        scores: List[Optional[int]] = []
+        pending = []
+        for i, child in enumerate(children):
+            self.controller.tick()
+            score = self.terminal(child)
+            scores.append(score)
+            if score is None:
+                pending.append(i)
+        if pending:
+            values = self.evaluate_many([children[i] for i in pending])
+            for i, value in zip(pending, values):
+                scores[i] = value
+        return [-int(score) for score in scores]
+
+    def iterate(
+        self,
+        state: Any,
+        max_depth: int = bb.CELLS,
+        root_moves: Optional[Sequence[Any]] = None,
+    ) -> Tuple[Any, int]:
+        """
+        Iterative deepening with aspiration windows.
+
+        Returns the best move and score of the deepest completed iteration;
+        stops early on a proven result or when the controller's budget runs
+        out.  ``root_moves`` restricts the moves considered at the root.
+        """
+        self.root_moves = list(root_moves) if root_moves is not None else None
+        moves = self.root_moves if self.root_moves is not None else self.moves(state)
+        best_move = moves[0] if moves else None
+        best_score = 0
+        previous: Optional[int] = None
+        self.orderer.age()
+
+        try:
+            for depth in self.controller.depths(1, max_depth):
+                if previous is None or abs(previous) >= MATE_THRESHOLD:
+                    alpha, beta = -INFINITY, INFINITY
+                else:
+                    alpha, beta = previous - self.window, previous + self.window
+                delta = self.window
+                while True:
+                    score = self.search(state, depth, alpha, beta)
+                    if score <= alpha:
+                        delta *= 4
+                        alpha = max(-INFINITY, score - delta)
+                    elif score >= beta:
+                        delta *= 4
+                        beta = min(INFINITY, score + delta)
+                    else:
+                        break
+                best_move, best_score = self.best_move, score
+                previous = score
+                if abs(score) >= MATE_THRESHOLD:
+                    break
+        except SearchAborted:
+            pass
+        return best_move, best_score
+
+    def iterate_many(
+        self,
+        states: Sequence[Any],
+        max_depth: int = bb.CELLS,
+        root_moves: Optional[Sequence[Optional[Sequence[Any]]]] = None,
+        controller: Optional[SearchController] = None,
+    ) -> List[Tuple[Any, int]]:
+        """
+        ``iterate`` over a batch of positions with one TT and move orderer.
+
+        The controller is restarted for every position, so its budget is per
+        position.  ``controller`` replaces the engine's own for this batch,
+        e.g. an unlimited one so that a fixed ``max_depth`` alone bounds the
+        work; with a time limit, the shared TT only buys depth, not time.
+        ``root_moves``, if given, holds one list (or None) per state.
+        """
+        saved = self.controller
+        if controller is not None:
+            self.controller = controller
+        try:
+            results = []
+            for i, state in enumerate(states):
+                self.controller.start()
+                results.append(self.iterate(state, max_depth, root_moves[i] if root_moves else None))
+            return results
+        finally:
+            self.controller = saved
+
+
+class BitboardNegamax(Negamax):
+    """
+    ``Negamax`` over ``(position, mask)`` states.
+
+    Args:
+        evaluate: ``evaluate(position, mask)`` heuristic for the side to move.
+        evaluate_batch: Optional ``evaluate_batch(positions, masks)`` that
+            scores many leaves in one call (e.g. ``NeuralEvaluator``); when
+            given, the leaves of each depth-1 node are evaluated together.
+    """
+
+    def __init__(
+        self,
+        evaluate: Callable[[int, int], int],
+        controller: Optional[SearchController] = None,
+        tt: Optional[Dict[Hashable, Tuple[int, int, int, Any]]] = None,
+        window: int = ASPIRATION_WINDOW,
+        orderer: Optional[MoveOrderer] = None,
+        evaluate_batch: Optional[Callable[[Sequence[int], Sequence[int]], Sequence[int]]] = None,
+    ) -> None:
+        super().__init__(controller, tt, window, orderer)
+        self._evaluate = evaluate
+        self._evaluate_batch = evaluate_batch
+        self.batch_leaves = evaluate_batch is not None
+
+    def moves(self, state: Tuple[int, int]) -> List[int]:
+        return bb.legal_moves(state[1])
+
+    def play(self, state: Tuple[int, int], move: int) -> Tuple[int, int]:
+        position, mask = state
+        return position ^ mask, mask | (mask + bb.BOTTOM[move])
+
+    def terminal(self, state: Tuple[int, int]) -> Optional[int]:
+        position, mask = state
+        stones = mask.bit_count()
+        if bb.is_win(position ^ mask):
+            return -(WIN_SCORE - stones)
+        # Looking one move ahead is cheaper than expanding the winning child
+        if bb.winning_squares(position, mask) & bb.possible(mask):
+            return WIN_SCORE - stones - 1
+        if stones == bb.CELLS:
+            return 0
+        return None
+
+    def evaluate(self, state: Tuple[int, int]) -> int:
+        return self._evaluate(state[0], state[1])
+
+    def evaluate_many(self, states: List[Tuple[int, int]]) -> Sequence[int]:
+        if self._evaluate_batch is None:
+            return super().evaluate_many(states)
+        positions, masks = zip(*states)
+        return self._evaluate_batch(positions, masks)
+
+    def key(self, state: Tuple[int, int]) -> int:
+        return state[0] + state[1]
+
+    def iterate_many(
+        self,
+        states: Sequence[Tuple[int, int]],
+        max_depth: int = bb.CELLS,
+        root_moves: Optional[Sequence[Optional[Sequence[int]]]] = None,
+        controller: Optional[SearchController] = None,
+    ) -> List[Tuple[int, int]]:
+        # Emptiest boards first: their searches fill the TT with the
+        # positions the fuller boards of the batch then run into
+        order = sorted(range(len(states)), key=lambda i: states[i][1].bit_count())
+        sorted_moves = [root_moves[i] for i in order] if root_moves else None
+        found = super().iterate_many([states[i] for i in order], max_depth, sorted_moves, controller)
+        results: List[Tuple[int, int]] = [(-1, 0)] * len(states)
+        for i, result in zip(order, found):
+            results[i] = result
+        return results
+
+
+class BoardNegamax(Negamax):
+    """
+    ``Negamax`` over pingv4 ``ConnectFourBoard`` states.
+
+    Args:
+        evaluate: ``evaluate(board)`` heuristic for the side to move.
+    """
+
+    def __init__(
+        self,
+        evaluate: Callable[[ConnectFourBoard], int],
+        controller: Optional[SearchController] = None,
+        tt: Optional[Dict[Hashable, Tuple[int, int, int, Any]]] = None,
+        window: int = ASPIRATION_WINDOW,
+        orderer: Optional[MoveOrderer] = None,
+    ) -> None:
+        super().__init__(controller, tt, window, orderer)
+        self._evaluate = evaluate
+
+    def moves(self, state: ConnectFourBoard) -> List[int]:
+        valid = state.get_valid_moves()
+        return [col for col in bb.MOVE_ORDER if col in valid]
+
+    def play(self, state: ConnectFourBoard, move: int) -> ConnectFourBoard:
+        return state.make_move(move)
+
+    def terminal(self, state: ConnectFourBoard) -> Optional[int]:
+        if state.is_victory:
+            return -(WIN_SCORE - sum(state.column_heights))
+        if state.is_draw:
+            return 0
+        return None
+
+    def evaluate(self, state: ConnectFourBoard) -> int:
+        return self._evaluate(state)
+
+    def key(self, state: ConnectFourBoard) -> int:
+        return state.hash
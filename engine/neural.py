@@ -0,0 +1,157 @@
+"""
+Small neural evaluator in plain NumPy.
+
+Boards are encoded as ``(N, 2, 6, 7)`` float32 planes, plane 0 holding the
+side to move's pieces and plane 1 the opponent's, row 0 at the bottom.  Two
+architectures are available:
+
+* ``"mlp"``: 84 -> 64 -> 32 -> 1
+* ``"conv"``: 16 4x4 filters -> 32 -> 1
+
+both with ReLU hidden layers and a ``tanh`` output in [-1, 1] from the side
+to move's point of view.
+
+A NumPy call costs the same few microseconds of Python overhead whether it
+processes one board or a thousand, so the evaluator is meant to be fed whole
+batches: ``evaluate_batch`` scores every sibling leaf of an alpha-beta node
+in one go (``BitboardNegamax(..., evaluate_batch=net.evaluate_batch)``) or a
+whole MCTS frontier.  For drop-in use in place of a bot's heuristic:
+
+* ``evaluate(position, mask)`` has the signature of the bitboard heuristics
+  (e.g. dp449's ``score_position``)
+* ``evaluate_board(board)`` scores a pingv4 board for the side to move, as
+  ``BoardNegamax`` expects (e.g. mp282's ``_evaluate_side_to_move``)
+* ``evaluate_for(board, player)`` scores it for a fixed player, like the
+  ``evaluate_board(board, me, opp)`` methods of the grid minimax bots
+* ``evaluate_boards(boards)`` batches ``evaluate_board``
+
+NumPy is only needed by this module; ``engine`` itself does not import it.
+"""
+
+from typing import Dict, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pingv4 import CellState, ConnectFourBoard
+
+from engine import bitboard as bb
+
+# Bit index of every (row, col) cell
+_CELL_BITS = np.array(
+    [[col * bb.HEIGHT + row for col in range(bb.COLS)] for row in range(bb.ROWS)],
+    dtype=np.uint64,
+)
+
+# Network outputs are multiplied by this to get a search score
+SCORE_SCALE = 1000
+
+
+def encode(positions: Sequence[int], masks: Sequence[int]) -> np.ndarray:
+    """``(N, 2, 6, 7)`` planes for bitboard ``(position, mask)`` pairs."""
+    own = np.asarray(positions, dtype=np.uint64)[:, None, None]
+    opp = own ^ np.asarray(masks, dtype=np.uint64)[:, None, None]
+    planes = np.empty((len(own), 2, bb.ROWS, bb.COLS), dtype=np.float32)
+    planes[:, 0] = (own >> _CELL_BITS) & np.uint64(1)
+    planes[:, 1] = (opp >> _CELL_BITS) & np.uint64(1)
+    return planes
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0, out=x)
+
+
+class NeuralEvaluator:
+    """
+    Feed-forward evaluator over board planes.
+
+    Args:
+        params: Layer arrays, as made by ``random`` or stored by ``save``.
+        kind: ``"mlp"`` or ``"conv"``.
+    """
+
+    def __init__(self, params: Dict[str, np.ndarray], kind: str = "mlp") -> None:
+        if kind not in ("mlp", "conv"):
+            raise ValueError(f"unknown network kind {kind!r}")
+        self.params = {name: np.asarray(value, dtype=np.float32) for name, value in params.items()}
+        self.kind = kind
+
+    @classmethod
+    def random(cls, kind: str = "mlp", seed: int = 0) -> "NeuralEvaluator":
+        """He-initialised weights, e.g. as a starting point for training."""
+        rng = np.random.default_rng(seed)
+
+        def dense(fan_in: int, fan_out: int) -> np.ndarray:
+            return rng.normal(0, np.sqrt(2 / fan_in), (fan_in, fan_out))
+
+        if kind == "conv":
+            params = {
+                "conv": rng.normal(0, np.sqrt(2 / 32), (16, 2, 4, 4)),
+                "conv_b": np.zeros(16),
+                "w1": dense(16 * 3 * 4, 32),
+                "b1": np.zeros(32),
+                "w2": dense(32, 1),
+                "b2": np.zeros(1),
+            }
+        else:
+            params = {
+                "w1": dense(2 * bb.CELLS, 64),
+                "b1": np.zeros(64),
+                "w2": dense(64, 32),
+                "b2": np.zeros(32),
+                "w3": dense(32, 1),
+                "b3": np.zeros(1),
+            }
+        return cls(params, kind)
+
+    @classmethod
+    def load(cls, path: str) -> "NeuralEvaluator":
+        with np.load(path) as data:
+            params = {name: data[name] for name in data.files if name != "kind"}
+            kind = str(data["kind"])
+        return cls(params, kind)
+
+    def save(self, path: str) -> None:
+        np.savez(path, kind=self.kind, **self.params)
+
+    def predict(self, planes: np.ndarray) -> np.ndarray:
+        """``(N,)`` values in [-1, 1] for ``(N, 2, 6, 7)`` planes."""
+        p = self.params
+        if self.kind == "conv":
+            # (N, 2, 3, 4, 4, 4): every 4x4 patch of both planes
+            patches = sliding_window_view(planes, (4, 4), axis=(2, 3))
+            x = np.einsum("ncyxij,ocij->noyx", patches, p["conv"], optimize=True)
+            x += p["conv_b"][:, None, None]
+            x = _relu(x).reshape(len(planes), -1)
+            x = _relu(x @ p["w1"] + p["b1"])
+            x = x @ p["w2"] + p["b2"]
+        else:
+            x = planes.reshape(len(planes), -1)
+            x = _relu(x @ p["w1"] + p["b1"])
+            x = _relu(x @ p["w2"] + p["b2"])
+            x = x @ p["w3"] + p["b3"]
+        return np.tanh(x[:, 0])
+
+    def evaluate_batch(self, positions: Sequence[int], masks: Sequence[int]) -> np.ndarray:
+        """Integer search scores for many ``(position, mask)`` pairs at once."""
+        if not len(positions):
+            return np.zeros(0, dtype=np.int64)
+        values = self.predict(encode(positions, masks))
+        return np.rint(values * SCORE_SCALE).astype(np.int64)
+
+    def evaluate(self, position: int, mask: int) -> int:
+        """Integer search score of one position for the side to move."""
+        return int(self.evaluate_batch([position], [mask])[0])
+
+    def evaluate_boards(self, boards: Sequence[ConnectFourBoard]) -> np.ndarray:
+        """``evaluate_batch`` for pingv4 boards, each for its side to move."""
+        states = [bb.from_board(board) for board in boards]
+        return self.evaluate_batch([p for p, _ in states], [m for _, m in states])
+
+    def evaluate_board(self, board: ConnectFourBoard) -> int:
+        """Integer search score of a pingv4 board for the side to move."""
+        return self.evaluate(*bb.from_board(board))
+
+    def evaluate_for(self, board: ConnectFourBoard, player: CellState) -> int:
+        """Integer search score of a pingv4 board for ``player``, whoever is to move."""
+        score = self.evaluate_board(board)
+        return score if board.current_player == player else -score
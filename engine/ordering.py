@@ -0,0 +1,91 @@
+"""
+Move ordering from search history instead of sub-searches.
+
+Several bots sort children by playing every move (and every reply) on a
+fresh board just to see which ones win or block, which costs more than the
+search it is meant to speed up.  ``MoveOrderer`` orders moves with table
+lookups only, in this priority:
+
+1. the transposition table's best move
+2. the killer moves of this ply (moves that recently caused a cutoff at the
+   same ply in a sibling subtree)
+3. the history score of the move for the side to move (accumulated
+   ``depth * depth`` for every cutoff it caused)
+
+Ties keep the incoming order, so center-first move lists stay center-first.
+Moves are column indices.
+"""
+
+from typing import List, Optional
+
+from engine.bitboard import CELLS, COLS
+
+TT_MOVE_BONUS = 1 << 42
+KILLER_BONUS = 1 << 41
+
+
+class MoveOrderer:
+    """
+    Per-ply killer slots plus a per-side history table.
+
+    Args:
+        killer_slots: Killer moves remembered per ply.
+        max_ply: Deepest ply that gets killer slots.
+    """
+
+    def __init__(self, killer_slots: int = 2, max_ply: int = CELLS) -> None:
+        self.killer_slots = killer_slots
+        self.killers: List[List[Optional[int]]] = [
+            [None] * killer_slots for _ in range(max_ply + 1)
+        ]
+        # history[ply & 1][col]: the two sides alternate plies
+        self.history: List[List[int]] = [[0] * COLS, [0] * COLS]
+
+    def order(self, moves: List[int], ply: int, tt_move: Optional[int] = None) -> List[int]:
+        """Return ``moves`` sorted best-first."""
+        history = self.history[ply & 1]
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+
+        def score(move: int) -> int:
+            if move == tt_move:
+                return TT_MOVE_BONUS
+            if move in killers:
+                return KILLER_BONUS - killers.index(move)
+            return history[move]
+
+        return sorted(moves, key=score, reverse=True)
+
+    def record_cutoff(self, move: int, ply: int, depth: int) -> None:
+        """Reward ``move`` for causing a beta cutoff ``depth`` plies from the leaves."""
+        if ply < len(self.killers):
+            killers = self.killers[ply]
+            if killers[0] != move:
+                if move in killers:
+                    killers.remove(move)
+                else:
+                    killers.pop()
+                killers.insert(0, move)
+        self.history[ply & 1][move] += depth * depth
+
+    def clear(self) -> None:
+        """Forget the history and killers, e.g. for a bot that must play a fixed move per position."""
+        for table in self.history:
+            for col in range(COLS):
+                table[col] = 0
+        for killers in self.killers:
+            for i in range(self.killer_slots):
+                killers[i] = None
+
+    def age(self) -> None:
+        """
+        Decay the history between searches and forget the killers.
+
+        Called before each new root search so that old games' statistics do
+        not outweigh the current position.
+        """
+        for table in self.history:
+            for col in range(COLS):
+                table[col] >>= 1
+        for killers in self.killers:
+            for i in range(self.killer_slots):
+                killers[i] = None
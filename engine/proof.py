@@ -0,0 +1,187 @@
+"""
+Depth-first proof-number search (df-pn) for forced wins.
+
+A fixed-depth search spends the same effort on every line.  Proof-number
+search instead keeps, for every node, the number of leaves still to be
+settled to prove a win for the attacker (``pn``) and to disprove it
+(``dn``), and always expands the most-proving node: the line that is
+closest to being settled.  Forcing lines, where the defender has a single
+reply, are cheap to prove, so wins twenty or more plies deep are found for
+the cost of a shallow full-width search.  ``ProofSearch`` is the
+depth-first variant of Nagai, which keeps the numbers in a transposition
+table instead of an explicit tree:
+
+* the attacker is the side to move at the root; a draw counts as a
+  disproof
+* only the moves of ``threats.SafeMoves`` are children: a move that
+  loses on the spot is never part of a proof, and one that lets the
+  attacker win on the spot is already refuted
+* a new node starts from its number of safe moves (df-pn+ style), so
+  positions where the defender is nearly forced are tried first
+
+The search stops when the root is settled or the controller's budget runs
+out (usually a node budget, ``PROOF_NODES``), and returns whether the win
+was proven, disproven or neither.
+
+Typical use::
+
+    result = self.prover.prove(*from_board(board))
+    if result.proven:
+        return result.move
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from engine import bitboard as bb
+from engine.control import SearchAborted, SearchController
+from engine.threats import SafeMoves
+
+# Default node budget of a ``prove`` call
+PROOF_NODES = 20_000
+
+# Proof and disproof numbers saturate here
+INFINITY = 1 << 40
+
+# ``prove`` clears the transposition table once it holds this many entries
+TT_LIMIT = 1 << 20
+
+
+@dataclass(frozen=True)
+class ProofResult:
+    """Outcome of a proof search for the side to move."""
+
+    # True: forced win; False: no forced win (draw or loss); None: unknown
+    proven: Optional[bool]
+    # A winning move when proven, otherwise -1
+    move: int
+    nodes: int
+
+    @property
+    def outcome(self) -> str:
+        """``"win"``, ``"no win"`` or ``"unknown"`` for the side to move."""
+        if self.proven is None:
+            return "unknown"
+        return "win" if self.proven else "no win"
+
+    def __str__(self) -> str:
+        return f"move={self.move} {self.outcome} nodes={self.nodes}"
+
+
+class ProofSearch:
+    """
+    df-pn over ``(position, mask)`` states.
+
+    Args:
+        controller: Search budget, restarted by each ``prove`` call; a
+            budget of ``PROOF_NODES`` nodes if omitted.
+        tt: Transposition table mapping a node key to ``(pn, dn)``; shared
+            between calls, a fresh dict if omitted.  Keys combine
+            ``bitboard.key`` with the attacker's side, so searches for
+            either player can share one table.
+    """
+
+    def __init__(
+        self,
+        controller: Optional[SearchController] = None,
+        tt: Optional[Dict[int, Tuple[int, int]]] = None,
+    ) -> None:
+        self.controller = controller if controller is not None else SearchController(max_nodes=PROOF_NODES)
+        self.tt = tt if tt is not None else {}
+        self._attacker = 0
+
+    def prove(self, position: int, mask: int) -> ProofResult:
+        """Try to prove that the side to move can force a win."""
+        self.controller.start()
+        if len(self.tt) > TT_LIMIT:
+            self.tt.clear()
+        self._attacker = mask.bit_count() & 1
+
+        safe = SafeMoves(position, mask)
+        if safe.wins:
+            return ProofResult(True, bb.columns(safe.wins, bb.MOVE_ORDER)[0], 0)
+        pn, dn = self._lookup(position, mask, True)
+        try:
+            if pn and dn:
+                pn, dn = self._mid(position, mask, True, INFINITY, INFINITY)
+        except SearchAborted:
+            return ProofResult(None, -1, self.controller.nodes)
+        if pn:
+            return ProofResult(False, -1, self.controller.nodes)
+        return ProofResult(True, self._proving_move(position, mask), self.controller.nodes)
+
+    def winning_move(self, position: int, mask: int) -> Optional[int]:
+        """The first move of a proven forced win, or None."""
+        result = self.prove(position, mask)
+        return result.move if result.proven else None
+
+    def _key(self, position: int, mask: int) -> int:
+        return (position + mask) << 1 | self._attacker
+
+    def _lookup(self, position: int, mask: int, or_node: bool) -> Tuple[int, int]:
+        """``(pn, dn)`` from the table, or the initial numbers of a new node."""
+        key = self._key(position, mask)
+        numbers = self.tt.get(key)
+        if numbers is not None:
+            return numbers
+
+        if mask == bb.BOARD_MASK:
+            numbers = (INFINITY, 0)
+        else:
+            safe = SafeMoves(position, mask)
+            if or_node:
+                if safe.wins:
+                    numbers = (0, INFINITY)
+                elif safe.lost:
+                    numbers = (INFINITY, 0)
+                else:
+                    numbers = (1, safe.safe.bit_count())
+            else:
+                if safe.wins:
+                    numbers = (INFINITY, 0)
+                elif safe.lost:
+                    numbers = (0, INFINITY)
+                else:
+                    numbers = (safe.safe.bit_count(), 1)
+        self.tt[key] = numbers
+        return numbers
+
+    def _children(self, position: int, mask: int) -> List[Tuple[int, int]]:
+        safe = SafeMoves(position, mask).safe
+        return [bb.play(position, mask, col) for col in bb.columns(safe, bb.MOVE_ORDER)]
+
+    def _mid(self, position: int, mask: int, or_node: bool, pn_limit: int, dn_limit: int) -> Tuple[int, int]:
+        # Only called on unsettled nodes, which have at least one safe move
+        self.controller.tick()
+        children = self._children(position, mask)
+        child_or = not or_node
+        while True:
+            numbers = [self._lookup(p, m, child_or) for p, m in children]
+            # In OR nodes "this" is pn and "other" dn; the other way round in AND nodes
+            if or_node:
+                this = [pn for pn, _ in numbers]
+                other = [dn for _, dn in numbers]
+            else:
+                this = [dn for _, dn in numbers]
+                other = [pn for pn, _ in numbers]
+            this_min = min(this)
+            other_sum = min(INFINITY, sum(other))
+            pn, dn = (this_min, other_sum) if or_node else (other_sum, this_min)
+            if pn >= pn_limit or dn >= dn_limit:
+                self.tt[self._key(position, mask)] = (pn, dn)
+                return pn, dn
+
+            best = this.index(this_min)
+            second = min((v for i, v in enumerate(this) if i != best), default=INFINITY)
+            this_limit, other_limit = (pn_limit, dn_limit) if or_node else (dn_limit, pn_limit)
+            child_this = min(this_limit, second + 1)
+            child_other = other_limit - other_sum + other[best]
+            child_pn, child_dn = (child_this, child_other) if or_node else (child_other, child_this)
+            self._mid(*children[best], child_or, child_pn, child_dn)
+
+    def _proving_move(self, position: int, mask: int) -> int:
+        for col in bb.columns(SafeMoves(position, mask).safe, bb.MOVE_ORDER):
+            child = bb.play(position, mask, col)
+            if self.tt.get(self._key(*child), (1, 1))[0] == 0:
+                return col
+        return -1
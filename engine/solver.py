@@ -0,0 +1,231 @@
+"""
+Exact bitboard solver for the endgame.
+
+Below a couple of dozen empty cells a Connect Four position can be solved
+outright, so the heuristic search is wasted effort there.  ``Solver`` is a
+weak-to-strong alpha-beta solver in the style of Pascal Pons' solver:
+
+* only non-losing moves are searched (a forced block is the only move, and a
+  cell directly below an opponent threat is never played)
+* children are ordered by how many threats they create
+* the score window is narrowed with null-window probes
+* a transposition table keeps upper bounds
+
+Scores use the solver's own scale: ``0`` for a draw, and for a win
+``(CELLS + 1 - n) // 2`` where ``n`` is the number of stones on the board
+just before the winning move, so faster wins score higher.  A positive score
+is a win for the side to move.  ``to_search_score`` converts to the
+``WIN_SCORE - stones`` scale of ``engine.negamax``.
+
+Typical use::
+
+    result = self.solver.endgame(position, mask)
+    if result is not None:
+        return result.move
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from engine import bitboard as bb
+from engine.control import SearchAborted, SearchController
+from engine.negamax import WIN_SCORE
+
+# Below this many empty cells ``Solver.endgame`` takes over from the search
+ENDGAME_EMPTIES = 16
+
+# Node budget of an ``endgame`` call: an ``ENDGAME_EMPTIES`` solve rarely
+# needs more than ~12k nodes, and a node budget, unlike a time limit, keeps
+# the result independent of the host's speed
+ENDGAME_NODES = 200_000
+
+
+@dataclass(frozen=True)
+class SolveResult:
+    """Proven result of a position for the side to move."""
+
+    move: int
+    score: int
+    plies: int
+    nodes: int
+
+    @property
+    def outcome(self) -> str:
+        """``"win"``, ``"draw"`` or ``"loss"`` for the side to move."""
+        if self.score > 0:
+            return "win"
+        if self.score < 0:
+            return "loss"
+        return "draw"
+
+    def __str__(self) -> str:
+        return (
+            f"move={self.move} {self.outcome} score={self.score} "
+            f"plies={self.plies} nodes={self.nodes}"
+        )
+
+
+def non_losing_moves(position: int, mask: int) -> int:
+    """
+    Playable cells that do not hand the opponent an immediate win.
+
+    Assumes the side to move cannot win immediately.  Returns 0 when every
+    move loses.
+    """
+    moves = bb.possible(mask)
+    opponent_wins = bb.winning_squares(position ^ mask, mask)
+    forced = moves & opponent_wins
+    if forced:
+        if forced & (forced - 1):
+            # Two threats to block at once
+            return 0
+        moves = forced
+    return moves & ~(opponent_wins >> 1)
+
+
+def game_length(score: int, mask: int) -> int:
+    """Number of stones on the board when a game scored ``score`` ends."""
+    if score == 0:
+        return bb.CELLS
+    stones = mask.bit_count()
+    # The winner moves when the stone count has its parity
+    parity = stones & 1 if score > 0 else (stones + 1) & 1
+    return bb.CELLS - 2 * abs(score) + parity + 1
+
+
+def to_search_score(score: int, mask: int) -> int:
+    """Convert a solver score to the ``engine.negamax`` scale."""
+    if score == 0:
+        return 0
+    final = WIN_SCORE - game_length(score, mask)
+    return final if score > 0 else -final
+
+
+class Solver:
+    """
+    Exact solver over ``(position, mask)`` states.
+
+    Args:
+        controller: Search budget, restarted by each ``endgame`` call;
+            unlimited if omitted.  Running out raises ``SearchAborted``.
+        tt: Transposition table mapping ``bitboard.key`` to an upper bound
+            on the score; shared between solves, a fresh dict if omitted.
+        threshold: ``endgame`` only solves positions with at most this many
+            empty cells.
+    """
+
+    def __init__(
+        self,
+        controller: Optional[SearchController] = None,
+        tt: Optional[Dict[int, int]] = None,
+        threshold: int = ENDGAME_EMPTIES,
+    ) -> None:
+        self.controller = controller if controller is not None else SearchController()
+        self.tt = tt if tt is not None else {}
+        self.threshold = threshold
+
+    def solve(self, position: int, mask: int) -> int:
+        """Exact score of the position for the side to move."""
+        stones = mask.bit_count()
+        if bb.winning_squares(position, mask) & bb.possible(mask):
+            return (bb.CELLS + 1 - stones) // 2
+        if stones == bb.CELLS:
+            return 0
+
+        low = -((bb.CELLS - stones) // 2)
+        high = (bb.CELLS + 1 - stones) // 2
+        while low < high:
+            # Probe near zero first: most positions are decided quickly
+            med = low + (high - low) // 2
+            if med <= 0 and int(low / 2) < med:
+                med = int(low / 2)
+            elif med >= 0 and int(high / 2) > med:
+                med = int(high / 2)
+            score = self._negamax(position, mask, med, med + 1)
+            if score <= med:
+                high = score
+            else:
+                low = score
+        return low
+
+    def best_move(self, position: int, mask: int) -> SolveResult:
+        """Solve every root move and return the best one."""
+        nodes = self.controller.nodes
+        best_col = -1
+        best_score = -bb.CELLS
+        for col in bb.legal_moves(mask):
+            if bb.is_winning_move(position, mask, col):
+                best_col = col
+                best_score = (bb.CELLS + 1 - mask.bit_count()) // 2
+                break
+            child_position, child_mask = bb.play(position, mask, col)
+            score = -self.solve(child_position, child_mask)
+            if score > best_score:
+                best_col, best_score = col, score
+        plies = game_length(best_score, mask) - mask.bit_count()
+        return SolveResult(best_col, best_score, plies, self.controller.nodes - nodes)
+
+    def endgame(self, position: int, mask: int) -> Optional[SolveResult]:
+        """
+        Solve the position if it is within the endgame threshold.
+
+        Returns None if there are too many empty cells, or if the
+        controller's budget runs out first; the caller then falls back to
+        its heuristic search.
+        """
+        if bb.CELLS - mask.bit_count() > self.threshold:
+            return None
+        self.controller.start()
+        try:
+            return self.best_move(position, mask)
+        except SearchAborted:
+            return None
+
+    def _negamax(self, position: int, mask: int, alpha: int, beta: int) -> int:
+        # The side to move cannot win immediately (checked by the caller)
+        self.controller.tick()
+        stones = mask.bit_count()
+
+        moves = non_losing_moves(position, mask)
+        if not moves:
+            return -((bb.CELLS - stones) // 2)
+        if stones >= bb.CELLS - 2:
+            return 0
+
+        # The opponent cannot win on its next move
+        low = -((bb.CELLS - 2 - stones) // 2)
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+
+        # Nor can we win on this one
+        high = (bb.CELLS - 1 - stones) // 2
+        bound = self.tt.get(position + mask)
+        if bound is not None:
+            high = bound
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        # Search the moves that leave the most threats first
+        children = []
+        for col in bb.MOVE_ORDER:
+            bit = moves & bb.COLUMN[col]
+            if bit:
+                threats = bb.winning_squares(position | bit, mask).bit_count()
+                children.append((threats, col, bit))
+        children.sort(key=lambda child: child[0], reverse=True)
+
+        opponent = position ^ mask
+        for _, _, bit in children:
+            child_mask = mask | bit
+            score = -self._negamax(opponent, child_mask, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.tt[position + mask] = alpha
+        return alpha
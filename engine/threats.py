@@ -0,0 +1,146 @@
+"""
+Bitboard threat map and odd/even parity analysis.
+
+A threat is an empty cell that would complete four in a row for one side.
+Several bots find threats by simulating moves on a pingv4 board, or by
+walking every empty cell with ``board[c, r]``; here the full threat set of
+each side is a handful of shifts and ANDs (``bitboard.winning_squares``),
+cheap enough to call at every node of a search.
+
+Rows are counted from the bottom starting at 1, the usual convention for
+Connect Four parity: the first player wants threats on odd rows (1, 3, 5)
+and the second player on even rows (2, 4, 6), because when the rest of the
+board fills up it is the first player who gets to play the odd cells.
+"""
+
+from engine.bitboard import BOARD_MASK, COLS, HEIGHT, possible, winning_squares
+
+# Cells on rows 1, 3, 5 and on rows 2, 4, 6 (row 1 is the bottom row)
+ODD_ROWS = sum(0b010101 << (col * HEIGHT) for col in range(COLS))
+EVEN_ROWS = sum(0b101010 << (col * HEIGHT) for col in range(COLS))
+
+
+def playable_wins(pieces: int, mask: int) -> int:
+    """Cells ``pieces`` could win on with its next move."""
+    return winning_squares(pieces, mask) & possible(mask)
+
+
+def stacked(threats: int) -> int:
+    """Threats with another threat of the same side directly above them."""
+    return threats & (threats >> 1)
+
+
+def row_parity(cells: int) -> int:
+    """Number of ``cells`` on odd rows minus the number on even rows."""
+    return (cells & ODD_ROWS).bit_count() - (cells & EVEN_ROWS).bit_count()
+
+
+class ThreatMap:
+    """
+    Both sides' threats in one position.
+
+    Attributes prefixed ``own`` belong to the side to move and ``opp`` to
+    its opponent; every attribute is a bitmask of cells.
+
+    Args:
+        position: Pieces of the side to move.
+        mask: All pieces on the board.
+    """
+
+    __slots__ = (
+        "own",
+        "opp",
+        "own_odd",
+        "own_even",
+        "opp_odd",
+        "opp_even",
+        "own_playable",
+        "opp_playable",
+        "own_stacked",
+        "opp_stacked",
+        "first_to_move",
+    )
+
+    def __init__(self, position: int, mask: int) -> None:
+        own = winning_squares(position, mask)
+        opp = winning_squares(position ^ mask, mask)
+        playable = possible(mask)
+        self.own = own
+        self.opp = opp
+        self.own_odd = own & ODD_ROWS
+        self.own_even = own & EVEN_ROWS
+        self.opp_odd = opp & ODD_ROWS
+        self.opp_even = opp & EVEN_ROWS
+        self.own_playable = own & playable
+        self.opp_playable = opp & playable
+        self.own_stacked = stacked(own)
+        self.opp_stacked = stacked(opp)
+        # The first player moves whenever an even number of pieces is down
+        self.first_to_move = not mask.bit_count() & 1
+
+    @property
+    def own_good(self) -> int:
+        """Threats of the side to move on the rows its parity favours."""
+        return self.own_odd if self.first_to_move else self.own_even
+
+    @property
+    def opp_good(self) -> int:
+        """Threats of the opponent on the rows its parity favours."""
+        return self.opp_even if self.first_to_move else self.opp_odd
+
+    def forced_loss(self) -> bool:
+        """
+        True if the opponent wins whatever the side to move does.
+
+        The side to move has no immediate win, and the opponent has two
+        playable threats, or a playable threat with another one stacked on
+        top of it (blocking the first hands over the second).
+        """
+        if self.own_playable:
+            return False
+        threats = self.opp_playable
+        return bool(threats & (threats - 1)) or bool(threats & (self.opp >> 1))
+
+
+class SafeMoves:
+    """
+    Which moves the side to move can afford, from both sides' threats.
+
+    Replaces trying every move and every reply on a pingv4 board: each
+    attribute is a bitmask of playable cells (``bitboard.columns`` turns one
+    into column numbers), computed with a few shifts whatever the position.
+
+    * ``wins``: moves that win on the spot
+    * ``threats``: cells the opponent would win on next move
+    * ``block``: the single threat that must be blocked, or 0 if there is
+      none or more than one
+    * ``safe``: moves that leave no opponent win open, neither an existing
+      threat nor one directly above the move; only ``block`` when there is
+      one, and 0 against two threats
+    * ``lost``: no winning or safe move, so the opponent wins next move
+      whatever the side to move plays
+
+    Args:
+        position: Pieces of the side to move.
+        mask: All pieces on the board.
+    """
+
+    __slots__ = ("wins", "threats", "block", "safe", "lost")
+
+    def __init__(self, position: int, mask: int) -> None:
+        moves = possible(mask)
+        opp = winning_squares(position ^ mask, mask)
+        threats = opp & moves
+        self.wins = winning_squares(position, mask) & moves
+        self.threats = threats
+        self.block = threats if threats and not threats & (threats - 1) else 0
+        if threats:
+            moves = self.block
+        self.safe = moves & ~(opp >> 1)
+        # A full board is a draw, not a loss
+        self.lost = not self.wins and not self.safe and mask != BOARD_MASK
+
+
+def analyze(position: int, mask: int) -> ThreatMap:
+    """Threat map of ``(position, mask)``."""
+    return ThreatMap(position, mask)
@@ -0,0 +1,111 @@
+"""
+Threat-space search: forced wins made only of threats.
+
+Many Connect Four wins are a chain of moves that each create an immediate
+threat, every one of which the opponent must block, until a block is
+impossible (two threats at once, or a threat directly above the block).
+``ThreatSearch`` looks for such chains only:
+
+* the attacker tries the moves of ``threats.SafeMoves.safe`` that leave it
+  a playable winning cell, and nothing else
+* the defender's reply is forced: the single block, or any move at all when
+  the position is already lost
+* results are memoized by ``bitboard.key``, so transpositions of the same
+  threats are searched once, and across calls
+
+With a branching factor close to one, chains of twenty plies and more cost
+less than a depth-6 full-width search.  A chain found is a proven win, but
+not finding one proves nothing: quiet moves are never tried (see
+``engine.proof`` for a complete search).
+
+Typical use::
+
+    line = self.threats.winning_line(*from_board(board))
+    if line is not None:
+        return line[0]
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from engine import bitboard as bb
+from engine.control import SearchAborted, SearchController
+from engine.threats import SafeMoves
+
+# Default node budget of a ``winning_line`` call
+THREAT_NODES = 50_000
+
+# ``winning_line`` clears the memo once it holds this many entries
+MEMO_LIMIT = 1 << 20
+
+
+class ThreatSearch:
+    """
+    Search for a chain of threats that wins by force.
+
+    Args:
+        controller: Search budget, restarted by each ``winning_line`` call;
+            a budget of ``THREAT_NODES`` nodes if omitted.
+        max_plies: Longest chain tried, winning move included.
+        memo: Maps ``bitboard.key`` of a position with the attacker to move
+            to ``(plies, line)``: the winning line, or None if there is none
+            within ``plies`` plies.  Shared between calls, a fresh dict if
+            omitted.
+    """
+
+    def __init__(
+        self,
+        controller: Optional[SearchController] = None,
+        max_plies: int = bb.CELLS,
+        memo: Optional[Dict[int, Tuple[int, Optional[List[int]]]]] = None,
+    ) -> None:
+        self.controller = controller if controller is not None else SearchController(max_nodes=THREAT_NODES)
+        self.max_plies = max_plies
+        self.memo = memo if memo is not None else {}
+
+    def winning_line(self, position: int, mask: int) -> Optional[List[int]]:
+        """
+        Columns of a forced win for the side to move, alternating with the
+        opponent's forced replies and ending on the winning move; None if no
+        chain of threats is found within the budget.
+        """
+        self.controller.start()
+        if len(self.memo) > MEMO_LIMIT:
+            self.memo.clear()
+        try:
+            return self._search(position, mask, self.max_plies)
+        except SearchAborted:
+            return None
+
+    def _search(self, position: int, mask: int, plies: int) -> Optional[List[int]]:
+        safe = SafeMoves(position, mask)
+        if safe.wins:
+            return [bb.columns(safe.wins, bb.MOVE_ORDER)[0]]
+        # A threat takes a move, its block another, and the win a third
+        if plies < 3 or not safe.safe:
+            return None
+
+        key = bb.key(position, mask)
+        known = self.memo.get(key)
+        if known is not None and (known[1] is not None or known[0] >= plies):
+            return known[1]
+        self.controller.tick()
+
+        line = None
+        for col in bb.columns(safe.safe, bb.MOVE_ORDER):
+            child_position, child_mask = bb.play(position, mask, col)
+            reply = SafeMoves(child_position, child_mask)
+            if not reply.threats and not reply.lost:
+                # Not forcing
+                continue
+            if reply.block and not reply.lost:
+                answer = bb.columns(reply.block)[0]
+            else:
+                # Every reply loses; any one will do for the line
+                answer = bb.legal_moves(child_mask)[0]
+            rest = self._search(*bb.play(child_position, child_mask, answer), plies - 2)
+            if rest is not None:
+                line = [col, answer] + rest
+                break
+
+        self.memo[key] = (plies, line)
+        return line
@@ -1,4 +1,6 @@
 from pingv4 import AbstractBot, ConnectFourBoard, CellState
+from engine.bitboard import from_heights, possible
+from engine.threats import row_parity
 
 ROWS = 6
 COLS = 7
@@ -162,12 +164,8 @@ class MyBot(AbstractBot):
     # PARITY
     # ======================
     def _parity(self, board):
-        s = 0
-        for c in range(COLS):
-            h = board.column_heights[c]
-            if h < ROWS:
-                s += 3 if h % 2 == 0 else -3
-        return s
+        # +3 per column whose next cell is on an odd row, -3 per even row
+        return 3 * row_parity(possible(from_heights(board.column_heights)))
 
     # ======================
     # HELPERS
@@ -8,7 +8,8 @@ ae990.py - v17: Fast Fork Bot (<10s per move)
 """
 
 from pingv4 import AbstractBot, ConnectFourBoard, CellState
-import time
+from engine import MoveOrderer, SearchAborted, SearchController
+from engine.lines import cell, wins_after
 
 
 class Ae990(AbstractBot):
@@ -36,10 +37,13 @@ class Ae990(AbstractBot):
         # Build undoable board state (integers only)
         self.grid = [[0] * 6 for _ in range(7)]
         self.heights = list(board.column_heights)
+        # Per-player bitboards alongside the grid, for the last-move win check
+        self.bits = [0, 0, 0]
         for c in range(7):
             for r in range(self.heights[c]):
-                cell = board[c, r]
-                self.grid[c][r] = me if cell == board.current_player else opp
+                player = me if board[c, r] == board.current_player else opp
+                self.grid[c][r] = player
+                self.bits[player] |= 1 << cell(c, r)
 
         # 1. Quick priority checks (very fast)
         quick_move = self.quick_priority(valid_moves)
@@ -47,21 +51,22 @@ class Ae990(AbstractBot):
             return quick_move
 
         # 2. Iterative deepening alpha-beta search
-        start_time = time.time()
         TIME_LIMIT = 9.0
+        self.controller = SearchController(time_limit=TIME_LIMIT - 0.5)  # buffer
+        self.orderer = MoveOrderer()  # killer moves + history heuristic
 
         best_move = self.center_ordered(valid_moves)[0]
         best_score = -999999
 
-        depth = 6
-        while time.time() - start_time < TIME_LIMIT - 0.5:  # buffer
-            current_best_move, current_best_score = self.search_at_depth(
-                depth, start_time, TIME_LIMIT
-            )
-            if current_best_move is not None:
-                best_move = current_best_move
-                best_score = current_best_score
-            depth += 1
+        empty = sum(6 - h for h in self.heights)
+        try:
+            for depth in self.controller.depths(6, max(6, empty)):
+                current_best_move, current_best_score = self.search_at_depth(depth)
+                if current_best_move is not None:
+                    best_move = current_best_move
+                    best_score = current_best_score
+        except SearchAborted:
+            pass  # unfinished depth is discarded
 
         return best_move
 
@@ -69,7 +74,7 @@ class Ae990(AbstractBot):
         # Priority 1: Immediate win
         for col in self.center_ordered(valid_moves):
             self.make_move(col, 1)
-            if self.has_win(1):
+            if self.wins_at(col, 1):
                 self.undo_move(col)
                 return col
             self.undo_move(col)
@@ -77,7 +82,7 @@ class Ae990(AbstractBot):
         # Priority 2: Block immediate opponent win
         for col in self.center_ordered(valid_moves):
             self.make_move(col, 2)
-            if self.has_win(2):
+            if self.wins_at(col, 2):
                 self.undo_move(col)
                 return col
             self.undo_move(col)
@@ -108,7 +113,7 @@ class Ae990(AbstractBot):
 
         return None
 
-    def search_at_depth(self, depth, start_time, time_limit):
+    def search_at_depth(self, depth):
         valid_moves = [c for c in range(7) if self.heights[c] < 6]
         best_move = None
         best_score = -999999
@@ -116,11 +121,8 @@ class Ae990(AbstractBot):
         beta = 999999
 
         for col in self.center_ordered(valid_moves):
-            if time.time() - start_time >= time_limit - 0.5:
-                break
-
             self.make_move(col, 1)
-            score = self.minimax(depth - 1, alpha, beta, False, 2, start_time, time_limit)
+            score = self.minimax(depth - 1, alpha, beta, False, 2, 1)
             self.undo_move(col)
 
             if score > best_score:
@@ -131,9 +133,8 @@ class Ae990(AbstractBot):
 
         return best_move, best_score
 
-    def minimax(self, depth, alpha, beta, maximizing, player, start_time, time_limit):
-        if time.time() - start_time >= time_limit - 0.5:
-            return 0  # timeout → neutral score
+    def minimax(self, depth, alpha, beta, maximizing, player, ply):
+        self.controller.tick()
 
         if depth == 0:
             return self.evaluate()
@@ -142,24 +143,26 @@ class Ae990(AbstractBot):
 
         if maximizing:  # our turn
             max_eval = -999999
-            for col in self.order_moves(valid, 1):
+            for col in self.order_moves(valid, ply):
                 self.make_move(col, 1)
-                eval = self.minimax(depth - 1, alpha, beta, False, player, start_time, time_limit)
+                eval = self.minimax(depth - 1, alpha, beta, False, player, ply + 1)
                 self.undo_move(col)
                 max_eval = max(max_eval, eval)
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    self.orderer.record_cutoff(col, ply, depth)
                     break
             return max_eval
         else:  # opponent turn
             min_eval = 999999
-            for col in self.order_moves(valid, player):
+            for col in self.order_moves(valid, ply):
                 self.make_move(col, player)
-                eval = self.minimax(depth - 1, alpha, beta, True, 3 - player, start_time, time_limit)
+                eval = self.minimax(depth - 1, alpha, beta, True, 3 - player, ply + 1)
                 self.undo_move(col)
                 min_eval = min(min_eval, eval)
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    self.orderer.record_cutoff(col, ply, depth)
                     break
             return min_eval
 
@@ -197,42 +200,25 @@ class Ae990(AbstractBot):
     def make_move(self, col, player):
         r = self.heights[col]
         self.grid[col][r] = player
+        self.bits[player] |= 1 << cell(col, r)
         self.heights[col] += 1
 
     def undo_move(self, col):
         self.heights[col] -= 1
         r = self.heights[col]
+        self.bits[self.grid[col][r]] &= ~(1 << cell(col, r))
         self.grid[col][r] = 0
 
-    def has_win(self, player):
-        # Vertical
-        for c in range(7):
-            for r in range(3):
-                if all(self.grid[c][r + i] == player for i in range(4)):
-                    return True
-        # Horizontal
-        for r in range(6):
-            for c in range(4):
-                if all(self.grid[c + i][r] == player for i in range(4)):
-                    return True
-        # Diagonal /
-        for r in range(3):
-            for c in range(4):
-                if all(self.grid[c + i][r + i] == player for i in range(4)):
-                    return True
-        # Diagonal \
-        for r in range(3):
-            for c in range(3, 7):
-                if all(self.grid[c - i][r + i] == player for i in range(4)):
-                    return True
-        return False
+    def wins_at(self, col, player):
+        # Only the lines through the stone just dropped into col can be new
+        return wins_after(self.bits[player], cell(col, self.heights[col] - 1))
 
     def count_threats(self, player):
         count = 0
         for col in range(7):
             if self.heights[col] < 6:
                 self.make_move(col, player)
-                if self.has_win(player):
+                if self.wins_at(col, player):
                     count += 1
                 self.undo_move(col)
         return count
@@ -241,12 +227,6 @@ class Ae990(AbstractBot):
         order = [3, 2, 4, 1, 5, 0, 6]
         return [c for c in order if c in moves]
 
-    def order_moves(self, valid, player):
-        scored = []
-        for col in valid:
-            self.make_move(col, player)
-            threats = self.count_threats(player)
-            scored.append((threats, col))
-            self.undo_move(col)
-        scored.sort(reverse=True)  # high threats first
-        return [col for _, col in scored] or valid
\ No newline at end of file
+    def order_moves(self, valid, ply):
+        # killer/history ordering instead of a threat count per child
+        return self.orderer.order(self.center_ordered(valid), ply)
\ No newline at end of file
@@ -2,6 +2,7 @@ from pingv4 import AbstractBot, ConnectFourBoard, CellState
 import math
 from typing import Dict, List, Tuple, Optional
 from collections import defaultdict, OrderedDict
+from engine import MoveOrderer
 
 class LRUCache(OrderedDict):
     """
@@ -26,7 +27,8 @@ class LRUCache(OrderedDict):
             del self[oldest]
 
 
-def get_tt_entry(value: float, is_upper_bound: bool = False, is_lower_bound: bool = False) -> dict:
+def get_tt_entry(value: float, is_upper_bound: bool = False, is_lower_bound: bool = False,
+                 best_move: Optional[int] = None) -> dict:
     """
     Create a transposition table entry.
     
@@ -34,6 +36,7 @@ def get_tt_entry(value: float, is_upper_bound: bool = False, is_lower_bound: boo
         value: The score/value to store
         is_upper_bound: True if this is an upper bound (value <= alpha)
         is_lower_bound: True if this is a lower bound (value >= beta)
+        best_move: The move that produced the value, searched first next time
         
     Returns:
         dict: Transposition table entry
@@ -41,7 +44,8 @@ def get_tt_entry(value: float, is_upper_bound: bool = False, is_lower_bound: boo
     return {
         'value': value,
         'UB': is_upper_bound,
-        'LB': is_lower_bound
+        'LB': is_lower_bound,
+        'move': best_move
     }
 
 
@@ -70,19 +74,20 @@ class as617(AbstractBot):
         Determine the best move using minimax with transposition table.
         """
         TT = LRUCache(maxsize=4096)  # Transposition table with LRU eviction
+        self.orderer = MoveOrderer()  # Killer moves + history heuristic
         
         best_score = -float('inf')
         best_move = None
         
         # Get valid moves in optimal search order
         valid_moves = board.get_valid_moves()
-        ordered_moves = self.get_search_order(board, valid_moves)
+        ordered_moves = self.get_search_order(valid_moves, 0)
         
         for move in ordered_moves:
             new_board = board.make_move(move)
             
             # Recursive search
-            score = -self.recurse(new_board, self.DEPTH - 1, -float('inf'), float('inf'), TT)
+            score = -self.recurse(new_board, self.DEPTH - 1, -float('inf'), float('inf'), TT, 1)
             
             if score > best_score:
                 best_score = score
@@ -98,7 +103,7 @@ class as617(AbstractBot):
         return best_move
     
     def recurse(self, board: ConnectFourBoard, depth: int, alpha: float, beta: float, 
-                transposition_table: LRUCache) -> float:
+                transposition_table: LRUCache, ply: int) -> float:
         """
         Recursive negamax search with alpha-beta pruning and transposition table.
         """
@@ -106,8 +111,10 @@ class as617(AbstractBot):
         
         # Transposition table lookup
         board_key = board.hash
+        tt_move = None
         if board_key in transposition_table:
             entry = transposition_table[board_key]
+            tt_move = entry['move']
             
             if entry['LB']:  # Lower bound
                 alpha = max(alpha, entry['value'])
@@ -132,64 +139,44 @@ class as617(AbstractBot):
         
         # Negamax search
         best_value = -float('inf')
+        best_move = None
         
         valid_moves = board.get_valid_moves()
-        ordered_moves = self.get_search_order(board, valid_moves)
+        ordered_moves = self.get_search_order(valid_moves, ply, tt_move)
         
         for move in ordered_moves:
             new_board = board.make_move(move)
             
-            value = -self.recurse(new_board, depth - 1, -beta, -alpha, transposition_table)
-            best_value = max(best_value, value)
+            value = -self.recurse(new_board, depth - 1, -beta, -alpha, transposition_table, ply + 1)
+            if value > best_value:
+                best_value = value
+                best_move = move
             
             alpha = max(alpha, best_value)
             if alpha >= beta:
+                self.orderer.record_cutoff(move, ply, depth)
                 break  # Alpha-beta cutoff
         
         # Transposition table storage
         if best_value <= alpha_original:
             # Upper bound (value <= alpha)
-            transposition_table[board_key] = get_tt_entry(best_value, is_upper_bound=True)
+            transposition_table[board_key] = get_tt_entry(best_value, is_upper_bound=True, best_move=best_move)
         elif best_value >= beta:
             # Lower bound (value >= beta)
-            transposition_table[board_key] = get_tt_entry(best_value, is_lower_bound=True)
+            transposition_table[board_key] = get_tt_entry(best_value, is_lower_bound=True, best_move=best_move)
         else:
             # Exact value
-            transposition_table[board_key] = get_tt_entry(best_value)
+            transposition_table[board_key] = get_tt_entry(best_value, best_move=best_move)
         
         return best_value
     
-    def get_search_order(self, board: ConnectFourBoard, moves: list) -> list:
+    def get_search_order(self, moves: list, ply: int, tt_move: Optional[int] = None) -> list:
         """
         Order moves for optimal search efficiency.
-        Center columns first, then outward.
+        TT move first, then killer and history moves, then center outward.
         """
-        center = board.num_cols // 2
-        
-        # Score each move
-        move_scores = []
-        for move in moves:
-            score = 0
-            
-            # Center preference
-            score += 10 - abs(move - center) * 2
-            
-            # Check for immediate win
-            new_board = board.make_move(move)
-            if new_board.is_victory:
-                score += 1000
-            
-            # Check for block
-            for opp_move in new_board.get_valid_moves():
-                if new_board.make_move(opp_move).is_victory:
-                    score += 500
-                    break
-            
-            move_scores.append((score, move))
-        
-        # Sort by score descending
-        move_scores.sort(key=lambda x: x[0], reverse=True)
-        return [move for _, move in move_scores]
+        center_first = sorted(moves, key=lambda move: abs(move - 3))
+        return self.orderer.order(center_first, ply, tt_move)
     
     def evaluate_leaf(self, board: ConnectFourBoard) -> float:
         """
@@ -11,8 +11,12 @@ Strategy:
 - Deep minimax search (depth 6) for strategic planning
 - Alpha-beta pruning and transposition tables for efficiency
 """
-import time
 from pingv4 import AbstractBot, ConnectFourBoard,CellState
+from engine import SearchAborted, SearchController
+from engine.bitboard import columns, from_board
+from engine.proof import PROOF_NODES, ProofSearch
+from engine.threats import SafeMoves
+from engine.threatspace import THREAT_NODES, ThreatSearch
 
 class as637(AbstractBot):
   """
@@ -26,6 +30,11 @@ class as637(AbstractBot):
     self.killer_moves = [[None, None] for _ in range(20)]
     self.MAX_DEPTH = 8
     self.time_limit = 5.0
+    self.controller = SearchController(time_limit=self.time_limit * 0.9)
+    # Chains of threats first, then df-pn, for forced wins; both take their
+    # time out of the move's budget, minimax gets the rest
+    self.threat_search = ThreatSearch(SearchController(time_limit=self.time_limit * 0.05, max_nodes=THREAT_NODES))
+    self.prover = ProofSearch(SearchController(time_limit=self.time_limit * 0.2, max_nodes=PROOF_NODES))
 
   
   @property
@@ -47,6 +56,7 @@ class as637(AbstractBot):
 
   def get_move(self, board: ConnectFourBoard) -> int:
     """Main decision function"""
+    self.controller.start()
     valid_moves = board.get_valid_moves()
     
     # Opening book
@@ -56,158 +66,83 @@ class as637(AbstractBot):
     elif move_count == 1:
       return 2 if board[3, 0] is not None else 3
     
-    # Layer 1: Immediate win or forced win (early game only)
-    if move_count < 14:
-      win_move = self.find_winning_move(board, valid_moves)
-      if win_move is not None:
-        return win_move
-    else:
-      # Late game: only check direct wins
-      for move in valid_moves:
-        future_board = board.make_move(move)
-        if future_board.is_victory and future_board.winner == board.current_player:
-          return move
+    # Layer 1: Immediate win
+    for move in valid_moves:
+      future_board = board.make_move(move)
+      if future_board.is_victory and future_board.winner == board.current_player:
+        return move
     
     # Layer 2: Block opponent's win
     block_move = self.find_blocking_move(board, valid_moves)
     if block_move is not None:
       return block_move
     
-    # Layer 3: Create fork
-    fork_move = self.find_fork_move(board, valid_moves)
-    if fork_move is not None:
-      return fork_move
+    # Layer 3: Forced win (forks included)
+    forced_win = self.find_forced_win(board)
+    if forced_win is not None:
+      return forced_win
     
     # Layer 4: Iterative deepening minimax
     return self.minimax_search(board, valid_moves)
   
   # ===== TACTICAL LAYERS =====
   
-  def find_winning_move(self, board: ConnectFourBoard, valid_moves: list[int]) -> int | None:
-    """Find immediate winning move or forced win"""
-    # Direct wins
-    for move in valid_moves:
-      future_board = board.make_move(move)
-      if future_board.is_victory and future_board.winner == board.current_player:
-        return move
-    
-    # Forced wins
-    forced_win = self.find_forced_win(board, valid_moves)
-    if forced_win is not None:
-      return forced_win
-    
-    return None
-  
-  def find_forced_win(self, board: ConnectFourBoard, valid_moves: list[int]) -> int | None:
+  def find_forced_win(self, board: ConnectFourBoard) -> int | None:
     """Find moves that force opponent into losing position"""
-    for move in valid_moves:
-      future = board.make_move(move)
-      if not future.is_in_progress:
-        continue
-      
-      opponent_moves = future.get_valid_moves()
-      all_responses_lose = True
-      
-      for opp_move in opponent_moves:
-        opp_future = future.make_move(opp_move)
-        if not opp_future.is_in_progress:
-          all_responses_lose = False
-          break
-        
-        we_can_win = False
-        for our_next in opp_future.get_valid_moves():
-          if opp_future.make_move(our_next).is_victory:
-            we_can_win = True
-            break
-        
-        if not we_can_win:
-          all_responses_lose = False
-          break
-      
-      if all_responses_lose and len(opponent_moves) > 0:
-        return move
-    
-    return None
+    # A chain of threats is cheap to find and often 20+ plies long; the
+    # proof-number search also covers wins that need a quiet move, forks
+    # (a forced win three plies deep) among them
+    position, mask = from_board(board)
+    line = self.threat_search.winning_line(position, mask)
+    if line is not None:
+      return line[0]
+    return self.prover.winning_move(position, mask)
   
   def find_blocking_move(self, board: ConnectFourBoard, valid_moves: list[int]) -> int | None:
     """Block opponent's immediate win"""
-    opponent = self.get_opponent_color(board.current_player)
-    
-    for move in valid_moves:
-      future_board = board.make_move(move)
-      if not future_board.is_in_progress:
-        continue
-      
-      for opponent_move in future_board.get_valid_moves():
-        opponent_future = future_board.make_move(opponent_move)
-        if opponent_future.is_victory and opponent_future.winner == opponent:
-          return opponent_move
-    
-    return None
-  
-  def find_fork_move(self, board: ConnectFourBoard, valid_moves: list[int]) -> int | None:
-    """Find move that creates 2+ winning threats"""
-    for move in valid_moves:
-      future_board = board.make_move(move)
-      if not future_board.is_in_progress:
-        continue
-      
-      winning_moves_count = 0
-      for next_move in future_board.get_valid_moves():
-        next_future = future_board.make_move(next_move)
-        if next_future.is_victory and next_future.winner == board.current_player:
-          winning_moves_count += 1
-          if winning_moves_count >= 2:
-            return move
-    
-    return None
+    threats = SafeMoves(*from_board(board)).threats
+    return columns(threats)[0] if threats else None
   
   # ===== MINIMAX WITH ITERATIVE DEEPENING =====
   
   def minimax_search(self, board: ConnectFourBoard, valid_moves: list[int]) -> int:
-    """Iterative deepening minimax search"""
-    start_time = time.time()
+    """Iterative deepening minimax search, within what is left of the move's budget"""
     best_move = None
     
-    for current_depth in range(1, self.MAX_DEPTH + 1):
-      if time.time() - start_time > self.time_limit * 0.9:
-        break
-      
-      depth_best_move = None
-      best_score = float('-inf')
-      alpha = float('-inf')
-      beta = float('inf')
-      
-      ordered_moves = self.order_moves(valid_moves, 0)
-      
-      for move in ordered_moves:
-        if time.time() - start_time > self.time_limit * 0.9:
-          break
+    try:
+      for current_depth in self.controller.depths(1, self.MAX_DEPTH):
+        depth_best_move = None
+        best_score = float('-inf')
+        alpha = float('-inf')
+        beta = float('inf')
+        
+        ordered_moves = self.order_moves(valid_moves, 0)
         
-        future_board = board.make_move(move)
-        score = -self.minimax(future_board, current_depth - 1, -beta, -alpha, start_time, 1)
+        for move in ordered_moves:
+          future_board = board.make_move(move)
+          score = -self.minimax(future_board, current_depth - 1, -beta, -alpha, 1)
+          
+          if score > best_score:
+            best_score = score
+            depth_best_move = move
+          
+          alpha = max(alpha, score)
+          if alpha >= beta:
+            break
         
-        if score > best_score:
-          best_score = score
-          depth_best_move = move
+        if depth_best_move is not None:
+          best_move = depth_best_move
         
-        alpha = max(alpha, score)
-        if alpha >= beta:
+        if best_score > 900:
           break
-      
-      if depth_best_move is not None:
-        best_move = depth_best_move
-      
-      if best_score > 900:
-        break
+    except SearchAborted:
+      pass  # keep the move from the last completed depth
     
     return best_move if best_move is not None else valid_moves[0]
   
-  def minimax(self, board: ConnectFourBoard, depth: int, alpha: float, beta: float, start_time: float, ply: int) -> float:
+  def minimax(self, board: ConnectFourBoard, depth: int, alpha: float, beta: float, ply: int) -> float:
     """Recursive minimax with all optimizations"""
-    # Time cutoff
-    if time.time() - start_time > self.time_limit * 0.9:
-      return self.evaluate_position(board)
+    self.controller.tick()
     
     # Check cache
     board_hash = board.hash
@@ -235,11 +170,8 @@ class as637(AbstractBot):
     ordered_moves = self.order_moves(board.get_valid_moves(), ply)
     
     for move in ordered_moves:
-      if time.time() - start_time > self.time_limit * 0.9:
-        break
-      
       future_board = board.make_move(move)
-      score = -self.minimax(future_board, depth - 1, -beta, -alpha, start_time, ply + 1)
+      score = -self.minimax(future_board, depth - 1, -beta, -alpha, ply + 1)
       
       if score > max_score:
         max_score = score
@@ -1,6 +1,6 @@
 from typing import Dict, List, Optional, Tuple
-import time
 from pingv4 import AbstractBot, CellState, ConnectFourBoard
+from engine import WIN_SCORE, Negamax, SearchController
 
 
 # --- Constants & Bitboard Logic ---
@@ -181,6 +181,35 @@ class TranspositionTable:
         return self.table.get(key)
 
 
+# --- Search ---
+class BitboardSearch(Negamax):
+    """Shared PVS/aspiration negamax core driven by our Bitboard class."""
+
+    def __init__(self, bot: 'AS658'):
+        super().__init__(bot.controller, bot.tt.table)
+        self.bot = bot
+
+    def moves(self, bb: Bitboard) -> List[int]:
+        return self.bot.get_valid_moves_ordered(bb)
+
+    def play(self, bb: Bitboard, col: int) -> Bitboard:
+        return bb.make_move(col)
+
+    def terminal(self, bb: Bitboard) -> Optional[int]:
+        # Check win for the previous player (opponent of current turn)
+        if bb.is_win():
+            return -(WIN_SCORE - bb.moves_count)
+        if bb.moves_count == 42: # Draw
+            return 0
+        return None
+
+    def evaluate(self, bb: Bitboard) -> int:
+        return self.bot.evaluate(bb)
+
+    def key(self, bb: Bitboard) -> int:
+        return bb.position + bb.mask
+
+
 # --- Bot Implementation ---
 
 class AS658(AbstractBot):
@@ -199,9 +228,8 @@ class AS658(AbstractBot):
     def __init__(self, player: CellState) -> None:
         super().__init__(player)
         self.tt = TranspositionTable()
-        self.start_time = 0.0
         self.time_limit = 6.5  # Max 6.5 seconds per move
-        self.nodes_searched = 0
+        self.controller = SearchController(time_limit=self.time_limit)
         
         # Move ordering optimized: Center columns first
         self.column_order = [3, 2, 4, 1, 5, 0, 6]
@@ -209,6 +237,8 @@ class AS658(AbstractBot):
         # Load Tablebase
         self.book = CompressedTablebase()
 
+        self.search = BitboardSearch(self)
+
     def get_valid_moves_ordered(self, bitboard: Bitboard) -> List[int]:
         valid = []
         for col in self.column_order:
@@ -217,8 +247,7 @@ class AS658(AbstractBot):
         return valid
 
     def get_move(self, board: ConnectFourBoard) -> int:
-        self.start_time = time.time()
-        self.nodes_searched = 0
+        self.controller.start()
         
         # 1. Convert to Bitboard
         bb = Bitboard.from_pingv4(board)
@@ -241,104 +270,10 @@ class AS658(AbstractBot):
             if next_bb.is_win():
                 return col
         
-        # 3. Iterative Deepening
-        best_move = valid_moves[0]
-        # Start deeper than 1 because 1 is trivial
-        max_depth = 42 # Full board
-        
-        try:
-            for depth in range(1, max_depth + 1):
-                move, score = self.negamax(bb, depth, -1000000, 1000000, board.hash)
-                
-                # Time check
-                msg = f"Depth {depth}: Move {move}, Score {score}, Time {time.time() - self.start_time:.3f}s"
-                print(msg) 
-                
-                if time.time() - self.start_time > self.time_limit:
-                    break
-                    
-                best_move = move
-                
-                # If we found a forced win, stop searching deeper
-                if score >= 900000:
-                    print(f"Forced win found at depth {depth}!")
-                    break 
-        except TimeoutError:
-            print(f"Timeout reached at depth {depth}")
-            pass # Return current best move
-            
+        # 3. Iterative Deepening (PVS + aspiration windows)
+        best_move, _ = self.search.iterate(bb)
         return best_move
 
-    def negamax(self, bb: Bitboard, depth: int, alpha: int, beta: int, board_hash: int) -> Tuple[int, int]:
-        self.nodes_searched += 1
-        
-        # Check time every 2048 nodes to avoid invalid system call overhead
-        if (self.nodes_searched & 2047) == 0:
-             if (time.time() - self.start_time) > self.time_limit:
-                 raise TimeoutError()
-
-        # Hash table lookup can be done if we maintained a rolling hash.
-        # However, we can use a simpler TT key: (bb.position, bb.mask) tuple
-        tt_key = (bb.position, bb.mask)
-        tt_entry = self.tt.lookup(tt_key)
-        
-        if tt_entry:
-            tt_depth, tt_flag, tt_score, tt_move = tt_entry
-            if tt_depth >= depth:
-                if tt_flag == 0: # EXACT
-                    return tt_move, tt_score
-                elif tt_flag == 1: # LOWERBOUND
-                    alpha = max(alpha, tt_score)
-                elif tt_flag == 2: # UPPERBOUND
-                    beta = min(beta, tt_score)
-                
-                if alpha >= beta:
-                    return tt_move, tt_score
-
-        # Check win for the previous player (opponent of current turn)
-        if bb.is_win():
-             return -1, -1000000 + (42 - depth) # Prefer faster limits
-             
-        if bb.moves_count == 42: # Draw
-            return -1, 0
-
-        if depth == 0:
-            return -1, self.evaluate(bb)
-
-        best_score = -10000000
-        best_move = -1
-        
-        # Generate moves (column order)
-        valid_moves = []
-        for col in self.column_order:
-             if bb.can_play(col):
-                 valid_moves.append(col)
-                 
-        for col in valid_moves:
-             new_bb = bb.make_move(col)
-             
-             # Recursion
-             # Negate score
-             _, score = self.negamax(new_bb, depth - 1, -beta, -alpha, 0)
-             score = -score
-             
-             if score > best_score:
-                 best_score = score
-                 best_move = col
-                 
-             alpha = max(alpha, score)
-             if alpha >= beta:
-                 break
-                 
-        # Store in TT
-        flag = 0 # EXACT
-        if best_score <= alpha: flag = 2 # UPPERBOUND
-        elif best_score >= beta: flag = 1 # LOWERBOUND
-        
-        self.tt.store(tt_key, depth, flag, best_score, best_move)
-        
-        return best_move, best_score
-
     def evaluate(self, bb: Bitboard) -> int:
         """
         Evaluate position using:
@@ -1,15 +1,33 @@
 from pingv4 import AbstractBot, ConnectFourBoard, CellState
+from engine import MoveOrderer, SearchController
+from engine.bitboard import COLUMN, from_board
+from engine.lines import cell, wins_after
+from engine.solver import ENDGAME_NODES, Solver
+from engine.proof import PROOF_NODES, ProofSearch
+from engine.threats import SafeMoves
+from engine.threatspace import THREAT_NODES, ThreatSearch
 import math
 
 
 class UltimatePigeon(AbstractBot):
-    def __init__(self):
+    def __init__(self, player: CellState):
+        super().__init__(player)
         # Opening book: known strong opening moves
         self.opening_book = {
             # First move: always center (proven best)
             0: 3,
         }
         self.move_count = 0
+        # Move budget in seconds; the forced-win searches take a share of it
+        self.time_limit = 5.0
+        # Killer moves + history heuristic for the negamax search
+        self.orderer = MoveOrderer()
+        # Exact solver for the last few empty cells
+        self.solver = Solver(SearchController(max_nodes=ENDGAME_NODES))
+        # Forced wins before the endgame: chains of threats, then df-pn,
+        # each capped in nodes and in time
+        self.threat_search = ThreatSearch(SearchController(time_limit=self.time_limit * 0.05, max_nodes=THREAT_NODES))
+        self.prover = ProofSearch(SearchController(time_limit=self.time_limit * 0.2, max_nodes=PROOF_NODES))
     
     @property
     def strategy_name(self) -> str:
@@ -36,15 +54,21 @@ class UltimatePigeon(AbstractBot):
         if total_pieces == 0 and my_color == CellState.Red:
             return 3  # Center is mathematically optimal
         
+        # ENDGAME: few enough empty cells to solve exactly
+        result = self.solver.endgame(*from_board(board))
+        if result is not None:
+            return result.move
+        
         # IMMEDIATE WIN
         for move in valid_moves:
             if board.make_move(move).is_victory:
                 return move
         
         # IMMEDIATE BLOCK
+        enemy_pieces = self.pieces(board, enemy_color)
         for move in valid_moves:
             row = board.column_heights[move]
-            if self.creates_win(board, move, row, enemy_color):
+            if self.creates_win(enemy_pieces, move, row):
                 return move
         
         # TACTICAL: Find winning setups (double threats, forks)
@@ -64,6 +88,7 @@ class UltimatePigeon(AbstractBot):
         depth = self.calculate_search_depth(board, total_pieces)
         
         try:
+            self.orderer.age()
             best_move, best_score = self.negamax_search(
                 board, depth, -math.inf, math.inf, my_color, enemy_color
             )
@@ -84,25 +109,15 @@ class UltimatePigeon(AbstractBot):
         else:
             return 10  # Endgame: search to completion if possible
     
-    def creates_win(self, board, col, row, player):
-        """Check if move creates 4-in-a-row."""
-        for dx, dy in [(1,0), (0,1), (1,1), (1,-1)]:
-            count = 1
-            for i in range(1, 4):
-                c, r = col + dx*i, row + dy*i
-                if 0 <= c < 7 and 0 <= r < 6 and board[c, r] == player:
-                    count += 1
-                else:
-                    break
-            for i in range(1, 4):
-                c, r = col - dx*i, row - dy*i
-                if 0 <= c < 7 and 0 <= r < 6 and board[c, r] == player:
-                    count += 1
-                else:
-                    break
-            if count >= 4:
-                return True
-        return False
+    def pieces(self, board, player):
+        """Bitboard of player's stones."""
+        position, mask = from_board(board)
+        return position if player == board.current_player else position ^ mask
+    
+    def creates_win(self, pieces, col, row):
+        """Check if adding (col, row) to pieces creates 4-in-a-row."""
+        bit = cell(col, row)
+        return wins_after(pieces | (1 << bit), bit)
     
     def find_winning_setup(self, board, valid_moves, my_color, enemy_color):
         """
@@ -110,69 +125,18 @@ class UltimatePigeon(AbstractBot):
         - Double threats (two ways to win next turn)
         - Forced sequences
         """
-        for move in valid_moves:
-            temp = board.make_move(move)
-            if temp.is_victory:
-                continue
-            
-            # Count winning opportunities we create
-            win_count = 0
-            for next_move in temp.get_valid_moves():
-                if temp.make_move(next_move).is_victory:
-                    win_count += 1
-            
-            # Two or more wins = opponent can't block both
-            if win_count >= 2:
-                return move
-            
-            # Check if we create a forced win sequence (zugzwang)
-            if self.creates_zugzwang(temp, my_color, enemy_color):
-                return move
-        
-        return None
-    
-    def creates_zugzwang(self, board, my_color, enemy_color):
-        """Check if position forces opponent into losing situation."""
-        # Simple check: do we have multiple threats?
-        threats = 0
-        for move in board.get_valid_moves():
-            temp = board.make_move(move)
-            if temp.is_victory:
-                threats += 1
-        return threats >= 2
+        # Threat chains first (cheap, 20+ plies), then proof-number search
+        # for wins that need a quiet move
+        position, mask = from_board(board)
+        line = self.threat_search.winning_line(position, mask)
+        if line is not None:
+            return line[0]
+        return self.prover.winning_move(position, mask)
     
     def eliminate_losing_moves(self, board, valid_moves, my_color, enemy_color):
         """Remove moves that lead to immediate loss."""
-        safe = []
-        for move in valid_moves:
-            temp = board.make_move(move)
-            
-            # Does opponent win immediately?
-            loses_immediately = False
-            for opp_move in temp.get_valid_moves():
-                if temp.make_move(opp_move).is_victory:
-                    loses_immediately = True
-                    break
-            
-            # Does this give opponent a double threat?
-            if not loses_immediately:
-                opp_threats = 0
-                for opp_move in temp.get_valid_moves():
-                    opp_temp = temp.make_move(opp_move)
-                    if opp_temp.is_victory:
-                        continue
-                    for opp_next in opp_temp.get_valid_moves():
-                        if opp_temp.make_move(opp_next).is_victory:
-                            opp_threats += 1
-                            break
-                
-                if opp_threats >= 2:
-                    loses_immediately = True
-            
-            if not loses_immediately:
-                safe.append(move)
-        
-        return safe
+        safe = SafeMoves(*from_board(board)).safe
+        return [move for move in valid_moves if safe & COLUMN[move]]
     
     def pick_defensive_move(self, board, valid_moves, my_color, enemy_color):
         """When all moves are bad, pick the one that delays loss longest."""
@@ -206,10 +170,10 @@ class UltimatePigeon(AbstractBot):
         
         return min_delay
     
-    def negamax_search(self, board, depth, alpha, beta, my_color, enemy_color):
+    def negamax_search(self, board, depth, alpha, beta, my_color, enemy_color, ply=0):
         """
         Negamax with alpha-beta pruning (cleaner than minimax).
-        Uses enhanced move ordering and killer move heuristic.
+        Uses killer move and history heuristic move ordering.
         """
         valid_moves = board.get_valid_moves()
         
@@ -220,23 +184,9 @@ class UltimatePigeon(AbstractBot):
             return (None, self.evaluate_position(board, my_color, enemy_color))
         
         # Move ordering: critical for alpha-beta efficiency
-        def move_value(col):
-            temp = board.make_move(col)
-            if temp.is_victory:
-                return -10000  # Winning move = highest priority
-            
-            # Prioritize center, then check if it blocks opponent
-            score = abs(col - 3) * 10
-            
-            # Check if it blocks opponent win
-            for opp_move in temp.get_valid_moves():
-                if temp.make_move(opp_move).is_victory:
-                    score -= 5000
-                    break
-            
-            return score
-        
-        valid_moves.sort(key=move_value)
+        # Center first, then killers and history from earlier cutoffs
+        valid_moves.sort(key=lambda col: abs(col - 3))
+        valid_moves = self.orderer.order(valid_moves, ply)
         
         best_move = valid_moves[0]
         best_value = -math.inf
@@ -247,7 +197,7 @@ class UltimatePigeon(AbstractBot):
             # Recursive negamax call (negates score and swaps colors)
             _, value = self.negamax_search(
                 next_board, depth - 1, -beta, -alpha,
-                enemy_color, my_color
+                enemy_color, my_color, ply + 1
             )
             value = -value  # Negate for negamax
             
@@ -257,6 +207,7 @@ class UltimatePigeon(AbstractBot):
             
             alpha = max(alpha, value)
             if alpha >= beta:
+                self.orderer.record_cutoff(move, ply, depth)
                 break  # Prune
         
         return best_move, best_value
@@ -348,12 +299,13 @@ class UltimatePigeon(AbstractBot):
     def count_threats(self, board, color):
         """Count number of 3-in-a-row threats (one move from winning)."""
         threats = 0
+        pieces = self.pieces(board, color)
         
         for col in range(7):
             if col not in board.get_valid_moves():
                 continue
             row = board.column_heights[col]
-            if self.creates_win(board, col, row, color):
+            if self.creates_win(pieces, col, row):
                 threats += 1
         
         return threats
@@ -1,4 +1,8 @@
 from pingv4 import AbstractBot, ConnectFourBoard, CellState
+from engine import SearchController
+from engine.bitboard import from_board, from_heights, possible
+from engine.solver import ENDGAME_NODES, Solver
+from engine.threats import row_parity
 
 ROWS = 6
 COLS = 7
@@ -23,6 +27,7 @@ class MyBot(AbstractBot):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.tt = {}
+        self.solver = Solver(SearchController(max_nodes=ENDGAME_NODES))
 
     # ======================
     # MAIN MOVE
@@ -36,6 +41,11 @@ class MyBot(AbstractBot):
         if sum(board.column_heights) == 0:
             return 3
 
+        # Exact endgame
+        result = self.solver.endgame(*from_board(board))
+        if result is not None:
+            return result.move
+
         # Immediate win
         for c in valid:
             if self._wins_after(board, c, ME):
@@ -162,12 +172,8 @@ class MyBot(AbstractBot):
     # PARITY
     # ======================
     def _parity(self, board):
-        s = 0
-        for c in range(COLS):
-            h = board.column_heights[c]
-            if h < ROWS:
-                s += 3 if h % 2 == 0 else -3
-        return s
+        # +3 per column whose next cell is on an odd row, -3 per even row
+        return 3 * row_parity(possible(from_heights(board.column_heights)))
 
     # ======================
     # HELPERS
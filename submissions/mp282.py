@@ -1,5 +1,6 @@
 from pingv4 import AbstractBot
 from pingv4._core import CellState, ConnectFourBoard
+from engine import BoardNegamax, SearchController
 
 
 class MP282(AbstractBot):
@@ -26,6 +27,10 @@ class MP282(AbstractBot):
         self.depth = depth
         # Pre-order columns for move ordering (center bias)
         self.column_order = [3, 2, 4, 1, 5, 0, 6]
+        # Shared negamax core: PVS + aspiration windows up to self.depth
+        self.tt = {}
+        self.controller = SearchController()
+        self.search = BoardNegamax(self._evaluate_side_to_move, self.controller, self.tt)
     
     @property
     def strategy_name(self) -> str:
@@ -50,54 +55,22 @@ class MP282(AbstractBot):
         # Order moves for better pruning efficiency
         valid_moves = self._order_moves(valid_moves)
         
-        best_score = -float("inf")
-        best_move = valid_moves[0]
-        alpha = -float("inf")
-        beta = float("inf")
-        
-        for col in valid_moves:
-            new_board = board.make_move(col)
-            # Negamax: flip perspective and negate score
-            score = -self._negamax(new_board, self.depth - 1, -beta, -alpha)
-            
-            if score > best_score:
-                best_score = score
-                best_move = col
-            
-            alpha = max(alpha, score)
-        
+        # The table and history carry over between iterations, not moves:
+        # the move stays a function of the position alone
+        self.controller.start()
+        self.tt.clear()
+        self.search.orderer.clear()
+        best_move, _ = self.search.iterate(board, max_depth=self.depth, root_moves=valid_moves)
         return best_move
     
     def _order_moves(self, moves: list) -> list:
         """Order moves by strategic preference (center-first)."""
         return sorted(moves, key=lambda x: abs(x - 3))
     
-    def _negamax(self, board: ConnectFourBoard, depth: int, alpha: float, beta: float) -> float:
-        """
-        Negamax algorithm with alpha-beta pruning.
-        Returns the score from the perspective of the current player.
-        """
-        valid_moves = board.get_valid_moves()
-        
-        # Terminal state checks
-        if board.is_victory:
-            # Return large positive or negative score
-            return -self.FOUR_SCORE if board.winner == self.player else self.FOUR_SCORE
-        if board.is_tie:
-            return 0
-        if depth == 0:
-            return self._evaluate_position(board)
-        
-        max_eval = -float("inf")
-        for col in valid_moves:
-            new_board = board.make_move(col)
-            # Recursive negamax call
-            eval_score = -self._negamax(new_board, depth - 1, -beta, -alpha)
-            max_eval = max(max_eval, eval_score)
-            alpha = max(alpha, eval_score)
-            if alpha >= beta:
-                break  # Beta cutoff
-        return max_eval
+    def _evaluate_side_to_move(self, board: ConnectFourBoard) -> int:
+        """Negamax leaf score: our evaluation, negated on the opponent's turn."""
+        score = self._evaluate_position(board)
+        return score if board.current_player == self.player else -score
     
     def _evaluate_position(self, board: ConnectFourBoard) -> float:
         """
@@ -107,7 +80,7 @@ class MP282(AbstractBot):
         score = 0
         
         # Center column preference
-        center_array = [board.cell_states[3][row] for row in range(board.rows)]
+        center_array = [board.cell_states[3][row] for row in range(board.num_rows)]
         center_count = center_array.count(self.player)
         score += center_count * 3
         
@@ -126,8 +99,8 @@ class MP282(AbstractBot):
     def _evaluate_horizontal(self, board: ConnectFourBoard) -> float:
         """Evaluate horizontal windows."""
         score = 0
-        for row in range(board.rows):
-            for col in range(board.cols - 3):
+        for row in range(board.num_rows):
+            for col in range(board.num_cols - 3):
                 window = self._get_window(board, col, row, 0, 1)
                 score += self._evaluate_window(window)
         return score
@@ -135,8 +108,8 @@ class MP282(AbstractBot):
     def _evaluate_vertical(self, board: ConnectFourBoard) -> float:
         """Evaluate vertical windows."""
         score = 0
-        for col in range(board.cols):
-            for row in range(board.rows - 3):
+        for col in range(board.num_cols):
+            for row in range(board.num_rows - 3):
                 window = self._get_window(board, col, row, 1, 0)
                 score += self._evaluate_window(window)
         return score
@@ -144,8 +117,8 @@ class MP282(AbstractBot):
     def _evaluate_diagonal(self, board: ConnectFourBoard) -> float:
         """Evaluate positive diagonal windows (going up-right)."""
         score = 0
-        for row in range(board.rows - 3):
-            for col in range(board.cols - 3):
+        for row in range(board.num_rows - 3):
+            for col in range(board.num_cols - 3):
                 window = self._get_window(board, col, row, 1, 1)
                 score += self._evaluate_window(window)
         return score
@@ -153,8 +126,8 @@ class MP282(AbstractBot):
     def _evaluate_anti_diagonal(self, board: ConnectFourBoard) -> float:
         """Evaluate negative diagonal windows (going up-left)."""
         score = 0
-        for row in range(board.rows - 3):
-            for col in range(3, board.cols):
+        for row in range(board.num_rows - 3):
+            for col in range(3, board.num_cols):
                 window = self._get_window(board, col, row, 1, -1)
                 score += self._evaluate_window(window)
         return score
@@ -166,10 +139,10 @@ class MP282(AbstractBot):
         for i in range(self.WINDOW_LENGTH):
             new_row = row + i * delta_row
             new_col = col + i * delta_col
-            if 0 <= new_row < board.rows and 0 <= new_col < board.cols:
+            if 0 <= new_row < board.num_rows and 0 <= new_col < board.num_cols:
                 cells.append(board.cell_states[new_col][new_row])
             else:
-                cells.append(CellState.Empty)
+                cells.append(None)
         return cells
     
     def _evaluate_window(self, window: list) -> float:
@@ -179,18 +152,10 @@ class MP282(AbstractBot):
         """
         score = 0
         
-        # Convert CellState to our scoring format
-        piece_map = {
-            self.player: self.AI_PIECE,
-            CellState.Red: self.HUMAN_PIECE if self.player == CellState.Yellow else self.AI_PIECE,
-            CellState.Yellow: self.HUMAN_PIECE if self.player == CellState.Red else self.AI_PIECE,
-            CellState.Empty: self.EMPTY
-        }
-        
         # Handle case where window contains opponent pieces
         pieces = []
         for cell in window:
-            if cell == CellState.Empty:
+            if cell is None:
                 pieces.append(self.EMPTY)
             elif cell == self.player:
                 pieces.append(self.AI_PIECE)
@@ -1,5 +1,7 @@
 from pingv4 import AbstractBot, ConnectFourBoard, CellState, Connect4Game, MinimaxBot, RandomBot
 from typing import Dict, Tuple
+from engine.bitboard import columns, from_board
+from engine.threats import SafeMoves
 
 
 class pravin_s(AbstractBot):
@@ -31,88 +33,18 @@ class pravin_s(AbstractBot):
             return valid_moves[0]
         
         # 1. IMMEDIATE WIN CHECK
-        for col in valid_moves:
-            test = board.make_move(col)
-            if test.is_victory and test.winner == me:
-                return col
+        safe = SafeMoves(*from_board(board))
+        if safe.wins:
+            return columns(safe.wins)[0]
         
         # 2. IMMEDIATE BLOCK CHECK (critical!)
-        opponent = CellState.Yellow if me == CellState.Red else CellState.Red
-        for col in valid_moves:
-            if self._opponent_wins_here(board, col, opponent):
-                return col
+        if safe.threats:
+            return columns(safe.threats)[0]
         
         # 3. Use enhanced minimax with depth 7
         best_col, _ = self.minimax(board, self.MAX_DEPTH, -float('inf'), float('inf'), True, me)
         return best_col
     
-    def _opponent_wins_here(self, board: ConnectFourBoard, col: int, opponent: CellState) -> bool:
-        """Check if opponent would win by playing at col"""
-        if col not in board.get_valid_moves():
-            return False
-        
-        row = board.column_heights[col]
-        if row >= board.num_rows:
-            return False
-        
-        # Horizontal
-        count = 0
-        for c in range(max(0, col-3), min(7, col+4)):
-            if c == col:
-                count += 1
-            elif board[c, row] == opponent:
-                count += 1
-            else:
-                count = 0
-            if count >= 4:
-                return True
-        
-        # Vertical (only check down)
-        count = 1
-        for r in range(row-1, -1, -1):
-            if board[col, r] == opponent:
-                count += 1
-            else:
-                break
-        if count >= 4:
-            return True
-        
-        # Diagonal /
-        count = 1
-        # Down-left
-        c, r = col-1, row-1
-        while c >= 0 and r >= 0 and board[c, r] == opponent:
-            count += 1
-            c -= 1
-            r -= 1
-        # Up-right
-        c, r = col+1, row+1
-        while c < 7 and r < 6 and board[c, r] == opponent:
-            count += 1
-            c += 1
-            r += 1
-        if count >= 4:
-            return True
-        
-        # Diagonal \
-        count = 1
-        # Up-left
-        c, r = col-1, row+1
-        while c >= 0 and r < 6 and board[c, r] == opponent:
-            count += 1
-            c -= 1
-            r += 1
-        # Down-right
-        c, r = col+1, row-1
-        while c < 7 and r >= 0 and board[c, r] == opponent:
-            count += 1
-            c += 1
-            r -= 1
-        if count >= 4:
-            return True
-        
-        return False
-
     def minimax(self, board: ConnectFourBoard, depth: int, alpha: float,
                 beta: float, is_maximizing: bool, my_color: CellState) -> Tuple[int, float]:
         """Enhanced minimax with alpha-beta pruning and transposition table"""
@@ -13,6 +13,13 @@ class ss691(AbstractBot):
     COLUMN_COUNT = 7
     WINDOW_LENGTH = 4
 
+    # Transposition table flags (values are bounds under alpha-beta)
+    EXACT, LOWER, UPPER = 0, 1, 2
+    # Terminal values hold at any depth
+    TERMINAL_DEPTH = 99
+    # Place value of each cell in the base-3 position key
+    POW3 = [3 ** i for i in range(ROW_COUNT * COLUMN_COUNT)]
+
     def __init__(self, color: CellState):
         super().__init__(color)
 
@@ -27,8 +34,11 @@ class ss691(AbstractBot):
         self.PLAYER_PIECE = 1
         self.AI_PIECE = 2
 
-        # Transposition table
+        # Transposition table: key -> (depth, flag, column, value)
         self.tt = {}
+        # Base-3 key of the grid being searched, kept up to date by
+        # drop_piece / remove_piece
+        self.key = 0
 
         # Depth (8 is strong but still feasible with caching)
         self.DEPTH = 8
@@ -59,7 +69,13 @@ class ss691(AbstractBot):
     # Helpers
     # ----------------------------
     def grid_key(self, grid):
-        return tuple(tuple(row) for row in grid)
+        # Each cell is a base-3 digit (0 empty, 1 opponent, 2 us); the side to
+        # move follows from the piece count, so the key alone names the node
+        return sum(
+            grid[r][c] * self.POW3[r * self.COLUMN_COUNT + c]
+            for r in range(self.ROW_COUNT)
+            for c in range(self.COLUMN_COUNT)
+        )
 
     def order_moves(self, valid_locations):
         center = self.COLUMN_COUNT // 2
@@ -76,6 +92,11 @@ class ss691(AbstractBot):
 
     def drop_piece(self, grid, row, col, piece):
         grid[row][col] = piece
+        self.key += piece * self.POW3[row * self.COLUMN_COUNT + col]
+
+    def remove_piece(self, grid, row, col):
+        self.key -= grid[row][col] * self.POW3[row * self.COLUMN_COUNT + col]
+        grid[row][col] = self.EMPTY
 
     def get_valid_locations(self, grid):
         return [col for col in range(self.COLUMN_COUNT) if self.is_valid_location(grid, col)]
@@ -199,9 +220,22 @@ class ss691(AbstractBot):
     # Minimax with alpha-beta + caching
     # ----------------------------
     def minimax(self, grid, depth, alpha, beta, maximizingPlayer):
-        key = (self.grid_key(grid), depth, maximizingPlayer)
-        if key in self.tt:
-            return self.tt[key]
+        key = self.key
+        alpha_orig, beta_orig = alpha, beta
+        tt_move = None
+        entry = self.tt.get(key)
+        if entry is not None:
+            entry_depth, flag, column, value = entry
+            tt_move = column
+            if entry_depth >= depth:
+                if flag == self.EXACT:
+                    return (column, value)
+                if flag == self.LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return (column, value)
 
         valid_locations = self.get_valid_locations(grid)
         is_terminal = self.is_terminal_node(grid)
@@ -214,15 +248,20 @@ class ss691(AbstractBot):
                     result = (None, -10000000000000)
                 else:
                     result = (None, 0)
+                self.tt[key] = (self.TERMINAL_DEPTH, self.EXACT) + result
             else:
                 result = (None, self.score_position(grid, self.AI_PIECE))
-
-            self.tt[key] = result
+                self.tt[key] = (0, self.EXACT) + result
             return result
 
-        # Move ordering = huge pruning boost
+        # Move ordering = huge pruning boost; the best move found for this
+        # position by an earlier (shallower) search goes first
         valid_locations = self.order_moves(valid_locations)
+        if tt_move in valid_locations:
+            valid_locations.remove(tt_move)
+            valid_locations.insert(0, tt_move)
 
+        # Children are searched in place: drop, recurse, remove
         if maximizingPlayer:
             value = -math.inf
             column = valid_locations[0]
@@ -230,10 +269,9 @@ class ss691(AbstractBot):
             for col in valid_locations:
                 row = self.get_next_open_row(grid, col)
 
-                b_copy = [r[:] for r in grid]
-                self.drop_piece(b_copy, row, col, self.AI_PIECE)
-
-                new_score = self.minimax(b_copy, depth - 1, alpha, beta, False)[1]
+                self.drop_piece(grid, row, col, self.AI_PIECE)
+                new_score = self.minimax(grid, depth - 1, alpha, beta, False)[1]
+                self.remove_piece(grid, row, col)
 
                 if new_score > value:
                     value = new_score
@@ -243,10 +281,6 @@ class ss691(AbstractBot):
                 if alpha >= beta:
                     break
 
-            result = (column, value)
-            self.tt[key] = result
-            return result
-
         else:
             value = math.inf
             column = valid_locations[0]
@@ -254,10 +288,9 @@ class ss691(AbstractBot):
             for col in valid_locations:
                 row = self.get_next_open_row(grid, col)
 
-                b_copy = [r[:] for r in grid]
-                self.drop_piece(b_copy, row, col, self.PLAYER_PIECE)
-
-                new_score = self.minimax(b_copy, depth - 1, alpha, beta, True)[1]
+                self.drop_piece(grid, row, col, self.PLAYER_PIECE)
+                new_score = self.minimax(grid, depth - 1, alpha, beta, True)[1]
+                self.remove_piece(grid, row, col)
 
                 if new_score < value:
                     value = new_score
@@ -267,18 +300,25 @@ class ss691(AbstractBot):
                 if alpha >= beta:
                     break
 
-            result = (column, value)
-            self.tt[key] = result
-            return result
+        if value <= alpha_orig:
+            flag = self.UPPER
+        elif value >= beta_orig:
+            flag = self.LOWER
+        else:
+            flag = self.EXACT
+        self.tt[key] = (depth, flag, column, value)
+        return (column, value)
 
     # ----------------------------
     # BOT MOVE
     # ----------------------------
     def get_move(self, board: ConnectFourBoard) -> int:
-        # Clear cache each move (important!)
+        # Clear cache each move (important!): leftover entries would reorder
+        # the search and make the move depend on the game so far
         self.tt.clear()
 
         grid = self.to_grid(board)
+        self.key = self.grid_key(grid)
         valid = self.get_valid_locations(grid)
 
         if not valid:
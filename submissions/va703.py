@@ -1,4 +1,6 @@
 from pingv4 import AbstractBot, ConnectFourBoard, CellState
+from engine.bitboard import BOARD_MASK, from_board, from_heights
+from engine.threats import playable_wins, row_parity
 import random
 
 ROWS = 6
@@ -164,25 +166,16 @@ class va703(AbstractBot):
         return self._count_winning_moves(board, player) >= 2
 
     def _count_winning_moves(self, board, player):
-        count = 0
-        for col in board.get_valid_moves():
-            next_board = board.make_move(col)
-            if next_board.is_victory and next_board.winner == player:
-                count += 1
-        return count
+        position, mask = from_board(board)
+        pieces = position if player == board.current_player else position ^ mask
+        return playable_wins(pieces, mask).bit_count()
 
     # ================== PARITY CONTROL ==================
 
     def _parity_score(self, board, ME, OPP):
-        score = 0
-        for c in range(COLS):
-            for r in range(ROWS):
-                if board[c, r] is None:
-                    if r % 2 == 1:
-                        score += 1
-                    else:
-                        score -= 1
-        return score
+        # +1 per empty cell on an even row, -1 per empty cell on an odd row
+        empty = BOARD_MASK ^ from_heights(board.column_heights)
+        return -row_parity(empty)
 
     # ================== OPENING BOOK ==================
 
@@ -1,6 +1,8 @@
 import math
 import random
 from pingv4 import AbstractBot, ConnectFourBoard, CellState
+from engine.bitboard import from_board
+from engine.lines import cell, wins_after
 
 class vm119(AbstractBot):
 
@@ -35,12 +37,15 @@ class vm119(AbstractBot):
         # ----------------------------------------
         # PHASE 2: MUST I BLOCK? (Survival)
         # ----------------------------------------
-        # We manually check if the opponent has a winning move at any valid column.
+        # We check if the opponent has a winning move at any valid column.
         # Since we can't "make_move" as the opponent on the current board,
-        # we calculate it manually using the board accessor board[c, r].
+        # we drop their piece into a bitboard of their stones instead and
+        # test only the lines through the cell where it would land.
+        position, mask = from_board(board)
+        opp_pieces = position ^ mask
         for col in valid_moves:
-            row = board.column_heights[col] # The row where the piece would land
-            if self.check_manual_win(board, col, row, opp):
+            bit = cell(col, board.column_heights[col]) # Where the piece would land
+            if wins_after(opp_pieces | (1 << bit), bit):
                 return col
 
         # ----------------------------------------
@@ -61,36 +66,6 @@ class vm119(AbstractBot):
             if c in valid_moves: return c
         return valid_moves[0]
 
-    def check_manual_win(self, board, col, row, color):
-        """
-        Manually checks if placing 'color' at (col, row) creates a line of 4.
-        """
-        # Directions: (dx, dy) -> Horizontal, Vertical, Diag1, Diag2
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-        
-        for dx, dy in directions:
-            count = 1 # Start with 1 for the piece we are imagining placing
-            
-            # Check Positive Direction
-            for i in range(1, 4):
-                c, r = col + dx*i, row + dy*i
-                if 0 <= c < 7 and 0 <= r < 6 and board[c, r] == color:
-                    count += 1
-                else:
-                    break
-            
-            # Check Negative Direction
-            for i in range(1, 4):
-                c, r = col - dx*i, row - dy*i
-                if 0 <= c < 7 and 0 <= r < 6 and board[c, r] == color:
-                    count += 1
-                else:
-                    break
-            
-            if count >= 4:
-                return True
-        return False
-
     def minimax(self, board, depth, alpha, beta, maximizing, me, opp):
         valid_moves = board.get_valid_moves()
         